@@ -0,0 +1,178 @@
+import argparse
+import copy
+import hashlib
+import pickle
+import sqlite3
+import threading
+import sys
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence
+
+from logger import get_logger
+
+class AnalysisCache:
+    def __init__(self, max_entries: int = 1024, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.logger = get_logger(__name__, log_level="DEBUG")
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        # Trivial re-edits (line endings, unicode composition, surrounding
+        # whitespace) map to the same entry
+        text = unicodedata.normalize("NFC", text)
+        return text.replace("\r\n", "\n").strip()
+
+    @classmethod
+    def make_key(cls, text: str, version: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(version.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(cls.normalize(text).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, text: str, version: str) -> Optional[dict]:
+        key = self.make_key(text, version)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(result)
+
+            result = self._disk_get(key)
+            if result is not None:
+                self.disk_hits += 1
+                self._remember(key, result)
+                return copy.deepcopy(result)
+
+            self.misses += 1
+            return None
+
+    def put(self, text: str, version: str, result: dict):
+        # Entries are private snapshots: the caller's result (its nested
+        # dicts and its Decision) is copied in here and copied out on every
+        # hit, so no caller can mutate what a later hit sees
+        key = self.make_key(text, version)
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._remember(key, result)
+            self._disk_put(key, version, result)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self.db_path:
+                self._connect().execute("DELETE FROM analyses")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def prune(self, keep_versions: Optional[Sequence[str]] = None, max_age: Optional[float] = None) -> int:
+        # The disk tier may be shared by processes running different model or
+        # pipeline versions, so nothing is dropped implicitly. Removes entries
+        # whose version isn't in keep_versions and entries older than max_age
+        # seconds; returns how many were removed.
+        if not self.db_path:
+            return 0
+        conditions, parameters = [], []
+        if keep_versions is not None:
+            conditions.append(f"version NOT IN ({', '.join('?' * len(keep_versions))})" if keep_versions else "1")
+            parameters.extend(keep_versions)
+        if max_age is not None:
+            conditions.append("created < ?")
+            parameters.append(time.time() - max_age)
+        if not conditions:
+            return 0
+        with self._lock:
+            db = self._connect()
+            removed = db.execute(f"DELETE FROM analyses WHERE {' OR '.join(conditions)}", parameters).rowcount
+            db.commit()
+            self.invalidations += removed
+        if removed:
+            self.logger.info("Pruned cache entries", removed=removed, keep_versions=keep_versions, max_age=max_age)
+        return removed
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key: str, result: dict):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                "key TEXT PRIMARY KEY, version TEXT NOT NULL, value BLOB NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def _disk_get(self, key: str) -> Optional[dict]:
+        if not self.db_path:
+            return None
+        # The key already covers the version; other versions' rows are left alone
+        row = self._connect().execute("SELECT value FROM analyses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return pickle.loads(row[0])
+        except Exception as exc:
+            self.logger.warning("Discarding unreadable cache entry", key=key, error=str(exc))
+            self._db.execute("DELETE FROM analyses WHERE key = ?", (key,))
+            self._db.commit()
+            return None
+
+    def _disk_put(self, key: str, version: str, result: dict):
+        if not self.db_path:
+            return
+        self._connect().execute(
+            "INSERT OR REPLACE INTO analyses (key, version, value, created) VALUES (?, ?, ?, ?)",
+            (key, version, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL), time.time()),
+        )
+        self._db.commit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prune a shared on-disk analysis cache.")
+    parser.add_argument("db_path")
+    parser.add_argument("--keep-version", dest="keep_versions", action="append", default=None,
+                        help="Cache version to keep (repeatable); entries of every other version are removed")
+    parser.add_argument("--max-age-days", type=float, default=None, help="Remove entries older than this")
+    args = parser.parse_args()
+
+    cache = AnalysisCache(db_path=args.db_path)
+    max_age = args.max_age_days * 86400 if args.max_age_days is not None else None
+    print(cache.prune(args.keep_versions, max_age))
+    cache.close()
+    sys.exit(0)
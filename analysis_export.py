@@ -0,0 +1,370 @@
+import abc
+import argparse
+import csv
+import json
+import os
+import sys
+import zipfile
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from conversation_store import DEFAULT_EMOTION_LABELS, ConversationStoreReader
+from logger import configure_logging, get_logger
+from models import DIMENSIONS, DecisionBatch, Philosophy, PhilosophicalCompendium
+
+# Every field any sentiment backend can produce; absent ones export as NaN
+SENTIMENT_FIELDS = ("polarity", "subjectivity", "compound", "pos", "neu", "neg")
+
+Chunk = Dict[str, np.ndarray]
+
+class ExportSchema:
+    # Flat, fixed column layout shared by every format: text columns first,
+    # then float64 columns for sentiment, emotions, moral dimensions,
+    # goodness and philosophies
+    def __init__(self, emotion_labels: Sequence[str] = DEFAULT_EMOTION_LABELS, include_text: bool = True, include_response: bool = False):
+        self.emotion_labels = tuple(emotion_labels)
+        self.text_columns: List[str] = ["id"]
+        if include_text:
+            self.text_columns.append("text")
+        if include_response:
+            self.text_columns.append("response")
+        self.sentiment_columns = [f"sentiment_{field}" for field in SENTIMENT_FIELDS]
+        self.emotion_columns = [f"emotion_{label}" for label in self.emotion_labels]
+        self.moral_columns = [f"moral_{dimension.name}" for dimension in DIMENSIONS]
+        self.philosophy_columns = [f"philosophy_{philosophy.name}" for philosophy in Philosophy]
+        self.float_columns = [
+            *self.sentiment_columns, *self.emotion_columns, *self.moral_columns, "goodness", *self.philosophy_columns
+        ]
+
+    @property
+    def columns(self) -> List[str]:
+        return self.text_columns + self.float_columns
+
+    def rows_to_chunk(self, rows: Sequence[dict]) -> Chunk:
+        # Rows as produced by analysis_to_dict() (and cli.py); keys the row
+        # doesn't have become "" or NaN. `values` is column-major, so each
+        # exported column is one contiguous row of it.
+        values = np.full((len(self.float_columns), len(rows)), np.nan)
+        sentiment_at = {field: i for i, field in enumerate(SENTIMENT_FIELDS)}
+        emotion_at = {label: len(SENTIMENT_FIELDS) + i for i, label in enumerate(self.emotion_labels)}
+        moral_at = {dimension.name: len(SENTIMENT_FIELDS) + len(self.emotion_labels) + i for i, dimension in enumerate(DIMENSIONS)}
+        goodness_at = len(SENTIMENT_FIELDS) + len(self.emotion_labels) + len(DIMENSIONS)
+        philosophy_at = {philosophy.name: goodness_at + 1 + i for i, philosophy in enumerate(Philosophy)}
+
+        for r, row in enumerate(rows):
+            for fields, positions in (
+                (row.get("sentiment", {}), sentiment_at),
+                (row.get("emotions", {}), emotion_at),
+                (row.get("moral_scores", {}), moral_at),
+                (row.get("philosophical_evaluation", {}), philosophy_at),
+            ):
+                for key, value in fields.items():
+                    column = positions.get(key)
+                    if column is not None and value is not None:
+                        values[column, r] = value
+            if row.get("goodness") is not None:
+                values[goodness_at, r] = row["goodness"]
+
+        chunk: Chunk = {
+            column: np.array(["" if row.get(column) is None else str(row[column]) for row in rows], dtype=object)
+            for column in self.text_columns
+        }
+        chunk.update(zip(self.float_columns, values))
+        return chunk
+
+class ExportWriter(abc.ABC):
+    # Appends column chunks to one file; a chunk is written and dropped as
+    # soon as it arrives, so memory stays bounded by the chunk size
+    extension = ""
+
+    def __init__(self, path: str, schema: ExportSchema):
+        self.path = path
+        self.schema = schema
+        self.rows = 0
+
+    @abc.abstractmethod
+    def write_chunk(self, chunk: Chunk):
+        ...
+
+    def close(self):
+        pass
+
+    def __enter__(self) -> "ExportWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class CsvExportWriter(ExportWriter):
+    extension = "csv"
+
+    def __init__(self, path: str, schema: ExportSchema):
+        super().__init__(path, schema)
+        self._handle = open(path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._handle)
+        self._writer.writerow(schema.columns)
+
+    def write_chunk(self, chunk: Chunk):
+        # NaN is written as an empty field
+        columns = [chunk[column].tolist() for column in self.schema.text_columns]
+        columns += [np.where(np.isnan(chunk[column]), None, chunk[column]).tolist() for column in self.schema.float_columns]
+        self._writer.writerows(zip(*columns))
+        self.rows += len(columns[0]) if columns else 0
+
+    def close(self):
+        if not self._handle.closed:
+            self._handle.close()
+
+class JsonlExportWriter(ExportWriter):
+    extension = "jsonl"
+
+    def __init__(self, path: str, schema: ExportSchema):
+        super().__init__(path, schema)
+        self._handle = open(path, "w", encoding="utf-8")
+
+    def write_chunk(self, chunk: Chunk):
+        # NaN isn't valid JSON; it is written as null
+        names = self.schema.columns
+        columns = [chunk[column].tolist() for column in self.schema.text_columns]
+        columns += [np.where(np.isnan(chunk[column]), None, chunk[column]).tolist() for column in self.schema.float_columns]
+        count = 0
+        for values in zip(*columns):
+            self._handle.write(json.dumps(dict(zip(names, values))))
+            self._handle.write("\n")
+            count += 1
+        self.rows += count
+
+    def close(self):
+        if not self._handle.closed:
+            self._handle.close()
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as exc:
+        raise ImportError("Arrow and Parquet export require the pyarrow package; use the npz format instead") from exc
+    return pyarrow
+
+class _ArrowExportWriter(ExportWriter):
+    def __init__(self, path: str, schema: ExportSchema):
+        super().__init__(path, schema)
+        self._pa = _require_pyarrow()
+        self._arrow_schema = self._pa.schema(
+            [(column, self._pa.string()) for column in schema.text_columns]
+            + [(column, self._pa.float64()) for column in schema.float_columns]
+        )
+        self._writer = None
+        self._closed = False
+
+    @abc.abstractmethod
+    def _open(self):
+        ...
+
+    def write_chunk(self, chunk: Chunk):
+        if self._writer is None:
+            self._writer = self._open()
+        table = self._pa.Table.from_arrays(
+            [self._pa.array(chunk[column].tolist(), type=self._pa.string()) for column in self.schema.text_columns]
+            # from_pandas turns NaN into null, as CSV and JSONL do
+            + [self._pa.array(chunk[column], type=self._pa.float64(), from_pandas=True) for column in self.schema.float_columns],
+            schema=self._arrow_schema,
+        )
+        self._writer.write_table(table)
+        self.rows += table.num_rows
+
+    def close(self):
+        if self._writer is None:
+            # Still produce a valid (empty) file
+            self._writer = self._open()
+        if not self._closed:
+            self._writer.close()
+            self._closed = True
+
+class ParquetExportWriter(_ArrowExportWriter):
+    # One row group per chunk
+    extension = "parquet"
+
+    def _open(self):
+        import pyarrow.parquet
+        return pyarrow.parquet.ParquetWriter(self.path, self._arrow_schema)
+
+class ArrowExportWriter(_ArrowExportWriter):
+    # Arrow IPC file; one record batch per chunk
+    extension = "arrow"
+
+    def _open(self):
+        return self._pa.ipc.new_file(self.path, self._arrow_schema)
+
+class NpzExportWriter(ExportWriter):
+    # No pyarrow needed: each chunk of each column is stored as its own
+    # "<column>/<chunk>.npy" member of an uncompressed zip, written straight
+    # through. A text chunk is its UTF-8 bytes back to back plus an int64
+    # "<column>/<chunk>.offsets.npy" of row boundaries, so reading needs no
+    # pickle and one long text doesn't pad every other row to its width.
+    extension = "npz"
+
+    def __init__(self, path: str, schema: ExportSchema):
+        super().__init__(path, schema)
+        self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED, allowZip64=True)
+        self._chunks = 0
+
+    def write_chunk(self, chunk: Chunk):
+        for column in self.schema.text_columns:
+            encoded = [text.encode("utf-8") for text in chunk[column].tolist()]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(text) for text in encoded], out=offsets[1:])
+            self._write_member(f"{column}/{self._chunks:06d}.npy", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+            self._write_member(f"{column}/{self._chunks:06d}.offsets.npy", offsets)
+        for column in self.schema.float_columns:
+            self._write_member(f"{column}/{self._chunks:06d}.npy", chunk[column])
+        self._chunks += 1
+        self.rows += len(next(iter(chunk.values()))) if chunk else 0
+
+    def _write_member(self, name: str, array: np.ndarray):
+        with self._zip.open(name, "w", force_zip64=True) as member:
+            np.lib.format.write_array(member, np.ascontiguousarray(array), allow_pickle=False)
+
+    def close(self):
+        if self._zip.fp is not None:
+            layout = {"columns": self.schema.columns, "text_columns": self.schema.text_columns, "chunks": self._chunks}
+            self._zip.writestr("columns.json", json.dumps(layout))
+            self._zip.close()
+
+def iter_npz_chunks(path: str) -> Iterator[Chunk]:
+    # Read an npz export back one chunk at a time
+    def read(name: str) -> np.ndarray:
+        with archive.open(name) as member:
+            return np.lib.format.read_array(member, allow_pickle=False)
+
+    with zipfile.ZipFile(path) as archive:
+        layout = json.loads(archive.read("columns.json"))
+        text_columns = set(layout["text_columns"])
+        for index in range(layout["chunks"]):
+            chunk = {}
+            for column in layout["columns"]:
+                values = read(f"{column}/{index:06d}.npy")
+                if column in text_columns:
+                    data = values.tobytes()
+                    offsets = read(f"{column}/{index:06d}.offsets.npy").tolist()
+                    values = np.array(
+                        [data[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])], dtype=object
+                    )
+                chunk[column] = values
+            yield chunk
+
+EXPORT_WRITERS = {
+    writer.extension: writer
+    for writer in (CsvExportWriter, JsonlExportWriter, ParquetExportWriter, ArrowExportWriter, NpzExportWriter)
+}
+
+def columnar_format() -> str:
+    # Parquet when pyarrow is installed, npz otherwise
+    try:
+        _require_pyarrow()
+    except ImportError:
+        return NpzExportWriter.extension
+    return ParquetExportWriter.extension
+
+def create_export_writer(path: str, schema: ExportSchema, export_format: Optional[str] = None) -> ExportWriter:
+    export_format = export_format or os.path.splitext(path)[1].lstrip(".").lower()
+    if export_format == "columnar":
+        export_format = columnar_format()
+    if export_format not in EXPORT_WRITERS:
+        choices = ", ".join([*EXPORT_WRITERS, "columnar"])
+        raise ValueError(f"Unknown export format: {export_format} (expected one of {choices})")
+    return EXPORT_WRITERS[export_format](path, schema)
+
+def _chunked_rows(rows: Iterable[dict], chunk_size: int) -> Iterator[List[dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def export_analyses(
+    rows: Iterable[dict],
+    path: str,
+    export_format: Optional[str] = None,
+    chunk_size: int = 10000,
+    schema: Optional[ExportSchema] = None,
+) -> int:
+    # Stream analysis_to_dict()-shaped rows to `path`; at most chunk_size rows
+    # are held at once. Returns the number of rows written.
+    schema = schema or ExportSchema()
+    with create_export_writer(path, schema, export_format) as writer:
+        for chunk in _chunked_rows(rows, chunk_size):
+            writer.write_chunk(schema.rows_to_chunk(chunk))
+    get_logger(__name__).info("Analyses exported", path=path, format=type(writer).extension, rows=writer.rows)
+    return writer.rows
+
+def export_conversation_log(
+    log_path: str,
+    path: str,
+    export_format: Optional[str] = None,
+    chunk_size: int = 65536,
+) -> int:
+    # Export a binary conversation log straight from its memory-mapped
+    # records. Goodness and philosophies are recomputed per chunk with one
+    # matrix evaluation; the log keeps no text, so `id` is the text hash.
+    reader = ConversationStoreReader(log_path)
+    schema = ExportSchema(reader.emotion_labels, include_text=False)
+    compendium = PhilosophicalCompendium()
+    philosophy_index = {philosophy: i for i, philosophy in enumerate(compendium.philosophy_order)}
+
+    with create_export_writer(path, schema, export_format) as writer:
+        for records in reader.iter_chunks(chunk_size):
+            batch = DecisionBatch([""] * len(records), records["moral_scores"])
+            philosophies = compendium.evaluate_many(batch)
+            count = len(records)
+            chunk: Chunk = {"id": np.array([row.tobytes().hex() for row in records["text_hash"]], dtype=object)}
+            for field in SENTIMENT_FIELDS:
+                chunk[f"sentiment_{field}"] = records[field].astype(np.float64) if field in ("compound", "polarity") else np.full(count, np.nan)
+            for i, column in enumerate(schema.emotion_columns):
+                chunk[column] = records["emotions"][:, i].astype(np.float64)
+            for i, column in enumerate(schema.moral_columns):
+                chunk[column] = batch.scores[:, i]
+            chunk["goodness"] = batch.goodness
+            for philosophy, column in zip(Philosophy, schema.philosophy_columns):
+                chunk[column] = philosophies[:, philosophy_index[philosophy]]
+            writer.write_chunk(chunk)
+    get_logger(__name__).info("Conversation log exported", path=path, format=type(writer).extension, rows=writer.rows)
+    return writer.rows
+
+def _read_jsonl(lines: Iterable[str]) -> Iterator[dict]:
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export analysis results to CSV, JSONL, Parquet, Arrow or npz in constant memory.")
+    parser.add_argument("input", help="cli.py JSONL results ('-' for stdin), or a conversation log with --log")
+    parser.add_argument("output", help="Output file; the format follows its extension unless --format is given")
+    parser.add_argument("--log", action="store_true", help="Read a binary conversation log instead of JSONL")
+    parser.add_argument("--format", dest="export_format", choices=[*EXPORT_WRITERS, "columnar"], default=None,
+                        help="'columnar' picks parquet when pyarrow is installed, npz otherwise")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Rows per write (default: 10000)")
+    parser.add_argument("--no-text", action="store_true", help="Leave the input text out of the export")
+    parser.add_argument("--response", action="store_true", help="Include the generated response column")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+    configure_logging(log_level=args.log_level, stream=sys.stderr)
+
+    if args.log:
+        written = export_conversation_log(args.input, args.output, args.export_format, args.chunk_size)
+    else:
+        schema = ExportSchema(include_text=not args.no_text, include_response=args.response)
+        source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+        try:
+            written = export_analyses(_read_jsonl(source), args.output, args.export_format, args.chunk_size, schema)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+    print(written)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
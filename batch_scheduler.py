@@ -0,0 +1,128 @@
+import argparse
+import json
+import sys
+import threading
+import time
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from emotion_backends import EMOTION_MODEL_NAME, EmotionBackend, create_emotion_backend
+from logger import get_logger
+
+class TokenBudgetScheduler:
+    def __init__(self, backend: EmotionBackend, max_tokens: int = 8192, max_batch_size: int = 256):
+        self.backend = backend
+        self.max_tokens = max_tokens
+        self.max_batch_size = max_batch_size
+        self.logger = get_logger(__name__, log_level="DEBUG")
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def plan(self, lengths: Sequence[int]) -> List[List[int]]:
+        # Sort by length so neighbours pad to nearly the same width, then cut
+        # a batch whenever (rows x longest row) would exceed the token budget.
+        # A single row longer than the budget still gets a batch of its own.
+        order = sorted(range(len(lengths)), key=lengths.__getitem__)
+        batches: List[List[int]] = []
+        batch: List[int] = []
+        for index in order:
+            width = lengths[index]
+            if batch and ((len(batch) + 1) * width > self.max_tokens or len(batch) >= self.max_batch_size):
+                batches.append(batch)
+                batch = []
+            batch.append(index)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def predict_ids(self, ids_list: Sequence[Sequence[int]]) -> np.ndarray:
+        probabilities = np.empty((len(ids_list), len(self.backend.labels)), dtype=np.float64)
+        if not ids_list:
+            return probabilities
+
+        lengths = [len(ids) for ids in ids_list]
+        start = time.perf_counter()
+        batches = self.plan(lengths)
+        padded_tokens = 0
+        for batch in batches:
+            probabilities[batch] = self.backend.predict_ids([ids_list[index] for index in batch])
+            padded_tokens += len(batch) * max(lengths[index] for index in batch)
+        elapsed = time.perf_counter() - start
+
+        with self._stats_lock:
+            self._texts += len(ids_list)
+            self._batches += len(batches)
+            self._real_tokens += sum(lengths)
+            self._padded_tokens += padded_tokens
+            self._elapsed += elapsed
+        return probabilities
+
+    def predict(self, texts: Sequence[str]) -> np.ndarray:
+        return self.predict_ids(self.backend.encode(list(texts)))
+
+    def classify(self, texts: Sequence[str]) -> List[Dict[str, float]]:
+        labels = self.backend.labels
+        return [dict(zip(labels, row)) for row in self.predict(texts).tolist()]
+
+    def classify_long(self, texts: Sequence[str], window_pool: int = 256, **kwargs) -> List[Dict[str, float]]:
+        # Windows are gathered window_pool at a time and bucketed like texts
+        return self.backend.classify_long(texts, batch_size=window_pool, predict_ids=self.predict_ids, **kwargs)
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._texts = 0
+            self._batches = 0
+            self._real_tokens = 0
+            self._padded_tokens = 0
+            self._elapsed = 0.0
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "max_tokens": self.max_tokens,
+                "texts": self._texts,
+                "batches": self._batches,
+                "average_batch_size": self._texts / self._batches if self._batches else 0.0,
+                "real_tokens": self._real_tokens,
+                "padded_tokens": self._padded_tokens,
+                # Share of the computed positions that were real tokens rather than padding
+                "padding_efficiency": self._real_tokens / self._padded_tokens if self._padded_tokens else 1.0,
+                "tokens_per_sec": self._real_tokens / self._elapsed if self._elapsed else 0.0,
+                "texts_per_sec": self._texts / self._elapsed if self._elapsed else 0.0,
+            }
+
+def tune_token_budget(backend: EmotionBackend, texts: Sequence[str], budgets: Sequence[int] = (2048, 4096, 8192, 16384)) -> List[dict]:
+    # Same corpus through each budget; pick the fastest one for this machine
+    logger = get_logger(__name__)
+    ids_list = backend.encode(list(texts))
+    results = []
+    for budget in budgets:
+        scheduler = TokenBudgetScheduler(backend, max_tokens=budget)
+        scheduler.predict_ids(ids_list[:1])  # warm up
+        scheduler.reset_stats()
+        scheduler.predict_ids(ids_list)
+        results.append(scheduler.stats())
+        logger.info("Token budget measured", **results[-1])
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure padding efficiency and throughput per token budget.")
+    parser.add_argument("input", help="Plain-text file, one text per line")
+    parser.add_argument("--model-dir", default=EMOTION_MODEL_NAME)
+    parser.add_argument("--backend", default="torch")
+    parser.add_argument("--budgets", type=int, nargs="+", default=[2048, 4096, 8192, 16384])
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as source:
+        corpus = [line.rstrip("\n") for line in source if line.strip()]
+    results = tune_token_budget(create_emotion_backend(args.backend, args.model_dir), corpus, args.budgets)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'budget':>8} {'batches':>8} {'padding eff':>12} {'tokens/s':>10} {'texts/s':>9}")
+        for result in results:
+            print(f"{result['max_tokens']:>8} {result['batches']:>8} {result['padding_efficiency']:>12.1%} "
+                  f"{result['tokens_per_sec']:>10.0f} {result['texts_per_sec']:>9.1f}")
+    sys.exit(0)
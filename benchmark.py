@@ -0,0 +1,292 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# The suite never touches the network: a missing model means a local stand-in
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from emotion_backends import EMOTION_MODEL_NAME
+from input_analysis import SPACY_PROFILES, ConversationAnalyzer, measure_spacy_profiles
+from logger import get_logger
+from response_generator import ResponseGenerator
+from sentiment_backends import TextBlobSentimentBackend, VaderSentimentBackend
+from sample_texts import SAMPLE_SENTENCES
+
+logger = get_logger(__name__, log_level="INFO")
+
+STAGES = [
+    "spacy_parse",
+    "textblob",
+    "vader",
+    "emotion_inference",
+    "score_moral_dimensions",
+    "evaluate_decision",
+    "response_assembly",
+    "compass_paint",
+]
+
+def build_inputs() -> Dict[str, str]:
+    # Fixed texts: one sentence, a paragraph, and a document past the 512-token window
+    return {
+        "short": SAMPLE_SENTENCES[0],
+        "medium": " ".join(SAMPLE_SENTENCES),
+        "long": " ".join(SAMPLE_SENTENCES * 12),
+    }
+
+def build_stand_in_model(directory: str) -> str:
+    # A tiny randomly initialized RoBERTa classifier with the real model's
+    # labels and a byte-level BPE tokenizer trained on the benchmark texts.
+    # Scores are meaningless but shapes and code paths match the real model.
+    import torch
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors, trainers
+    from transformers import PreTrainedTokenizerFast, RobertaConfig, RobertaForSequenceClassification
+
+    tokenizer = Tokenizer(models.BPE(unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    trainer = trainers.BpeTrainer(vocab_size=1000, special_tokens=["<s>", "<pad>", "</s>", "<unk>", "<mask>"])
+    tokenizer.train_from_iterator(SAMPLE_SENTENCES * 20, trainer)
+    tokenizer.post_processor = processors.RobertaProcessing(("</s>", 2), ("<s>", 0))
+    fast_tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        bos_token="<s>", eos_token="</s>", unk_token="<unk>", pad_token="<pad>", mask_token="<mask>",
+        model_max_length=512,
+    )
+    fast_tokenizer.save_pretrained(directory)
+
+    labels = ["anger", "disgust", "fear", "joy", "neutral", "sadness", "surprise"]
+    config = RobertaConfig(
+        vocab_size=len(fast_tokenizer), hidden_size=64, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=128, max_position_embeddings=514, pad_token_id=1, num_labels=len(labels),
+        id2label=dict(enumerate(labels)), label2id={label: i for i, label in enumerate(labels)},
+    )
+    torch.manual_seed(0)
+    RobertaForSequenceClassification(config).save_pretrained(directory)
+    return directory
+
+def build_analyzer(model_dir: Optional[str], backend: str, workdir: str, spacy_profile: str = "full") -> Tuple[ConversationAnalyzer, dict]:
+    metadata = {"emotion_backend": backend, "spacy_profile": spacy_profile}
+    model_dir = model_dir or EMOTION_MODEL_NAME
+    analyzer = ConversationAnalyzer(cache=None, emotion_backend=backend, emotion_model_dir=model_dir, spacy_profile=spacy_profile)
+    try:
+        analyzer.emotion_backend
+        metadata["emotion_model"] = model_dir
+    except OSError as exc:
+        logger.warning("Emotion model not available offline; using a local stand-in", model=model_dir, error=str(exc))
+        model_dir = build_stand_in_model(os.path.join(workdir, "stand_in_emotion"))
+        analyzer = ConversationAnalyzer(cache=None, emotion_backend=backend, emotion_model_dir=model_dir, spacy_profile=spacy_profile)
+        metadata["emotion_model"] = "stand-in"
+
+    try:
+        nlp = analyzer.nlp
+        metadata["spacy_model"] = nlp.meta.get("name", "unknown") if nlp is not None else "none"
+    except OSError as exc:
+        import spacy
+        logger.warning("spaCy model not installed; using a blank English pipeline", error=str(exc))
+        analyzer._nlp = spacy.blank("en")
+        metadata["spacy_model"] = "blank"
+    return analyzer, metadata
+
+def time_stage(fn: Callable[[], None], items: int, repeats: int) -> dict:
+    fn()  # warm up
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    mean = statistics.fmean(samples)
+    return {
+        "iterations": repeats,
+        "mean_ms": mean * 1000,
+        "p50_ms": statistics.median(samples) * 1000,
+        "min_ms": min(samples) * 1000,
+        "per_item_ms": mean * 1000 / items,
+        "best_per_item_ms": min(samples) * 1000 / items,
+        "items_per_sec": items / mean if mean else float("inf"),
+    }
+
+def stage_functions(analyzer: ConversationAnalyzer, texts: List[str], batch_size: int) -> Dict[str, Callable[[], None]]:
+    # Inputs for each stage are precomputed so only that stage is timed
+    batched = batch_size > 1
+    docs = analyzer._parse_batch(texts, batch_size)
+    sentiments = [analyzer._analyze_sentiment(text) for text in texts]
+    emotions = analyzer._classify_emotions_batch(texts, batch_size)
+    results = [analyzer._build_result(text, doc, s, e) for text, doc, s, e in zip(texts, docs, sentiments, emotions)]
+    decisions = [result["decision"] for result in results]
+    compendium = analyzer.philosophical_compendium
+    response_generator = ResponseGenerator(analyzer)
+    text_blob, vader = TextBlobSentimentBackend(), VaderSentimentBackend()
+
+    def spacy_parse():
+        if batched:
+            analyzer._parse_batch(texts, batch_size)
+        else:
+            analyzer._parse(texts[0])
+
+    def emotion_inference():
+        if batched:
+            analyzer._classify_emotions_batch(texts, batch_size)
+        else:
+            analyzer._classify_emotions(texts[0])
+
+    def evaluate_decision():
+        if batched:
+            compendium.evaluate_many(decisions)
+        else:
+            compendium.evaluate_decision(decisions[0])
+
+    def response_assembly():
+        if batched:
+            response_generator.generate_many(texts, results, seed=0)
+        else:
+            response_generator.random.seed(0)
+            response_generator.generate_response(texts[0], results[0])
+
+    functions = {
+        "spacy_parse": spacy_parse,
+        "textblob": lambda: text_blob.analyze_batch(texts),
+        "vader": lambda: vader.analyze_batch(texts),
+        "emotion_inference": emotion_inference,
+        "score_moral_dimensions": lambda: [
+            analyzer._score_moral_dimensions(doc, s, e) for doc, s, e in zip(docs, sentiments, emotions)
+        ],
+        "evaluate_decision": evaluate_decision,
+        "response_assembly": response_assembly,
+    }
+    paint = compass_painter(decisions)
+    if paint is not None:
+        functions["compass_paint"] = paint
+    return functions
+
+def compass_painter(decisions) -> Optional[Callable[[], None]]:
+    try:
+        from PyQt5.QtGui import QImage, QPainter
+        from PyQt5.QtWidgets import QApplication
+        from moral_compass import MoralCompass
+    except ImportError:
+        logger.warning("PyQt5 not available; skipping compass_paint")
+        return None
+
+    app = QApplication.instance() or QApplication([sys.argv[0]])
+    compass = MoralCompass(decisions[0])
+    compass.resize(400, 400)
+    image = QImage(compass.size(), QImage.Format_ARGB32_Premultiplied)
+
+    def paint():
+        for decision in decisions:
+            compass.decision = decision
+            painter = QPainter(image)
+            compass.render(painter)
+            painter.end()
+
+    paint.app = app  # keep the QApplication alive as long as the painter
+    return paint
+
+def run_suite(
+    model_dir: Optional[str] = None,
+    backend: str = "torch",
+    batch_size: int = 16,
+    repeats: int = 5,
+    stages: Optional[List[str]] = None,
+    spacy_profile: str = "full",
+) -> dict:
+    stages = stages or STAGES
+    with tempfile.TemporaryDirectory() as workdir:
+        analyzer, metadata = build_analyzer(model_dir, backend, workdir, spacy_profile)
+        metadata.update({
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "batch_size": batch_size,
+            "repeats": repeats,
+        })
+        results = []
+        for input_name, text in build_inputs().items():
+            for size in (1, batch_size):
+                texts = [text] * size
+                functions = stage_functions(analyzer, texts, size)
+                for stage in stages:
+                    if stage not in functions:
+                        continue
+                    timing = time_stage(functions[stage], size, repeats)
+                    results.append({"stage": stage, "input": input_name, "batch_size": size, **timing})
+                    logger.info("Stage measured", stage=stage, input=input_name, batch_size=size, per_item_ms=round(timing["per_item_ms"], 3))
+    return {"metadata": metadata, "results": results}
+
+def compare_to_baseline(current: dict, baseline: dict, tolerance: float = 0.2) -> List[dict]:
+    # Ratios of best per-item time against a stored run (the minimum is far
+    # less noisy than the mean); ratio > 1 + tolerance is a regression
+    for key in ("emotion_model", "spacy_model", "spacy_profile", "emotion_backend"):
+        if current["metadata"].get(key) != baseline["metadata"].get(key):
+            logger.warning("Baseline was measured with a different setup", field=key,
+                           baseline=baseline["metadata"].get(key), current=current["metadata"].get(key))
+    reference = {(r["stage"], r["input"], r["batch_size"]): r for r in baseline["results"]}
+    comparisons = []
+    for result in current["results"]:
+        base = reference.get((result["stage"], result["input"], result["batch_size"]))
+        if base is None or not base["best_per_item_ms"]:
+            continue
+        ratio = result["best_per_item_ms"] / base["best_per_item_ms"]
+        comparisons.append({
+            "stage": result["stage"],
+            "input": result["input"],
+            "batch_size": result["batch_size"],
+            "baseline_ms": base["best_per_item_ms"],
+            "current_ms": result["best_per_item_ms"],
+            "ratio": ratio,
+            "regression": ratio > 1 + tolerance,
+        })
+    return comparisons
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time each analysis stage offline on short, medium and long inputs.")
+    parser.add_argument("--model-dir", default=None, help="Local emotion model directory (default: cached hub model or stand-in)")
+    parser.add_argument("--backend", default="torch", choices=["torch", "quantized", "onnx"])
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=None)
+    parser.add_argument("--spacy-profile", choices=list(SPACY_PROFILES), default="full")
+    parser.add_argument("--spacy-profiles", action="store_true",
+                        help="Only report load time and per-doc latency of each spaCy profile")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    parser.add_argument("--baseline", default=None, help="Compare against a JSON file from a previous --output")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before flagging a regression")
+    args = parser.parse_args(argv)
+
+    if args.spacy_profiles:
+        texts = list(build_inputs().values()) * args.batch_size
+        print(f"{'profile':<14} {'load ms':>9} {'ms/doc':>8} {'docs/s':>9}  components")
+        for result in measure_spacy_profiles(texts, batch_size=args.batch_size):
+            print(f"{result['profile']:<14} {result['load_ms']:>9.1f} {result['per_doc_ms']:>8.3f} "
+                  f"{result['docs_per_sec']:>9.1f}  {','.join(result['components']) or '-'}")
+        return 0
+
+    report = run_suite(args.model_dir, args.backend, args.batch_size, args.repeats, args.stages, args.spacy_profile)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+    print(f"{'stage':<24} {'input':<7} {'batch':>5} {'ms/item':>10} {'items/s':>10}")
+    for result in report["results"]:
+        print(f"{result['stage']:<24} {result['input']:<7} {result['batch_size']:>5} "
+              f"{result['per_item_ms']:>10.3f} {result['items_per_sec']:>10.1f}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as handle:
+        comparisons = compare_to_baseline(report, json.load(handle), args.tolerance)
+    regressions = [c for c in comparisons if c["regression"]]
+    for comparison in regressions:
+        print(f"REGRESSION {comparison['stage']} {comparison['input']} x{comparison['batch_size']}: "
+              f"{comparison['baseline_ms']:.3f} -> {comparison['current_ms']:.3f} ms/item ({comparison['ratio']:.2f}x)")
+    print(f"{len(regressions)} regression(s) in {len(comparisons)} comparison(s)")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
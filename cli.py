@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from logger import configure_logging, get_logger
+
+Record = Tuple[Optional[object], str]
+
+# Per-process state, populated once by _init_worker
+_worker_analyzer = None
+_worker_response_generator = None
+
+def _configure_stderr_logging(log_level: str):
+    # stdout carries the JSONL results, so all log output goes to stderr
+    configure_logging(log_level=log_level, stream=sys.stderr)
+
+def _init_worker(
+    with_response: bool,
+    log_level: str,
+    torch_threads: int,
+    cache_db: Optional[str] = None,
+    emotion_backend: str = "torch",
+    emotion_model_dir: Optional[str] = None,
+    spacy_profile: str = "full",
+    sentiment_backend: str = "combined",
+):
+    global _worker_analyzer, _worker_response_generator
+    _configure_stderr_logging(log_level)
+
+    import torch
+    from analysis_cache import AnalysisCache
+    from input_analysis import EMOTION_MODEL_NAME, ConversationAnalyzer
+    from response_generator import ResponseGenerator
+
+    # Keep N worker processes from oversubscribing the cores with intra-op threads
+    torch.set_num_threads(torch_threads)
+    _worker_analyzer = ConversationAnalyzer(
+        cache=AnalysisCache(db_path=cache_db),
+        emotion_backend=emotion_backend,
+        emotion_model_dir=emotion_model_dir or EMOTION_MODEL_NAME,
+        spacy_profile=spacy_profile,
+        sentiment_backend=sentiment_backend,
+    )
+    _worker_response_generator = ResponseGenerator(_worker_analyzer) if with_response else None
+
+def _process_chunk(records: List[Record]) -> List[str]:
+    from input_analysis import analysis_to_dict
+
+    texts = [text for _, text in records]
+    results = _worker_analyzer.analyze_batch(texts, batch_size=len(records))
+    responses = _worker_response_generator.generate_many(texts, results) if _worker_response_generator is not None else None
+    lines = []
+    for index, ((record_id, _), result) in enumerate(zip(records, results)):
+        row = analysis_to_dict(result)
+        if record_id is not None:
+            row["id"] = record_id
+        if responses is not None:
+            row["response"] = responses[index]
+        lines.append(json.dumps(row))
+    return lines
+
+def parse_records(lines: Iterable[str], input_format: str = "auto", text_field: str = "text") -> Iterator[Record]:
+    logger = get_logger(__name__)
+    for line_number, line in enumerate(lines, start=1):
+        line = line.rstrip("\n")
+        if not line.strip():
+            continue
+
+        if input_format == "text" or (input_format == "auto" and not line.lstrip().startswith("{")):
+            yield None, line
+            continue
+
+        try:
+            payload = json.loads(line)
+        except json.JSONDecodeError as exc:
+            if input_format == "jsonl":
+                logger.warning("Skipping malformed JSONL line", line=line_number, error=str(exc))
+                continue
+            yield None, line
+            continue
+
+        text = payload.get(text_field) if isinstance(payload, dict) else None
+        if not isinstance(text, str):
+            logger.warning("Skipping JSONL line without text", line=line_number, field=text_field)
+            continue
+        yield payload.get("id"), text
+
+def _chunked(records: Iterator[Record], chunk_size: int) -> Iterator[List[Record]]:
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def run(
+    lines: Iterable[str],
+    out: TextIO,
+    workers: int = 1,
+    chunk_size: int = 16,
+    max_pending: Optional[int] = None,
+    with_response: bool = False,
+    input_format: str = "auto",
+    text_field: str = "text",
+    log_level: str = "INFO",
+    cache_db: Optional[str] = None,
+    emotion_backend: str = "torch",
+    emotion_model_dir: Optional[str] = None,
+    spacy_profile: str = "full",
+    sentiment_backend: str = "combined",
+) -> int:
+    chunks = _chunked(parse_records(lines, input_format, text_field), chunk_size)
+    torch_threads = max(1, (os.cpu_count() or 1) // max(1, workers))
+    init_args = (with_response, log_level, torch_threads, cache_db, emotion_backend, emotion_model_dir, spacy_profile, sentiment_backend)
+    written = 0
+
+    if workers <= 1:
+        _init_worker(*init_args)
+        for chunk in chunks:
+            written += _write_lines(out, _process_chunk(chunk))
+        return written
+
+    # Only max_pending chunks are ever in flight, so memory stays bounded no
+    # matter how large the input is; collecting them FIFO preserves input order
+    max_pending = max_pending or workers * 2
+    with Pool(workers, initializer=_init_worker, initargs=init_args) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(_process_chunk, (chunk,)))
+            if len(pending) >= max_pending:
+                written += _write_lines(out, pending.popleft().get())
+        while pending:
+            written += _write_lines(out, pending.popleft().get())
+    return written
+
+def _write_lines(out: TextIO, lines: List[str]) -> int:
+    for line in lines:
+        out.write(line)
+        out.write("\n")
+    out.flush()
+    return len(lines)
+
+def build_parser() -> argparse.ArgumentParser:
+    # Choices come from the registries, so new backends and profiles show up here
+    from emotion_backends import BACKENDS as EMOTION_BACKENDS
+    from input_analysis import SPACY_PROFILES
+    from sentiment_backends import SENTIMENT_ALIASES, SENTIMENT_BACKENDS
+
+    parser = argparse.ArgumentParser(description="Analyze text headlessly and stream JSONL results to stdout.")
+    parser.add_argument("input", nargs="?", default="-", help="Input file of JSONL or plain-text lines ('-' for stdin)")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Number of worker processes (default: 1)")
+    parser.add_argument("--chunk-size", type=int, default=16, help="Lines analyzed per batch and per task (default: 16)")
+    parser.add_argument("--max-pending", type=int, default=None, help="Chunks in flight at once (default: 2 x workers)")
+    parser.add_argument("--format", dest="input_format", choices=["auto", "jsonl", "text"], default="auto")
+    parser.add_argument("--text-field", default="text", help="JSONL field holding the text (default: text)")
+    parser.add_argument("--respond", action="store_true", help="Include the generated response in each result")
+    parser.add_argument("--cache-db", default=None, help="SQLite file for a persistent analysis cache shared across runs")
+    parser.add_argument("--emotion-backend", choices=list(EMOTION_BACKENDS), default="torch")
+    parser.add_argument("--emotion-model-dir", default=None, help="Local emotion model directory (default: hub model)")
+    parser.add_argument("--spacy-profile", choices=list(SPACY_PROFILES), default="full",
+                        help="spaCy components to load; entities/key phrases not covered come back empty")
+    parser.add_argument("--sentiment-backend", choices=[*SENTIMENT_BACKENDS, *SENTIMENT_ALIASES], default="combined",
+                        help="Sentiment analyzers to run; 'fast' runs VADER only")
+    parser.add_argument("--log-level", default="WARNING")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    _configure_stderr_logging(args.log_level)
+    logger = get_logger(__name__, log_level=args.log_level)
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    try:
+        written = run(
+            source,
+            sys.stdout,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            max_pending=args.max_pending,
+            with_response=args.respond,
+            input_format=args.input_format,
+            text_field=args.text_field,
+            log_level=args.log_level,
+            cache_db=args.cache_db,
+            emotion_backend=args.emotion_backend,
+            emotion_model_dir=args.emotion_model_dir,
+            spacy_profile=args.spacy_profile,
+            sentiment_backend=args.sentiment_backend,
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    logger.info("Headless analysis finished", results=written)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+from typing import Optional
+
+import numpy as np
+from PyQt5.QtCore import Qt, QLineF, QPointF, pyqtSignal
+from PyQt5.QtGui import QColor, QImage, QPainter, QPen, QPixmap, QPolygonF
+from PyQt5.QtWidgets import QToolTip
+
+from logger import get_logger
+from models import DIMENSIONS, DecisionBatch
+from moral_compass import AXIS_DIRECTIONS, CompassFace
+
+OVERLAY_MODES = ("polygons", "heatmap")
+
+_AXES = np.array(AXIS_DIRECTIONS, dtype=np.float64)  # (dimensions, 2)
+
+def compass_vertices(scores: np.ndarray, width: float, height: float) -> np.ndarray:
+    # Screen position of every score marker, for every decision at once:
+    # (decisions, dimensions, 2), laid out exactly like MoralCompass
+    center = np.array([width / 2, height / 2])
+    radius = min(width, height) / 2 - 20
+    normalized = (np.nan_to_num(scores, nan=0.0) + 10) / 20  # Normalize from -10:10 to 0:1
+    return center + normalized[:, :, None] * radius * _AXES[None, :, :]
+
+class GridIndex:
+    # Uniform grid over 2-D points: points are sorted by cell once, so a
+    # lookup only scans the few cells around the query instead of every point
+    def __init__(self, points: np.ndarray, cell_size: float = 8.0):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.cell_size = cell_size
+        if not len(self.points):
+            self._origin = np.zeros(2, dtype=np.int64)
+            self._shape = (0, 0)
+            self._order = np.empty(0, dtype=np.int64)
+            self._starts = np.zeros(1, dtype=np.int64)
+            return
+        cells = np.floor(self.points / cell_size).astype(np.int64)
+        self._origin = cells.min(axis=0)
+        cells -= self._origin
+        self._shape = tuple(int(extent) + 1 for extent in cells.max(axis=0))
+        flat = cells[:, 0] * self._shape[1] + cells[:, 1]
+        self._order = np.argsort(flat, kind="stable")
+        # Points of cell c are self._order[self._starts[c]:self._starts[c + 1]]
+        self._starts = np.searchsorted(flat[self._order], np.arange(self._shape[0] * self._shape[1] + 1))
+
+    def nearest(self, x: float, y: float, max_distance: float) -> Optional[int]:
+        if not len(self.points):
+            return None
+        reach = int(np.ceil(max_distance / self.cell_size))
+        cx, cy = (np.floor(np.array([x, y]) / self.cell_size).astype(np.int64) - self._origin)
+        candidates = []
+        for column in range(max(0, cx - reach), min(self._shape[0], cx + reach + 1)):
+            first = column * self._shape[1] + max(0, cy - reach)
+            last = column * self._shape[1] + min(self._shape[1], cy + reach + 1)
+            if first < last:
+                candidates.append(self._order[self._starts[first]:self._starts[last]])
+        if not candidates:
+            return None
+        candidates = np.concatenate(candidates)
+        if not len(candidates):
+            return None
+        distances = np.hypot(self.points[candidates, 0] - x, self.points[candidates, 1] - y)
+        best = int(np.argmin(distances))
+        return int(candidates[best]) if distances[best] <= max_distance else None
+
+class DecisionOverlay(CompassFace):
+    # Many decisions on one compass, either as translucent score polygons or
+    # as a density heatmap of their outlines. Geometry, the spatial index and
+    # the overlay layer are rebuilt only when the batch, mode or size changes;
+    # a repaint is two pixmap blits plus the hovered polygon.
+    decisionHovered = pyqtSignal(int)  # row in the batch, -1 when nothing is hovered
+
+    # Hover picks the nearest score marker within this many pixels
+    PICK_RADIUS = 6.0
+    # Heatmap cells are this many pixels square
+    HEATMAP_CELL = 2
+    # Points sampled along each polygon edge for the heatmap
+    EDGE_SAMPLES = 16
+
+    def __init__(self, batch: Optional[DecisionBatch] = None, mode: str = "polygons"):
+        super().__init__()
+        self.setMouseTracking(True)
+        self.logger = get_logger(__name__, log_level="DEBUG")
+        self.batch = DecisionBatch([], np.empty((0, len(DIMENSIONS))))
+        self.mode = OVERLAY_MODES[0]
+        self.hovered: Optional[int] = None
+        self._vertices = np.empty((0, len(DIMENSIONS), 2))
+        self._index = GridIndex(np.empty((0, 2)))
+        self._overlay: Optional[QPixmap] = None
+        self._overlay_key = None
+        self.set_mode(mode)
+        if batch is not None:
+            self.set_batch(batch)
+
+    def set_batch(self, batch: DecisionBatch):
+        self.batch = batch
+        self.hovered = None
+        self._overlay = None
+        self.update()
+
+    def set_mode(self, mode: str):
+        if mode not in OVERLAY_MODES:
+            raise ValueError(f"Unknown overlay mode '{mode}'; choose from {', '.join(OVERLAY_MODES)}")
+        self.mode = mode
+        self._overlay = None
+        self.update()
+
+    def resizeEvent(self, event):
+        self._overlay = None
+        super().resizeEvent(event)
+
+    def _ensure_overlay(self) -> QPixmap:
+        ratio = self.devicePixelRatioF()
+        key = (self.width(), self.height(), ratio)
+        if self._overlay is not None and self._overlay_key == key:
+            return self._overlay
+
+        self._vertices = compass_vertices(self.batch.scores, self.width(), self.height())
+        self._index = GridIndex(self._vertices.reshape(-1, 2), cell_size=max(self.PICK_RADIUS, 4.0))
+
+        pixmap = QPixmap(max(1, round(self.width() * ratio)), max(1, round(self.height() * ratio)))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+        if len(self.batch):
+            painter = QPainter(pixmap)
+            if self.mode == "heatmap":
+                self._draw_heatmap(painter)
+            else:
+                self._draw_polygons(painter)
+            painter.end()
+        self._overlay = pixmap
+        self._overlay_key = key
+        self.logger.debug("Overlay rebuilt", decisions=len(self.batch), mode=self.mode, width=self.width(), height=self.height())
+        return pixmap
+
+    def _draw_polygons(self, painter: QPainter):
+        # Every edge of every polygon in a single drawLines call; the alpha
+        # shrinks as the batch grows so dense regions stay readable
+        starts = self._vertices.reshape(-1, 2)
+        ends = np.roll(self._vertices, -1, axis=1).reshape(-1, 2)
+        edges = np.hstack([starts, ends]).tolist()
+        alpha = int(max(6, min(160, 4000 / len(self.batch))))
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QPen(QColor(0, 100, 200, alpha), 1))
+        painter.drawLines([QLineF(*edge) for edge in edges])
+
+    def _draw_heatmap(self, painter: QPainter):
+        # Sample points along every edge, bin them on a coarse grid, and
+        # colour the log density from blue (sparse) to red (dense)
+        t = np.linspace(0.0, 1.0, self.EDGE_SAMPLES, endpoint=False)[None, None, :, None]
+        starts = self._vertices[:, :, None, :]
+        ends = np.roll(self._vertices, -1, axis=1)[:, :, None, :]
+        samples = (starts + (ends - starts) * t).reshape(-1, 2)
+
+        columns = max(1, self.width() // self.HEATMAP_CELL)
+        rows = max(1, self.height() // self.HEATMAP_CELL)
+        density, _, _ = np.histogram2d(
+            samples[:, 1], samples[:, 0], bins=(rows, columns), range=((0, self.height()), (0, self.width()))
+        )
+        density = np.log1p(density)
+        if density.max() > 0:
+            density /= density.max()
+
+        low, high = np.array([0, 100, 200], dtype=np.float64), np.array([200, 50, 50], dtype=np.float64)
+        rgba = np.zeros((rows, columns, 4), dtype=np.uint8)
+        rgba[..., :3] = (low + (high - low) * density[..., None]).astype(np.uint8)
+        rgba[..., 3] = np.where(density > 0, 60 + 195 * density, 0).astype(np.uint8)
+        image = QImage(rgba.tobytes(), columns, rows, columns * 4, QImage.Format_RGBA8888).copy()
+
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        painter.drawImage(self.rect(), image)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.cached_face())
+        painter.drawPixmap(0, 0, self._ensure_overlay())
+        if self.hovered is not None:
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setPen(QPen(QColor(200, 50, 50), 2))
+            painter.setBrush(QColor(200, 50, 50, 50))
+            painter.drawPolygon(QPolygonF([QPointF(x, y) for x, y in self._vertices[self.hovered]]))
+        painter.end()
+
+    def mouseMoveEvent(self, event):
+        self._ensure_overlay()
+        point = self._index.nearest(event.x(), event.y(), self.PICK_RADIUS)
+        hovered = None if point is None else point // len(DIMENSIONS)
+        if hovered != self.hovered:
+            self.hovered = hovered
+            self.decisionHovered.emit(-1 if hovered is None else hovered)
+            if hovered is None:
+                QToolTip.hideText()
+            else:
+                decision = self.batch[hovered]
+                QToolTip.showText(event.globalPos(), f"{decision.name}\nGoodness: {decision.goodness:.2f}", self)
+            self.update()
+        super().mouseMoveEvent(event)
+
+    def leaveEvent(self, event):
+        if self.hovered is not None:
+            self.hovered = None
+            self.decisionHovered.emit(-1)
+            self.update()
+        super().leaveEvent(event)
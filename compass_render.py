@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# No display server needed; must be set before Qt is imported
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+
+from logger import configure_logging, get_logger
+from models import DIMENSIONS, Decision, DecisionBatch, MoralDimension
+
+IMAGE_FORMATS = ("png", "svg")
+
+# (names, scores) of consecutive decisions plus the index of the first one
+Chunk = Tuple[int, List[str], np.ndarray]
+
+class CompassRenderer:
+    # Offscreen MoralCompass: the same drawing code as the live widget, so
+    # report images match what the GUI shows. One instance renders any number
+    # of decisions; the face pixmap is built once and reused for every PNG.
+    def __init__(self, size: int = 400):
+        from PyQt5.QtWidgets import QApplication
+        from moral_compass import MoralCompass
+
+        self.app = QApplication.instance() or QApplication([sys.argv[0]])
+        self.compass = MoralCompass(Decision("Initial Decision", "No decision made yet", {}))
+        self.compass.resize(size, size)
+        self.size = size
+
+    def render(self, decision: Decision, path: str, image_format: Optional[str] = None):
+        image_format = image_format or os.path.splitext(path)[1].lstrip(".").lower() or "png"
+        self.compass.decision = decision
+        if image_format == "svg":
+            self._render_svg(path)
+        elif image_format == "png":
+            self._render_png(path)
+        else:
+            raise ValueError(f"Unknown image format '{image_format}'; choose from {', '.join(IMAGE_FORMATS)}")
+
+    def _render_png(self, path: str):
+        from PyQt5.QtCore import Qt
+        from PyQt5.QtGui import QImage, QPainter
+
+        image = QImage(self.size, self.size, QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.white)
+        painter = QPainter(image)
+        self.compass.render(painter)
+        painter.end()
+        if not image.save(path, "PNG"):
+            raise OSError(f"Could not write {path}")
+
+    def _render_svg(self, path: str):
+        from PyQt5.QtCore import QRect, QSize
+        from PyQt5.QtGui import QPainter
+        from PyQt5.QtSvg import QSvgGenerator
+
+        generator = QSvgGenerator()
+        generator.setFileName(path)
+        generator.setSize(QSize(self.size, self.size))
+        generator.setViewBox(QRect(0, 0, self.size, self.size))
+        generator.setTitle(self.compass.decision.name)
+        painter = QPainter(generator)
+        self.compass.paint(painter)
+        painter.end()
+
+# Per-process state, populated once by _init_worker
+_worker_renderer: Optional[CompassRenderer] = None
+
+def _init_worker(size: int, log_level: str):
+    global _worker_renderer
+    configure_logging(log_level=log_level, stream=sys.stderr)
+    _worker_renderer = CompassRenderer(size)
+
+def _render_chunk(chunk: Chunk, output_dir: str, image_format: str) -> int:
+    start, names, scores = chunk
+    for index, decision in enumerate(DecisionBatch(names, scores), start=start):
+        _worker_renderer.render(decision, os.path.join(output_dir, f"{index:07d}.{image_format}"), image_format)
+    return len(names)
+
+def _chunked(batch: DecisionBatch, chunk_size: int) -> Iterator[Chunk]:
+    for start in range(0, len(batch), chunk_size):
+        yield start, list(batch.names[start:start + chunk_size]), batch.scores[start:start + chunk_size]
+
+def render_decisions(
+    batch: DecisionBatch,
+    output_dir: str,
+    image_format: str = "png",
+    size: int = 400,
+    workers: int = 1,
+    chunk_size: int = 256,
+    log_level: str = "WARNING",
+) -> int:
+    # Writes <output_dir>/<index>.<format> for every decision, index being
+    # the row in `batch`; returns the number of images written
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unknown image format '{image_format}'; choose from {', '.join(IMAGE_FORMATS)}")
+    os.makedirs(output_dir, exist_ok=True)
+    logger = get_logger(__name__)
+    start = time.perf_counter()
+    written = 0
+
+    if workers <= 1:
+        _init_worker(size, log_level)
+        for chunk in _chunked(batch, chunk_size):
+            written += _render_chunk(chunk, output_dir, image_format)
+    else:
+        # Each worker owns its own QApplication and compass; chunks are
+        # independent, so completion order doesn't matter
+        with Pool(workers, initializer=_init_worker, initargs=(size, log_level)) as pool:
+            results = [
+                pool.apply_async(_render_chunk, (chunk, output_dir, image_format))
+                for chunk in _chunked(batch, chunk_size)
+            ]
+            for result in results:
+                written += result.get()
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "Compass images rendered",
+        images=written,
+        format=image_format,
+        workers=workers,
+        images_per_sec=round(written / elapsed, 1) if elapsed else 0.0,
+    )
+    return written
+
+def load_jsonl(lines: Iterable[str]) -> DecisionBatch:
+    # Results as written by cli.py: moral_scores keyed by MoralDimension name
+    names, score_dicts = [], []
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        names.append(str(row.get("id", line_number)))
+        score_dicts.append({MoralDimension[name]: score for name, score in row.get("moral_scores", {}).items()})
+    return DecisionBatch.from_score_dicts(names, score_dicts)
+
+def load_conversation_log(path: str) -> DecisionBatch:
+    # Scores straight from the memory-mapped records; names are the text hashes
+    from conversation_store import ConversationStoreReader
+
+    records = ConversationStoreReader(path).records()
+    names = [row.tobytes().hex() for row in records["text_hash"]]
+    return DecisionBatch(names, np.asarray(records["moral_scores"]).reshape(-1, len(DIMENSIONS)))
+
+def render_decision_image(decision: Decision, path: str, size: int = 400):
+    CompassRenderer(size).render(decision, path)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Render compass images for stored analyses without a display.")
+    parser.add_argument("input", help="cli.py JSONL results, or a conversation log with --log")
+    parser.add_argument("output_dir")
+    parser.add_argument("--log", action="store_true", help="Read a binary conversation log instead of JSONL")
+    parser.add_argument("--format", dest="image_format", choices=IMAGE_FORMATS, default="png")
+    parser.add_argument("--size", type=int, default=400, help="Image width and height in pixels")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Number of worker processes (default: 1)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Images per task (default: 256)")
+    parser.add_argument("--log-level", default="WARNING")
+    return parser
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    configure_logging(log_level=args.log_level, stream=sys.stderr)
+
+    if args.log:
+        batch = load_conversation_log(args.input)
+    else:
+        with open(args.input, "r", encoding="utf-8") as handle:
+            batch = load_jsonl(handle)
+    written = render_decisions(
+        batch,
+        args.output_dir,
+        image_format=args.image_format,
+        size=args.size,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        log_level=args.log_level,
+    )
+    print(written)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
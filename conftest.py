@@ -0,0 +1,2 @@
+# The modules live at the repository root; having this file here puts the
+# root on sys.path for the tests under tests/
@@ -0,0 +1,289 @@
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+from typing import Dict, Iterator, Optional, Sequence
+
+import numpy as np
+
+from logger import get_logger
+from models import DIMENSIONS, ConversationContext, MoralDimension
+from sentiment_backends import sentiment_score
+
+# Labels of j-hartmann/emotion-english-distilroberta-base, in model order
+DEFAULT_EMOTION_LABELS = ("anger", "disgust", "fear", "joy", "neutral", "sadness", "surprise")
+
+MAGIC = b"VCLOG\x00\x00\x01"
+FORMAT_VERSION = 1
+HEADER_SIZE = 512
+_HEADER_PREFIX = struct.Struct("<8sII")  # magic, format version, emotion label count
+
+def record_dtype(emotion_count: int) -> np.dtype:
+    # One fixed-width little-endian record per analyzed message; fields are
+    # packed in this order with no padding
+    return np.dtype([
+        ("timestamp", "<f8"),
+        ("text_hash", "u1", (16,)),
+        ("compound", "<f8"),
+        ("polarity", "<f8"),
+        ("emotions", "<f8", (emotion_count,)),
+        ("moral_scores", "<f8", (len(DIMENSIONS),)),
+    ])
+
+def text_hash(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+def _read_header(handle) -> Sequence[str]:
+    header = handle.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError("Conversation log header is truncated")
+    magic, version, emotion_count = _HEADER_PREFIX.unpack_from(header)
+    if magic != MAGIC:
+        raise ValueError("Not a conversation log file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported conversation log version: {version}")
+    labels = header[_HEADER_PREFIX.size:].rstrip(b"\0").decode("ascii").split("\0")
+    if len(labels) != emotion_count:
+        raise ValueError("Conversation log header is corrupt")
+    return tuple(labels)
+
+def _write_header(handle, emotion_labels: Sequence[str]):
+    labels = "\0".join(emotion_labels).encode("ascii")
+    header = _HEADER_PREFIX.pack(MAGIC, FORMAT_VERSION, len(emotion_labels)) + labels
+    if len(header) > HEADER_SIZE:
+        raise ValueError("Too many emotion labels for the log header")
+    handle.write(header.ljust(HEADER_SIZE, b"\0"))
+
+class ConversationStore:
+    def __init__(self, path: str, emotion_labels: Sequence[str] = DEFAULT_EMOTION_LABELS, sync: bool = False):
+        self.path = path
+        self.sync = sync
+        self.logger = get_logger(__name__, log_level="DEBUG")
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as handle:
+                self.emotion_labels = _read_header(handle)
+            if tuple(emotion_labels) != self.emotion_labels:
+                raise ValueError(f"Log was written with emotion labels {self.emotion_labels}")
+            self._dtype = record_dtype(len(self.emotion_labels))
+            self._handle = open(path, "r+b")
+            self._truncate_torn_tail()
+        else:
+            self.emotion_labels = tuple(emotion_labels)
+            self._dtype = record_dtype(len(self.emotion_labels))
+            self._handle = open(path, "w+b")
+            _write_header(self._handle, self.emotion_labels)
+        self._handle.seek(0, os.SEEK_END)
+
+    def _truncate_torn_tail(self):
+        # A crash mid-append can leave a partial record; drop it so every
+        # later append stays record-aligned
+        size = os.path.getsize(self.path)
+        excess = (size - HEADER_SIZE) % self._dtype.itemsize
+        if excess:
+            self.logger.warning("Dropping torn record at end of conversation log", path=self.path, bytes=excess)
+            self._handle.truncate(size - excess)
+
+    def append(self, text: str, sentiment: Dict[str, float], emotions: Dict[str, float], moral_scores: Dict[MoralDimension, float], timestamp: Optional[float] = None):
+        record = np.zeros(1, dtype=self._dtype)
+        record["timestamp"] = time.time() if timestamp is None else timestamp
+        record["text_hash"] = np.frombuffer(text_hash(text), dtype=np.uint8)
+        record["compound"] = sentiment_score(sentiment, "compound")
+        record["polarity"] = sentiment_score(sentiment, "polarity")
+        record["emotions"] = [emotions.get(label, 0.0) for label in self.emotion_labels]
+        # Missing dimensions are stored as NaN, matching Decision's score arrays
+        record["moral_scores"] = [moral_scores.get(dimension, np.nan) for dimension in DIMENSIONS]
+        self._handle.write(record.tobytes())
+        if self.sync:
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+
+    def append_analysis(self, analysis_result: dict, timestamp: Optional[float] = None):
+        self.append(
+            analysis_result["text"],
+            analysis_result["sentiment"],
+            analysis_result["emotions"],
+            analysis_result["moral_scores"],
+            timestamp,
+        )
+
+    def flush(self):
+        self._handle.flush()
+
+    def close(self):
+        if not self._handle.closed:
+            self._handle.close()
+
+    def __enter__(self) -> "ConversationStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class ConversationStoreReader:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as handle:
+            self.emotion_labels = _read_header(handle)
+        self.dtype = record_dtype(len(self.emotion_labels))
+        # Whole records only; a torn tail from an interrupted append is ignored
+        self.record_count = (os.path.getsize(path) - HEADER_SIZE) // self.dtype.itemsize
+
+    def records(self) -> np.ndarray:
+        # Memory-mapped view of every record; pages are read on demand, so
+        # this works for files far larger than RAM
+        if not self.record_count:
+            return np.zeros(0, dtype=self.dtype)
+        return np.memmap(self.path, dtype=self.dtype, mode="r", offset=HEADER_SIZE, shape=(self.record_count,))
+
+    def iter_chunks(self, chunk_records: int = 65536) -> Iterator[np.ndarray]:
+        records = self.records()
+        for start in range(0, len(records), chunk_records):
+            yield np.array(records[start:start + chunk_records])
+
+    def __len__(self) -> int:
+        return self.record_count
+
+    def replay(self, context: Optional[ConversationContext] = None, chunk_records: int = 65536) -> ConversationContext:
+        # Rebuild conversation state from stored vectors alone; no NLP model
+        # is loaded. History entries are the hex text hashes.
+        context = context if context is not None else ConversationContext()
+        labels = self.emotion_labels
+        for chunk in self.iter_chunks(chunk_records):
+            hashes = [row.tobytes().hex() for row in chunk["text_hash"]]
+            for text_digest, compound, emotion_row, moral_row in zip(
+                hashes, chunk["compound"].tolist(), chunk["emotions"].tolist(), chunk["moral_scores"].tolist()
+            ):
+                context.add_message(
+                    text_digest,
+                    compound,
+                    dict(zip(labels, emotion_row)),
+                    {dimension: score for dimension, score in zip(DIMENSIONS, moral_row) if score == score},
+                )
+        return context
+
+_HASH_INDEX = np.dtype([("hi", "<u8"), ("lo", "<u8"), ("index", "<i8")])
+
+def _sorted_pairs(pairs: np.ndarray) -> np.ndarray:
+    # Same order as sort(order=("hi", "lo", "index")), but lexsort on the
+    # integer fields is many times faster than the structured comparison
+    return pairs[np.lexsort((pairs["index"], pairs["lo"], pairs["hi"]))]
+
+def _latest_per_hash(path: str, records: np.ndarray, start: int, chunk_records: int) -> str:
+    # Out-of-core dedupe as an external merge sort: (hash, index) pairs are
+    # sorted in runs of chunk_records and written to a temporary memmap, then
+    # the runs are merged a block at a time. In the merged order every hash's
+    # pairs are adjacent with ascending indices, so the last pair of each group
+    # is the record to keep; its flag lands in a second memmap, one byte per
+    # record. Memory stays around chunk_records pairs plus a little per run.
+    count = len(records) - start
+    pairs_path, keep_path = f"{path}.pairs", f"{path}.keep"
+    keep = np.memmap(keep_path, dtype=bool, mode="w+", shape=(count,))
+    pairs = np.memmap(pairs_path, dtype=_HASH_INDEX, mode="w+", shape=(count,))
+    try:
+        runs = []
+        for offset in range(0, count, chunk_records):
+            hashes = np.ascontiguousarray(records[start + offset:start + offset + chunk_records]["text_hash"]).view("<u8")
+            run = np.empty(len(hashes), dtype=_HASH_INDEX)
+            run["hi"], run["lo"] = hashes[:, 0], hashes[:, 1]
+            run["index"] = np.arange(offset, offset + len(hashes))
+            pairs[offset:offset + len(run)] = _sorted_pairs(run)
+            runs.append([offset, offset + len(run)])
+
+        # Each merge step takes, from every run's buffer, the pairs no greater
+        # than the smallest buffered tail: nothing still on disk can sort
+        # before them. The group straddling two steps is carried over.
+        block_size = max(1, chunk_records // len(runs)) if runs else 1
+        buffers = [np.empty(0, dtype=_HASH_INDEX) for _ in runs]
+        carry = np.empty(0, dtype=_HASH_INDEX)
+        while True:
+            for run, (position, end) in enumerate(runs):
+                if not len(buffers[run]) and position < end:
+                    buffers[run] = np.array(pairs[position:min(end, position + block_size)])
+                    runs[run][0] = position + len(buffers[run])
+            live = [buffer for buffer in buffers if len(buffer)]
+            if not live:
+                break
+            frontier = min((buffer[-1] for buffer in live), key=lambda pair: pair.item())
+            taken = []
+            for run, buffer in enumerate(buffers):
+                cut = int(np.searchsorted(buffer, frontier, side="right"))
+                taken.append(buffer[:cut])
+                buffers[run] = buffer[cut:]
+            block = _sorted_pairs(np.concatenate([carry, *taken]))
+            following = block[1:]
+            last_of_group = (block["hi"][:-1] != following["hi"]) | (block["lo"][:-1] != following["lo"])
+            keep[block["index"][:-1][last_of_group]] = True
+            carry = block[-1:]
+        keep[carry["index"]] = True
+        keep.flush()
+    finally:
+        del pairs
+        os.remove(pairs_path)
+    del keep
+    return keep_path
+
+def compact(path: str, keep_last: Optional[int] = None, since: Optional[float] = None, dedupe: bool = False, chunk_records: int = 65536) -> int:
+    # Rewrite the log without torn tails, records older than `since`, records
+    # beyond the newest `keep_last`, and (with dedupe) all but the latest
+    # record per text hash; the original is replaced atomically
+    reader = ConversationStoreReader(path)
+    records = reader.records()
+    start = max(0, len(records) - keep_last) if keep_last is not None else 0
+
+    keep_path = None
+    if dedupe and len(records) > start:
+        keep_path = _latest_per_hash(path, records, start, chunk_records)
+        keep = np.memmap(keep_path, dtype=bool, mode="r", shape=(len(records) - start,))
+
+    temp_path = f"{path}.compact"
+    kept = 0
+    with open(temp_path, "wb") as handle:
+        _write_header(handle, reader.emotion_labels)
+        for offset in range(start, len(records), chunk_records):
+            chunk = np.array(records[offset:offset + chunk_records])
+            mask = np.ones(len(chunk), dtype=bool)
+            if since is not None:
+                mask &= chunk["timestamp"] >= since
+            if keep_path is not None:
+                mask &= keep[offset - start:offset - start + len(chunk)]
+            handle.write(chunk[mask].tobytes())
+            kept += int(mask.sum())
+        handle.flush()
+        os.fsync(handle.fileno())
+    del records
+    if keep_path is not None:
+        del keep
+        os.remove(keep_path)
+    os.replace(temp_path, path)
+    get_logger(__name__).info("Compacted conversation log", path=path, records=reader.record_count, kept=kept)
+    return kept
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect, replay and compact conversation logs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    replay_parser = subparsers.add_parser("replay", help="Rebuild the conversation context and print its summary")
+    replay_parser.add_argument("path")
+    replay_parser.add_argument("--max-history", type=int, default=1000)
+    compact_parser = subparsers.add_parser("compact", help="Rewrite the log, dropping old or duplicate records")
+    compact_parser.add_argument("path")
+    compact_parser.add_argument("--keep-last", type=int, default=None)
+    compact_parser.add_argument("--since", type=float, default=None, help="Drop records older than this UNIX timestamp")
+    compact_parser.add_argument("--dedupe", action="store_true", help="Keep only the latest record per text")
+    args = parser.parse_args()
+
+    if args.command == "replay":
+        reader = ConversationStoreReader(args.path)
+        start = time.perf_counter()
+        summary = reader.replay(ConversationContext(max_history=args.max_history)).get_context_summary()
+        elapsed = time.perf_counter() - start
+        summary["moral_dimension_averages"] = {dim.name: value for dim, value in summary["moral_dimension_averages"].items()}
+        summary["moral_dimension_variances"] = {dim.name: value for dim, value in summary["moral_dimension_variances"].items()}
+        summary["replay_records_per_sec"] = len(reader) / elapsed if elapsed else 0.0
+        print(json.dumps(summary, indent=2))
+    else:
+        print(compact(args.path, keep_last=args.keep_last, since=args.since, dedupe=args.dedupe))
+    sys.exit(0)
@@ -0,0 +1,341 @@
+import abc
+import argparse
+import json
+import os
+import sys
+import time
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from logger import get_logger
+from startup_profile import timed
+
+EMOTION_MODEL_NAME = "j-hartmann/emotion-english-distilroberta-base"
+
+# How per-window probabilities are combined for texts longer than one window
+AGGREGATIONS = ("mean", "length", "max")
+
+# Fixed corpus for backend parity checks; covers every emotion label and a
+# spread of lengths so padding is exercised
+PARITY_CORPUS = [
+    "I am so happy that we finally found a solution that works for everyone.",
+    "This is disgusting and I can't believe anyone would treat people this way.",
+    "I'm terrified of what might happen if we make the wrong choice here.",
+    "Why would you lie to me? I am absolutely furious.",
+    "It is what it is.",
+    "My grandmother passed away last week and I still can't stop crying.",
+    "Wow, I did not expect the committee to approve the proposal so quickly!",
+    "Should I tell my friend that her partner is cheating on her?",
+    "We could split the inheritance equally, or give more to the sibling who cared for our parents.",
+    "Reporting my manager would protect the customers but might cost me my job.",
+    "Thank you.",
+    "I keep wondering whether breaking a promise is ever the kind thing to do, especially when keeping it "
+    "would hurt someone who never asked for it and who would be better off not knowing about it at all.",
+    "The company plans to move production overseas, which will cut costs but eliminate hundreds of local jobs.",
+    "Ugh.",
+    "I found a wallet with a lot of cash in it and no one saw me pick it up.",
+    "Our team won the championship after years of hard work and sacrifice!",
+]
+
+class EmotionBackend(abc.ABC):
+    name = "base"
+
+    def __init__(self, model_dir: str = EMOTION_MODEL_NAME, max_length: int = 512):
+        self.model_dir = model_dir
+        self.max_length = max_length
+        self.local_files_only = os.path.isdir(model_dir)
+        self.logger = get_logger(__name__, log_level="DEBUG")
+
+        with timed("transformers", "import"):
+            from transformers import AutoConfig, AutoTokenizer
+        with timed("emotion_tokenizer", "load"):
+            self.tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=self.local_files_only)
+            config = AutoConfig.from_pretrained(model_dir, local_files_only=self.local_files_only)
+        self.labels: List[str] = [config.id2label[i] for i in range(len(config.id2label))]
+        self.pad_token_id = self.tokenizer.pad_token_id if self.tokenizer.pad_token_id is not None else 0
+        self._special_prefix, self._special_suffix = self._special_tokens()
+
+    def _special_tokens(self):
+        # Special tokens the tokenizer wraps around a single sequence, recovered
+        # by diffing a sample encoding so windows can be wrapped the same way
+        full = self.tokenizer("sample")["input_ids"]
+        bare = self.tokenizer("sample", add_special_tokens=False)["input_ids"]
+        for start in range(len(full) - len(bare) + 1):
+            if full[start:start + len(bare)] == bare:
+                return full[:start], full[start + len(bare):]
+        return [], []
+
+    def encode(self, texts: Sequence[str]) -> List[List[int]]:
+        return self.tokenizer(list(texts), truncation=True, max_length=self.max_length)["input_ids"]
+
+    def predict_ids(self, batch: Sequence[Sequence[int]]) -> np.ndarray:
+        # Right-pad to the longest row; the attention mask keeps each row's
+        # probabilities identical to an unpadded forward pass
+        width = max(len(ids) for ids in batch)
+        input_ids = np.full((len(batch), width), self.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(batch), width), dtype=np.int64)
+        for row, ids in enumerate(batch):
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+        return _softmax(self._logits(input_ids, attention_mask))
+
+    def predict(self, texts: Sequence[str], batch_size: int = 32) -> np.ndarray:
+        probabilities = np.empty((len(texts), len(self.labels)), dtype=np.float64)
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start:start + batch_size]
+            probabilities[start:start + len(chunk)] = self.predict_ids(self.encode(chunk))
+        return probabilities
+
+    def classify(self, texts: Sequence[str], batch_size: int = 32) -> List[Dict[str, float]]:
+        return [dict(zip(self.labels, row)) for row in self.predict(texts, batch_size).tolist()]
+
+    def predict_long(
+        self,
+        texts: Sequence[str],
+        aggregation: str = "mean",
+        window: Optional[int] = None,
+        stride: int = 128,
+        batch_size: int = 32,
+        predict_ids: Optional[Callable[[List[List[int]]], np.ndarray]] = None,
+    ) -> np.ndarray:
+        # Overlapping token windows from every text are batched through the
+        # model together and folded into running per-text aggregates, so memory
+        # depends on the batch size rather than on document length. predict_ids
+        # lets a scheduler take over how each group of windows is batched
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation: {aggregation} (expected one of {', '.join(AGGREGATIONS)})")
+        predict_ids = predict_ids or self.predict_ids
+        window = window or self.max_length
+        content = window - len(self._special_prefix) - len(self._special_suffix)
+        if not 0 <= stride < content:
+            raise ValueError(f"stride must be between 0 and {content - 1} for a window of {window} tokens")
+
+        totals = np.zeros((len(texts), len(self.labels)), dtype=np.float64)
+        weights = np.zeros(len(texts), dtype=np.float64)
+        windows = (
+            (index, ids)
+            for index, text in enumerate(texts)
+            for ids in self._token_windows(text, content, stride)
+        )
+        while True:
+            batch = list(islice(windows, batch_size))
+            if not batch:
+                break
+            indices = np.fromiter((index for index, _ in batch), dtype=np.int64, count=len(batch))
+            probabilities = predict_ids([self._special_prefix + ids + self._special_suffix for _, ids in batch])
+            if aggregation == "max":
+                np.maximum.at(totals, indices, probabilities)
+                continue
+            window_weights = np.ones(len(batch)) if aggregation == "mean" else np.array([max(1, len(ids)) for _, ids in batch], dtype=np.float64)
+            np.add.at(totals, indices, probabilities * window_weights[:, None])
+            np.add.at(weights, indices, window_weights)
+
+        if aggregation == "max":
+            # Element-wise maxima no longer sum to one; renormalize to a distribution
+            return totals / totals.sum(axis=1, keepdims=True)
+        return totals / weights[:, None]
+
+    def classify_long(self, texts: Sequence[str], batch_size: int = 32, **kwargs) -> List[Dict[str, float]]:
+        return [dict(zip(self.labels, row)) for row in self.predict_long(texts, batch_size=batch_size, **kwargs).tolist()]
+
+    def _token_windows(self, text: str, content: int, stride: int) -> Iterator[List[int]]:
+        # Windows of up to `content` tokens, each sharing `stride` tokens with
+        # the previous one; a text that fits yields exactly the truncated input
+        step = content - stride
+        buffer: List[int] = []
+        emitted = False
+        for ids in self._stream_token_ids(text):
+            buffer.extend(ids)
+            while len(buffer) > content:
+                yield buffer[:content]
+                emitted = True
+                del buffer[:step]
+        if not emitted or len(buffer) > stride:
+            yield buffer
+
+    def _stream_token_ids(self, text: str, block_chars: int = 65536) -> Iterator[List[int]]:
+        # Tokenize huge texts block by block; cutting just before whitespace
+        # keeps byte-level BPE tokens identical to a single full encode
+        start = 0
+        while start < len(text):
+            end = start + block_chars
+            if end < len(text):
+                cut = max(text.rfind(" ", start + 1, end), text.rfind("\n", start + 1, end))
+                end = cut if cut > start else end
+            yield self.tokenizer(text[start:end], add_special_tokens=False, verbose=False)["input_ids"]
+            start = end
+
+    @abc.abstractmethod
+    def _logits(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        ...
+
+class TorchEmotionBackend(EmotionBackend):
+    name = "torch"
+
+    def __init__(self, model_dir: str = EMOTION_MODEL_NAME, max_length: int = 512):
+        super().__init__(model_dir, max_length)
+        with timed("torch", "import"):
+            import torch
+        from transformers import AutoModelForSequenceClassification
+
+        self._torch = torch
+        with timed("emotion_model", "load"):
+            model = AutoModelForSequenceClassification.from_pretrained(model_dir, local_files_only=self.local_files_only)
+            model.eval()  # Set the model to evaluation mode
+            self.model = self._prepare(model)
+
+    def _prepare(self, model):
+        return model
+
+    def _logits(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        torch = self._torch
+        with torch.no_grad():
+            outputs = self.model(input_ids=torch.from_numpy(input_ids), attention_mask=torch.from_numpy(attention_mask))
+        return outputs.logits.float().numpy()
+
+class QuantizedEmotionBackend(TorchEmotionBackend):
+    name = "quantized"
+
+    def _prepare(self, model):
+        # Dynamic int8 quantization of the Linear layers; activations stay float
+        with timed("emotion_model", "quantize"):
+            return self._torch.ao.quantization.quantize_dynamic(model, {self._torch.nn.Linear}, dtype=self._torch.qint8)
+
+class OnnxEmotionBackend(EmotionBackend):
+    name = "onnx"
+
+    def __init__(self, model_dir: str = EMOTION_MODEL_NAME, max_length: int = 512, onnx_path: Optional[str] = None):
+        super().__init__(model_dir, max_length)
+        try:
+            with timed("onnxruntime", "import"):
+                import onnxruntime
+        except ImportError as exc:
+            raise ImportError("The onnx emotion backend requires the onnxruntime package") from exc
+
+        self.onnx_path = onnx_path or _default_onnx_path(model_dir)
+        if not os.path.exists(self.onnx_path):
+            self._export(self.onnx_path)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        with timed("emotion_model", "load"):
+            self.session = onnxruntime.InferenceSession(self.onnx_path, options, providers=["CPUExecutionProvider"])
+
+    def _export(self, onnx_path: str):
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        self.logger.info("Exporting emotion model to ONNX", model=self.model_dir, path=onnx_path)
+        model = AutoModelForSequenceClassification.from_pretrained(self.model_dir, local_files_only=self.local_files_only)
+        model.eval()
+        # return_dict=False gives a plain tuple output, which traces cleanly
+        model.config.return_dict = False
+
+        sample = self.tokenizer(["an example sentence for tracing"], return_tensors="pt")
+        os.makedirs(os.path.dirname(os.path.abspath(onnx_path)), exist_ok=True)
+        with timed("emotion_model", "export"), torch.no_grad():
+            torch.onnx.export(
+                model,
+                (sample["input_ids"], sample["attention_mask"]),
+                onnx_path,
+                input_names=["input_ids", "attention_mask"],
+                output_names=["logits"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "logits": {0: "batch"},
+                },
+                opset_version=17,
+            )
+
+    def _logits(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        return self.session.run(["logits"], {"input_ids": input_ids, "attention_mask": attention_mask})[0]
+
+BACKENDS = {
+    TorchEmotionBackend.name: TorchEmotionBackend,
+    QuantizedEmotionBackend.name: QuantizedEmotionBackend,
+    OnnxEmotionBackend.name: OnnxEmotionBackend,
+}
+
+def create_emotion_backend(name: str = "torch", model_dir: str = EMOTION_MODEL_NAME, **kwargs) -> EmotionBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown emotion backend: {name} (expected one of {', '.join(BACKENDS)})")
+    return BACKENDS[name](model_dir, **kwargs)
+
+def _default_onnx_path(model_dir: str) -> str:
+    if os.path.isdir(model_dir):
+        return os.path.join(model_dir, "onnx", "model.onnx")
+    cache_root = os.path.join(os.path.expanduser("~"), ".cache", "virtual_compass", "onnx")
+    return os.path.join(cache_root, model_dir.replace("/", "--"), "model.onnx")
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits.astype(np.float64)
+    shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
+
+def compare_backends(
+    model_dir: str = EMOTION_MODEL_NAME,
+    backends: Sequence[str] = ("torch", "quantized", "onnx"),
+    corpus: Sequence[str] = PARITY_CORPUS,
+    batch_size: int = 16,
+    repeats: int = 3,
+) -> Dict[str, dict]:
+    # Parity and speed of each backend against the full-precision torch
+    # baseline. Without torch there is nothing to measure parity against, so
+    # that is an error rather than a silent switch to another baseline.
+    logger = get_logger(__name__)
+    corpus = list(corpus)
+    baseline = None
+    report = {}
+    for name in ["torch"] + [name for name in backends if name != "torch"]:
+        try:
+            backend = create_emotion_backend(name, model_dir)
+        except ImportError as exc:
+            if name == "torch":
+                raise ImportError(f"Backend parity is measured against the torch baseline, which is unavailable: {exc}") from exc
+            logger.warning("Skipping emotion backend", backend=name, error=str(exc))
+            continue
+
+        probabilities = backend.predict(corpus, batch_size)
+        if baseline is None:
+            baseline = probabilities
+
+        # Warm up once, then take the best of several timed runs
+        backend.predict(corpus[:1], 1)
+        single = min(_time(lambda: [backend.predict([text], 1) for text in corpus]) for _ in range(repeats))
+        batched = min(_time(lambda: backend.predict(corpus, batch_size)) for _ in range(repeats))
+
+        report[name] = {
+            "max_probability_deviation": float(np.abs(probabilities - baseline).max()),
+            "label_agreement": float((probabilities.argmax(axis=1) == baseline.argmax(axis=1)).mean()),
+            "single_latency_ms": single / len(corpus) * 1000,
+            "batched_texts_per_sec": len(corpus) / batched if batched else float("inf"),
+        }
+        logger.info("Emotion backend measured", backend=name, **report[name])
+    return {name: result for name, result in report.items() if name in backends}
+
+def _time(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare emotion inference backends against the torch baseline.")
+    parser.add_argument("--model-dir", default=EMOTION_MODEL_NAME, help="Local model directory (or hub name if cached)")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    results = compare_backends(args.model_dir, args.backends, batch_size=args.batch_size, repeats=args.repeats)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'backend':<10} {'max dev':>10} {'agree':>7} {'ms/text':>9} {'texts/s':>9}")
+        for name, result in results.items():
+            print(f"{name:<10} {result['max_probability_deviation']:>10.2e} {result['label_agreement']:>7.1%} "
+                  f"{result['single_latency_ms']:>9.2f} {result['batched_texts_per_sec']:>9.1f}")
+    sys.exit(0)
@@ -1,12 +1,16 @@
 import sys
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                             QLabel, QPushButton, QTextEdit, QScrollArea, QFrame, QSplitter)
+                             QLabel, QPushButton, QTextEdit, QScrollArea, QFrame, QSplitter, QProgressBar,
+                             QCheckBox)
 from PyQt5.QtGui import QFont, QPainter, QColor, QLinearGradient, QPen, QIcon
-from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtCore import Qt, QRect, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
 from moral_compass import MoralCompass
-from models import Decision, MoralDimension
+from compass_overlay import DecisionOverlay
+from models import Decision, DecisionBatch, MoralDimension
 from response_generator import ResponseGenerator
-from input_analysis import ConversationAnalyzer
+from input_analysis import get_conversation_analyzer
+from live_analysis import IncrementalAnalyzer
+from sentiment_backends import sentiment_score
 
 class MedievalScrollArea(QScrollArea):
     def __init__(self, parent=None):
@@ -65,8 +69,120 @@ class MedievalButton(QPushButton):
             painter.setBrush(QColor(255, 255, 255, 30))
             painter.drawRoundedRect(rect, 10, 10)
 
+class AnalysisSignals(QObject):
+    finished = pyqtSignal(int, object, str)  # request id, analysis result, response
+    failed = pyqtSignal(int, str)  # request id, error message
+
+class AnalysisTask(QRunnable):
+    def __init__(self, request_id: int, text: str, conversation_analyzer, response_generator):
+        super().__init__()
+        self.request_id = request_id
+        self.text = text
+        self.conversation_analyzer = conversation_analyzer
+        self.response_generator = response_generator
+        self.signals = AnalysisSignals()
+        self.cancelled = False
+
+    def cancel(self):
+        # A running forward pass can't be interrupted, so cancellation takes
+        # effect at the next stage boundary and suppresses the result
+        self.cancelled = True
+
+    def run(self):
+        if self.cancelled:
+            return
+        try:
+            analysis_result = self.conversation_analyzer.analyze_input(self.text)
+            if self.cancelled:
+                return
+            response = self.response_generator.generate_response(self.text, analysis_result)
+        except Exception as exc:
+            if not self.cancelled:
+                self.signals.failed.emit(self.request_id, str(exc))
+            return
+        if not self.cancelled:
+            self.signals.finished.emit(self.request_id, analysis_result, response)
+
+class LiveAnalysisTask(QRunnable):
+    def __init__(self, request_id: int, text: str, incremental_analyzer):
+        super().__init__()
+        self.request_id = request_id
+        self.text = text
+        self.incremental_analyzer = incremental_analyzer
+        self.signals = AnalysisSignals()
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        if self.cancelled:
+            return
+        try:
+            analysis_result = self.incremental_analyzer.analyze(self.text)
+        except Exception as exc:
+            if not self.cancelled:
+                self.signals.failed.emit(self.request_id, str(exc))
+            return
+        if not self.cancelled:
+            self.signals.finished.emit(self.request_id, analysis_result, "")
+
+class PrewarmTask(QRunnable):
+    def __init__(self, conversation_analyzer):
+        super().__init__()
+        self.conversation_analyzer = conversation_analyzer
+
+    def run(self):
+        try:
+            self.conversation_analyzer.prewarm()
+        except Exception as exc:
+            # Not fatal: the first analysis will retry the load and report the error
+            self.conversation_analyzer.logger.warning("Prewarm failed", error=str(exc))
+
+class DecisionHistoryWindow(QWidget):
+    # Every decision analyzed this session on one compass; hovering a
+    # polygon names its decision
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.Window)
+        self.setWindowTitle("Decision History")
+        self.setStyleSheet("background-color: #FFF8DC;")
+        self.resize(600, 650)
+        layout = QVBoxLayout(self)
+
+        self.overlay = DecisionOverlay()
+        self.overlay.decisionHovered.connect(self._on_decision_hovered)
+        layout.addWidget(self.overlay, 1)
+
+        controls = QHBoxLayout()
+        self.heatmap_checkbox = QCheckBox("Heatmap")
+        self.heatmap_checkbox.setStyleSheet("font-size: 14px; color: #8B4513; font-family: 'Times New Roman';")
+        self.heatmap_checkbox.toggled.connect(lambda heatmap: self.overlay.set_mode("heatmap" if heatmap else "polygons"))
+        controls.addWidget(self.heatmap_checkbox)
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("font-size: 14px; color: #8B4513; font-family: 'Times New Roman';")
+        controls.addWidget(self.status_label, 1)
+        layout.addLayout(controls)
+        self._show_count()
+
+    def set_decisions(self, decisions):
+        self.overlay.set_batch(DecisionBatch.from_decisions(decisions))
+        self._show_count()
+
+    def _show_count(self):
+        self.status_label.setText(f"{len(self.overlay.batch)} decisions this session")
+
+    def _on_decision_hovered(self, row: int):
+        if row < 0:
+            self._show_count()
+            return
+        decision = self.overlay.batch[row]
+        self.status_label.setText(f"{decision.name} (Goodness: {decision.goodness:.2f})")
+
 class GUI(QMainWindow):
-    def __init__(self):
+    # Pause in typing before live mode re-analyzes the edited sentences
+    LIVE_DEBOUNCE_MS = 400
+
+    def __init__(self, prewarm: bool = True):
         super().__init__()
         self.setWindowTitle("Ye Olde Decision Analysis Toole")
         self.setGeometry(100, 100, 1000, 700)
@@ -77,8 +193,29 @@ class GUI(QMainWindow):
             }
         """)
 
-        self.response_generator = ResponseGenerator()
-        self.conversation_analyzer = ConversationAnalyzer()
+        self.conversation_analyzer = get_conversation_analyzer()
+        self.response_generator = ResponseGenerator(self.conversation_analyzer)
+
+        # The models are shared, so analyses run one at a time off the main thread
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(1)
+        self._request_id = 0
+        self._current_task = None
+        self._prewarm = prewarm
+
+        # Live mode re-analyzes only new or edited sentences once typing pauses
+        self.incremental_analyzer = IncrementalAnalyzer(self.conversation_analyzer)
+        self._live_request_id = 0
+        self._live_task = None
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(self.LIVE_DEBOUNCE_MS)
+        self.live_timer.timeout.connect(self._run_live_analysis)
+
+        # Decisions from full analyses, for the history overlay; the window is
+        # built on first use
+        self.decision_history = []
+        self.history_window = None
 
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -109,6 +246,14 @@ class GUI(QMainWindow):
         # Set the initial sizes of the splitter
         content_splitter.setSizes([600, 400])
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        # Load the models in the background once the window is up, so the first
+        # analysis doesn't pay for it; queued ahead of any analysis on the pool
+        if self._prewarm:
+            self._prewarm = False
+            QTimer.singleShot(0, lambda: self.thread_pool.start(PrewarmTask(self.conversation_analyzer)))
+
     def create_header(self):
         header = QLabel("Ye Olde Decision Analysis Toole")
         header.setStyleSheet("""
@@ -157,8 +302,18 @@ class GUI(QMainWindow):
             }
         """)
         self.input_text.setFixedHeight(100)
+        self.input_text.textChanged.connect(self._on_input_changed)
         input_layout.addWidget(self.input_text)
 
+        self.live_checkbox = QCheckBox("Live analysis")
+        self.live_checkbox.setStyleSheet("""
+            font-size: 14px;
+            color: #8B4513;
+            font-family: 'Times New Roman';
+        """)
+        self.live_checkbox.toggled.connect(self._on_live_toggled)
+        input_layout.addWidget(self.live_checkbox)
+
         return input_frame
 
     def create_button_section(self):
@@ -174,6 +329,29 @@ class GUI(QMainWindow):
         clear_button.clicked.connect(self.clear_input)
         button_layout.addWidget(clear_button)
 
+        history_button = MedievalButton("History")
+        history_button.clicked.connect(self.show_history)
+        button_layout.addWidget(history_button)
+
+        # Indeterminate busy indicator, shown while an analysis is in flight
+        self.busy_indicator = QProgressBar()
+        self.busy_indicator.setRange(0, 0)
+        self.busy_indicator.setTextVisible(False)
+        self.busy_indicator.setFixedHeight(14)
+        self.busy_indicator.setStyleSheet("""
+            QProgressBar {
+                border: 2px solid #8B4513;
+                border-radius: 7px;
+                background-color: #FFF8DC;
+            }
+            QProgressBar::chunk {
+                background-color: #DAA520;
+                border-radius: 5px;
+            }
+        """)
+        self.busy_indicator.hide()
+        button_layout.addWidget(self.busy_indicator)
+
         return button_frame
 
     def create_output_section(self):
@@ -220,24 +398,41 @@ class GUI(QMainWindow):
 
     def analyze_input(self):
         input_text = self.input_text.toPlainText()
-        
-        # Use ConversationAnalyzer to get detailed analysis
-        analysis_result = self.conversation_analyzer.analyze_input(input_text)
-        
-        # Generate response using ResponseGenerator
-        response = self.response_generator.generate_response(input_text)
-        
+
+        # A new submission supersedes whatever is still pending
+        self._cancel_current_task()
+        self.live_timer.stop()
+        self._cancel_live_task()
+        self._request_id += 1
+
+        task = AnalysisTask(self._request_id, input_text, self.conversation_analyzer, self.response_generator)
+        task.signals.finished.connect(self._on_analysis_finished)
+        task.signals.failed.connect(self._on_analysis_failed)
+        self._current_task = task
+
+        self._set_busy(True)
+        self.thread_pool.start(task)
+
+    def _on_analysis_finished(self, request_id: int, analysis_result: dict, response: str):
+        # Drop results from requests that have since been superseded
+        if request_id != self._request_id:
+            return
+        self._current_task = None
+        self._set_busy(False)
+
         # Display the response
         self.output_text.setPlainText(response)
 
         # Update the Moral Compass
         new_decision = analysis_result['decision']
-        self.moral_compass.decision = new_decision
-        self.moral_compass.update()
+        self.moral_compass.update_decision(new_decision)
+        self.decision_history.append(new_decision)
+        if self.history_window is not None:
+            self.history_window.set_decisions(self.decision_history)
 
         # Display additional analysis information
         additional_info = f"""
-Sentiment: {analysis_result['sentiment']['compound']:.2f}
+Sentiment: {sentiment_score(analysis_result['sentiment'], 'compound'):.2f}
 Dominant Emotion: {max(analysis_result['emotions'], key=analysis_result['emotions'].get)}
 Key Phrases: {', '.join(analysis_result['key_phrases'][:5])}  # Display top 5 key phrases
 Entities: {', '.join([e['text'] for e in analysis_result['entities'][:5]])}  # Display top 5 entities
@@ -245,10 +440,92 @@ Entities: {', '.join([e['text'] for e in analysis_result['entities'][:5]])}  # D
         self.output_text.append("\n\nAdditional Analysis:")
         self.output_text.append(additional_info)
 
+    def show_history(self):
+        if self.history_window is None:
+            self.history_window = DecisionHistoryWindow(self)
+            self.history_window.set_decisions(self.decision_history)
+        self.history_window.show()
+        self.history_window.raise_()
+        self.history_window.activateWindow()
+
+    def _on_analysis_failed(self, request_id: int, error: str):
+        if request_id != self._request_id:
+            return
+        self._current_task = None
+        self._set_busy(False)
+        self.output_text.setPlainText(f"Alas, the analysis hath failed: {error}")
+
+    def _on_input_changed(self):
+        # Every keystroke restarts the debounce; nothing runs until typing pauses
+        if self.live_checkbox.isChecked():
+            self.live_timer.start()
+
+    def _on_live_toggled(self, enabled: bool):
+        if enabled:
+            self.live_timer.start()
+        else:
+            self.live_timer.stop()
+            self._cancel_live_task()
+            self._live_request_id += 1
+
+    def _run_live_analysis(self):
+        text = self.input_text.toPlainText()
+        self._cancel_live_task()
+        self._live_request_id += 1
+        if not text.strip():
+            return
+
+        task = LiveAnalysisTask(self._live_request_id, text, self.incremental_analyzer)
+        task.signals.finished.connect(self._on_live_analysis_finished)
+        task.signals.failed.connect(self._on_live_analysis_failed)
+        self._live_task = task
+        self.thread_pool.start(task)
+
+    def _on_live_analysis_finished(self, request_id: int, analysis_result: dict, _response: str):
+        # A full analysis in flight will repaint with richer results; don't race it
+        if request_id != self._live_request_id or self._current_task is not None:
+            return
+        self._live_task = None
+
+        self.moral_compass.update_decision(analysis_result['decision'])
+
+        emotions = analysis_result['emotions']
+        self.output_text.setPlainText(f"""Live Analysis ({analysis_result['sentences']} sentences, {analysis_result['reanalyzed_sentences']} re-analyzed):
+Sentiment: {sentiment_score(analysis_result['sentiment'], 'compound'):.2f}
+Dominant Emotion: {max(emotions, key=emotions.get) if emotions else 'none'}
+Click "Analyze" for key phrases, entities and a full response.""")
+
+    def _on_live_analysis_failed(self, request_id: int, error: str):
+        if request_id != self._live_request_id:
+            return
+        self._live_task = None
+        self.conversation_analyzer.logger.warning("Live analysis failed", error=error)
+
+    def _cancel_live_task(self):
+        if self._live_task is not None:
+            self._live_task.cancel()
+            self._live_task = None
+
+    def _cancel_current_task(self):
+        if self._current_task is not None:
+            self._current_task.cancel()
+            self._current_task = None
+
+    def _set_busy(self, busy: bool):
+        self.busy_indicator.setVisible(busy)
+
     def clear_input(self):
+        # Invalidate any in-flight analysis so it can't repaint the cleared view
+        self._cancel_current_task()
+        self._request_id += 1
+        self._set_busy(False)
+
         self.input_text.clear()
+        # Clearing fires textChanged; there's nothing left to analyze live
+        self.live_timer.stop()
+        self._cancel_live_task()
+        self._live_request_id += 1
         self.output_text.clear()
         # Reset the Moral Compass to its initial state
         initial_moral_scores = {dim: 0 for dim in MoralDimension}
-        self.moral_compass.decision = Decision("Initial Decision", "No decision made yet", initial_moral_scores)
-        self.moral_compass.update()
+        self.moral_compass.update_decision(Decision("Initial Decision", "No decision made yet", initial_moral_scores))
@@ -1,51 +1,298 @@
-import spacy
-from textblob import TextBlob
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from models import Decision, MoralDimension, Philosophy, PhilosophicalCompendium
-from moral_compass import MoralCompass
+import os
+import threading
+import time
+from typing import List, Optional
+
+from models import Decision, MoralDimension, PhilosophicalCompendium
 from logger import get_logger
+from startup_profile import timed
+from analysis_cache import AnalysisCache
+from emotion_backends import EMOTION_MODEL_NAME, EmotionBackend, create_emotion_backend
+from batch_scheduler import TokenBudgetScheduler
+from sentiment_backends import SentimentBackend, create_sentiment_backend, sentiment_score
+from metrics import span
+import metrics
+
+SPACY_MODEL_NAME = "en_core_web_sm"
+
+# The analysis only reads doc.noun_chunks and doc.ents. Each profile excludes
+# the en_core_web_sm components it doesn't need (excluded components are never
+# loaded) and says which extractions run. noun_chunks needs the parser plus the
+# POS tags from tagger + attribute_ruler; ner carries its own tok2vec.
+SPACY_PROFILES = {
+    "full": {"exclude": [], "key_phrases": True, "entities": True},
+    "entities-only": {
+        "exclude": ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer"],
+        "key_phrases": False,
+        "entities": True,
+    },
+    "chunks-only": {"exclude": ["ner", "lemmatizer"], "key_phrases": True, "entities": False},
+    # No spaCy at all; key_phrases and entities are always empty
+    "none": {"exclude": None, "key_phrases": False, "entities": False},
+}
+
+# Bump whenever scoring or result layout changes; part of every cache key
+PIPELINE_VERSION = "3"
+
+def emotion_model_fingerprint(model_name: str = EMOTION_MODEL_NAME) -> str:
+    # Identify the emotion model weights without loading them
+    if os.path.isdir(model_name):
+        stamps = []
+        for entry in sorted(os.listdir(model_name)):
+            path = os.path.join(model_name, entry)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                stamps.append(f"{entry}:{stat.st_size}:{int(stat.st_mtime)}")
+        return f"{os.path.abspath(model_name)}#{'|'.join(stamps)}"
+    try:
+        from huggingface_hub import try_to_load_from_cache
+        config_path = try_to_load_from_cache(model_name, "config.json")
+    except ImportError:
+        config_path = None
+    if isinstance(config_path, str):
+        # .../snapshots/<commit hash>/config.json
+        return f"{model_name}@{os.path.basename(os.path.dirname(config_path))}"
+    return model_name
 
 class ConversationAnalyzer:
-    def __init__(self):
-        self.nlp = spacy.load("en_core_web_sm")
-        self.sentiment_analyzer = SentimentIntensityAnalyzer()
-        
-        # Load emotion classification model and tokenizer
-        self.emotion_tokenizer = AutoTokenizer.from_pretrained("j-hartmann/emotion-english-distilroberta-base")
-        self.emotion_model = AutoModelForSequenceClassification.from_pretrained("j-hartmann/emotion-english-distilroberta-base")
-        self.emotion_model.eval()  # Set the model to evaluation mode
+    def __init__(
+        self,
+        cache: Optional[AnalysisCache] = None,
+        emotion_backend: str = "torch",
+        emotion_model_dir: str = EMOTION_MODEL_NAME,
+        long_text_aggregation: Optional[str] = "mean",
+        window_stride: int = 128,
+        token_budget: Optional[int] = 8192,
+        spacy_profile: str = "full",
+        sentiment_backend: str = "combined",
+    ):
+        # spaCy, TextBlob, VADER, torch and transformers are imported and
+        # loaded on first use; see prewarm() to do it ahead of time
+        if spacy_profile not in SPACY_PROFILES:
+            raise ValueError(f"Unknown spaCy profile '{spacy_profile}'; choose from {', '.join(SPACY_PROFILES)}")
+        self.spacy_profile = spacy_profile
+        self._nlp = None
+        # "combined" runs TextBlob and VADER; "vader"/"fast" or "textblob" pay for one
+        self._sentiment_backend: SentimentBackend = create_sentiment_backend(sentiment_backend)
+        self._emotion_backend: Optional[EmotionBackend] = None
+        self.emotion_backend_name = emotion_backend
+        self.emotion_model_dir = emotion_model_dir
+        # Texts longer than the model's 512 tokens are classified as
+        # overlapping windows; None restores plain truncation
+        self.long_text_aggregation = long_text_aggregation
+        self.window_stride = window_stride
+        # Batches are sized by padded tokens rather than item count; None
+        # falls back to fixed-size batches
+        self.token_budget = token_budget
+        self._emotion_scheduler: Optional[TokenBudgetScheduler] = None
+        self._load_lock = threading.RLock()
+        self._cache_version = None
         
+        self.cache = cache
         self.philosophical_compendium = PhilosophicalCompendium()
         self.logger = get_logger(__name__, log_level="DEBUG")
 
+    @property
+    def nlp(self):
+        # None under the "none" profile
+        exclude = SPACY_PROFILES[self.spacy_profile]["exclude"]
+        if self._nlp is None and exclude is not None:
+            with self._load_lock:
+                if self._nlp is None:
+                    with timed("spacy", "import"):
+                        import spacy
+                    start = time.perf_counter()
+                    with timed("spacy", "load"):
+                        self._nlp = spacy.load(SPACY_MODEL_NAME, exclude=exclude)
+                    self.logger.info(
+                        "spaCy pipeline loaded",
+                        profile=self.spacy_profile,
+                        components=self._nlp.pipe_names,
+                        load_ms=round((time.perf_counter() - start) * 1000, 1),
+                    )
+        return self._nlp
+
+    def _parse(self, text: str):
+        nlp = self.nlp
+        return nlp(text) if nlp is not None else None
+
+    def _parse_batch(self, texts: List[str], batch_size: int) -> list:
+        nlp = self.nlp
+        if nlp is None:
+            return [None] * len(texts)
+        return list(nlp.pipe(texts, batch_size=batch_size))
+
+    @property
+    def sentiment_backend(self) -> SentimentBackend:
+        self._sentiment_backend.load()
+        return self._sentiment_backend
+
+    @property
+    def emotion_backend(self) -> EmotionBackend:
+        if self._emotion_backend is None:
+            with self._load_lock:
+                if self._emotion_backend is None:
+                    self._emotion_backend = create_emotion_backend(self.emotion_backend_name, self.emotion_model_dir)
+        return self._emotion_backend
+
+    @property
+    def emotion_scheduler(self) -> Optional[TokenBudgetScheduler]:
+        if self.token_budget is None:
+            return None
+        if self._emotion_scheduler is None:
+            backend = self.emotion_backend
+            with self._load_lock:
+                if self._emotion_scheduler is None:
+                    self._emotion_scheduler = TokenBudgetScheduler(backend, max_tokens=self.token_budget)
+        return self._emotion_scheduler
+
+    @property
+    def cache_version(self) -> str:
+        if self._cache_version is None:
+            self._cache_version = "|".join([
+                PIPELINE_VERSION,
+                f"{SPACY_MODEL_NAME}:{self.spacy_profile}",
+                f"sentiment:{self._sentiment_backend.name}",
+                self.emotion_backend_name,
+                emotion_model_fingerprint(self.emotion_model_dir),
+                f"{self.long_text_aggregation or 'truncate'}:{self.window_stride}",
+            ])
+        return self._cache_version
+
+    def prewarm(self):
+        # Force every lazy component to load, e.g. from a background thread
+        self.logger.debug("Prewarming analysis components")
+        self.nlp
+        self.sentiment_backend
+        self.emotion_backend
+        self.logger.debug("Analysis components ready")
+
     def analyze_input(self, text: str) -> dict:
-        self.logger.info(f"Analyzing input: {text}")
+        # Only the length: raw user text never goes to the logs above DEBUG
+        self.logger.debug("Analyzing input", chars=len(text))
         
-        # Basic NLP analysis
-        doc = self.nlp(text)
+        # Per-stage timings; only filled in while metrics are enabled
+        timings = {} if metrics.is_enabled() else None
+        with span("analyze_input", timings):
+            with span("cache_lookup", timings):
+                cached = self._cache_lookup(text)
+            if cached is not None:
+                self.logger.sampled("debug", "Analysis served from cache", every=100)
+                return cached
+            
+            # Basic NLP analysis
+            with span("spacy", timings):
+                doc = self._parse(text)
+            
+            # Sentiment analysis
+            sentiment = self._analyze_sentiment(text, timings)
+            
+            # Emotion classification
+            with span("emotion", timings):
+                emotions = self._classify_emotions(text)
+            
+            analysis_result = self._build_result(text, doc, sentiment, emotions, timings)
+            if self.cache is not None:
+                self.cache.put(text, self.cache_version, analysis_result)
         
-        # Sentiment analysis
-        sentiment = self._analyze_sentiment(text)
+        self.logger.info("Analysis complete", **(timings or {}))
+        return analysis_result
+
+    def analyze_batch(self, texts: List[str], batch_size: int = 32) -> List[dict]:
+        texts = list(texts)
+        self.logger.info("Analyzing batch", size=len(texts), batch_size=batch_size)
         
-        # Emotion classification
-        emotions = self._classify_emotions(text)
+        timings = {} if metrics.is_enabled() else None
+        with span("analyze_batch", timings):
+            with span("cache_lookup", timings):
+                results: List[Optional[dict]] = [self._cache_lookup(text) for text in texts]
+            pending = [i for i, result in enumerate(results) if result is None]
+            pending_texts = [texts[i] for i in pending]
+            
+            # Basic NLP analysis, streamed through spaCy's batched pipe
+            with span("batch.spacy", timings):
+                docs = self._parse_batch(pending_texts, batch_size)
+            
+            # Sentiment analysis in one pass over the batch
+            with span("batch.sentiment", timings):
+                sentiments = self.sentiment_backend.analyze_batch(pending_texts)
+            
+            # Emotion classification with padded, batched forward passes
+            with span("batch.emotion", timings):
+                emotions = self._classify_emotions_batch(pending_texts, batch_size)
+            
+            with span("batch.build_results", timings):
+                for i, doc, sentiment, emotion in zip(pending, docs, sentiments, emotions):
+                    results[i] = self._build_result(texts[i], doc, sentiment, emotion)
+                    if self.cache is not None:
+                        self.cache.put(texts[i], self.cache_version, results[i])
         
-        # Extract key phrases and entities
-        key_phrases = self._extract_key_phrases(doc)
-        entities = self._extract_entities(doc)
+        self.logger.info("Batch analysis complete", size=len(results), cached=len(texts) - len(pending), **(timings or {}))
+        return results
+
+    def _cache_lookup(self, text: str) -> Optional[dict]:
+        if self.cache is None:
+            return None
+        cached = self.cache.get(text, self.cache_version)
+        if cached is not None and cached["text"] != text:
+            # Hit on a normalized variant: report the caller's own text (the
+            # hit is the caller's own copy, so editing it is safe)
+            cached["text"] = text
+            cached["decision"].description = text
+        return cached
+
+    def measure_throughput(self, texts: List[str], batch_size: int = 32) -> dict:
+        # Texts/sec for the single-item path versus analyze_batch on the same corpus
+        texts = list(texts)
+        if not texts:
+            return {"texts": 0, "batch_size": batch_size, "single_texts_per_sec": 0.0, "batch_texts_per_sec": 0.0, "speedup": 0.0}
         
-        # Moral dimension scoring
-        moral_scores = self._score_moral_dimensions(doc, sentiment, emotions)
+        # Measure the models, not the cache
+        cache, self.cache = self.cache, None
+        try:
+            start = time.perf_counter()
+            for text in texts:
+                self.analyze_input(text)
+            single_elapsed = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            self.analyze_batch(texts, batch_size=batch_size)
+            batch_elapsed = time.perf_counter() - start
+        finally:
+            self.cache = cache
         
-        # Create a Decision object
-        decision = Decision("User Input", text, moral_scores)
+        single_rate = len(texts) / single_elapsed if single_elapsed else float("inf")
+        batch_rate = len(texts) / batch_elapsed if batch_elapsed else float("inf")
+        throughput = {
+            "texts": len(texts),
+            "batch_size": batch_size,
+            "single_texts_per_sec": single_rate,
+            "batch_texts_per_sec": batch_rate,
+            "speedup": batch_rate / single_rate if single_rate else 0.0,
+        }
+        self.logger.info("Throughput measured", **throughput)
+        return throughput
+
+    def _build_result(self, text: str, doc, sentiment: dict, emotions: dict, timings: Optional[dict] = None) -> dict:
+        # Extract key phrases and entities, as far as the spaCy profile allows
+        profile = SPACY_PROFILES[self.spacy_profile]
+        with span("extraction", timings):
+            key_phrases = self._extract_key_phrases(doc) if profile["key_phrases"] else []
+            entities = self._extract_entities(doc) if profile["entities"] else []
+        
+        # Moral dimension scoring
+        with span("moral_scoring", timings):
+            moral_scores = self._score_moral_dimensions(doc, sentiment, emotions)
+            
+            # Create a Decision object
+            decision = Decision("User Input", text, moral_scores)
         
         # Generate philosophical evaluation
-        philosophical_evaluation = self.philosophical_compendium.evaluate_decision(decision)
+        with span("philosophical_evaluation", timings):
+            philosophical_evaluation = self.philosophical_compendium.evaluate_decision(decision)
+            decision.set_philosophical_scores(philosophical_evaluation)
         
-        analysis_result = {
+        return {
             "text": text,
             "sentiment": sentiment,
             "emotions": emotions,
@@ -55,36 +302,35 @@ class ConversationAnalyzer:
             "decision": decision,
             "philosophical_evaluation": philosophical_evaluation,
         }
-        
-        self.logger.info("Analysis complete")
-        return analysis_result
 
-    def _analyze_sentiment(self, text: str) -> dict:
-        blob = TextBlob(text)
-        vader_sentiment = self.sentiment_analyzer.polarity_scores(text)
-        
-        return {
-            "polarity": blob.sentiment.polarity,
-            "subjectivity": blob.sentiment.subjectivity,
-            "compound": vader_sentiment["compound"],
-            "pos": vader_sentiment["pos"],
-            "neu": vader_sentiment["neu"],
-            "neg": vader_sentiment["neg"]
-        }
+    def _analyze_sentiment(self, text: str, timings: Optional[dict] = None) -> dict:
+        # Only the fields the backend declares; see sentiment_score() for fallbacks
+        return self.sentiment_backend.analyze(text, timings)
 
     def _classify_emotions(self, text: str) -> dict:
-        inputs = self.emotion_tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-        with torch.no_grad():
-            outputs = self.emotion_model(**inputs)
-        
-        scores = torch.nn.functional.softmax(outputs.logits, dim=1)
-        emotions = {self.emotion_model.config.id2label[i]: score.item() for i, score in enumerate(scores[0])}
-        return emotions
+        return self._classify_emotions_batch([text], 32)[0]
+
+    def _classify_emotions_batch(self, texts: List[str], batch_size: int) -> List[dict]:
+        scheduler = self.emotion_scheduler
+        if self.long_text_aggregation is None:
+            if scheduler is not None:
+                return scheduler.classify(texts)
+            return self.emotion_backend.classify(texts, batch_size)
+        if scheduler is not None:
+            return scheduler.classify_long(texts, aggregation=self.long_text_aggregation, stride=self.window_stride)
+        return self.emotion_backend.classify_long(
+            texts, batch_size, aggregation=self.long_text_aggregation, stride=self.window_stride
+        )
 
     def _extract_key_phrases(self, doc) -> list:
+        # noun_chunks needs the dependency parse; pipelines without a parser have no chunks
+        if doc is None or not doc.has_annotation("DEP"):
+            return []
         return [chunk.text for chunk in doc.noun_chunks]
 
     def _extract_entities(self, doc) -> list:
+        if doc is None:
+            return []
         return [{"text": ent.text, "label": ent.label_} for ent in doc.ents]
 
     def _score_moral_dimensions(self, doc, sentiment: dict, emotions: dict) -> dict:
@@ -95,7 +341,7 @@ class ConversationAnalyzer:
         moral_scores[MoralDimension.HARM_CARE] = max(-10, min(10, harm_care_score))
         
         # Fairness/Reciprocity
-        fairness_score = (sentiment["polarity"] + 1) * 5  # Scale from -1:1 to 0:10
+        fairness_score = (sentiment_score(sentiment, "polarity") + 1) * 5  # Scale from -1:1 to 0:10
         moral_scores[MoralDimension.FAIRNESS_RECIPROCITY] = fairness_score
         
         # Loyalty/Ingroup
@@ -112,6 +358,62 @@ class ConversationAnalyzer:
         
         return moral_scores
 
+_shared_analyzer: Optional[ConversationAnalyzer] = None
+_shared_analyzer_lock = threading.Lock()
+
+def get_conversation_analyzer() -> ConversationAnalyzer:
+    # One analyzer (and therefore one copy of the spaCy and emotion models) per process
+    global _shared_analyzer
+    if _shared_analyzer is None:
+        with _shared_analyzer_lock:
+            if _shared_analyzer is None:
+                _shared_analyzer = ConversationAnalyzer(cache=AnalysisCache())
+    return _shared_analyzer
+
+def measure_spacy_profiles(texts: List[str], profiles: Optional[List[str]] = None, batch_size: int = 32) -> List[dict]:
+    # Load time and per-doc latency of each profile on the same texts, so a
+    # deployment can pick the cheapest one whose extractions it needs
+    import spacy
+    logger = get_logger(__name__)
+    texts = list(texts)
+    results = []
+    for profile in profiles or list(SPACY_PROFILES):
+        exclude = SPACY_PROFILES[profile]["exclude"]
+        if exclude is None:
+            results.append({"profile": profile, "components": [], "load_ms": 0.0, "per_doc_ms": 0.0, "docs_per_sec": float("inf")})
+            continue
+        start = time.perf_counter()
+        nlp = spacy.load(SPACY_MODEL_NAME, exclude=exclude)
+        load_ms = (time.perf_counter() - start) * 1000
+        list(nlp.pipe(texts[:batch_size], batch_size=batch_size))  # warm up
+        start = time.perf_counter()
+        list(nlp.pipe(texts, batch_size=batch_size))
+        elapsed = time.perf_counter() - start
+        results.append({
+            "profile": profile,
+            "components": nlp.pipe_names,
+            "load_ms": load_ms,
+            "per_doc_ms": elapsed * 1000 / len(texts) if texts else 0.0,
+            "docs_per_sec": len(texts) / elapsed if elapsed else float("inf"),
+        })
+        logger.info("spaCy profile measured", **results[-1])
+    return results
+
 def analyze_conversation(text: str) -> dict:
-    analyzer = ConversationAnalyzer()
-    return analyzer.analyze_input(text)
+    return get_conversation_analyzer().analyze_input(text)
+
+def analysis_to_dict(analysis_result: dict) -> dict:
+    # JSON-friendly view of an analysis result; enums are keyed by name
+    decision = analysis_result["decision"]
+    return {
+        "text": analysis_result["text"],
+        "sentiment": analysis_result["sentiment"],
+        "emotions": analysis_result["emotions"],
+        "key_phrases": analysis_result["key_phrases"],
+        "entities": analysis_result["entities"],
+        "moral_scores": {dimension.name: score for dimension, score in analysis_result["moral_scores"].items()},
+        "goodness": decision.goodness,
+        "philosophical_evaluation": {
+            philosophy.name: score for philosophy, score in analysis_result["philosophical_evaluation"].items()
+        },
+    }
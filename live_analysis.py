@@ -0,0 +1,108 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from analysis_cache import AnalysisCache
+from logger import get_logger
+from metrics import span
+import metrics
+
+# A sentence ends at terminal punctuation (plus any closing quotes or
+# brackets) followed by whitespace, or at a line break
+_SENTENCE_END = re.compile(r"(?:(?<=[.!?…])|(?<=[.!?…][\"')\]]))\s+|\n+")
+
+def split_sentences(text: str) -> List[str]:
+    # Deliberately not spaCy's sentencizer: splitting runs on every pause in
+    # typing and must cost far less than the analysis it saves
+    return [sentence.strip() for sentence in _SENTENCE_END.split(text) if sentence and sentence.strip()]
+
+class IncrementalAnalyzer:
+    def __init__(self, analyzer, max_sentences: int = 2048):
+        # Sentiment and emotions are cached per sentence; the document-level
+        # scores are recombined from the cache on every call, so an edit only
+        # re-runs the models on the sentences it touched
+        self.analyzer = analyzer
+        self.max_sentences = max_sentences
+        self._sentences: "OrderedDict[str, Tuple[dict, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.logger = get_logger(__name__, log_level="DEBUG")
+
+    def analyze(self, text: str) -> dict:
+        timings = {} if metrics.is_enabled() else None
+        with span("live.analyze", timings):
+            sentences = split_sentences(text)
+            version = self.analyzer.cache_version
+            keys = [AnalysisCache.make_key(sentence, version) for sentence in sentences]
+
+            with self._lock:
+                cached = [self._sentences.get(key) for key in keys]
+            # An edited sentence hashes differently; repeated sentences are analyzed once
+            pending: Dict[str, str] = {}
+            for key, sentence, entry in zip(keys, sentences, cached):
+                if entry is None:
+                    pending.setdefault(key, sentence)
+
+            if pending:
+                pending_texts = list(pending.values())
+                with span("live.sentiment", timings):
+                    sentiments = self.analyzer.sentiment_backend.analyze_batch(pending_texts)
+                with span("live.emotion", timings):
+                    emotions = self.analyzer._classify_emotions_batch(pending_texts, len(pending_texts))
+                fresh = dict(zip(pending, zip(sentiments, emotions)))
+                with self._lock:
+                    for key, entry in fresh.items():
+                        self._remember(key, entry)
+                cached = [entry if entry is not None else fresh[key] for key, entry in zip(keys, cached)]
+
+            with self._lock:
+                self.hits += len(sentences) - len(pending)
+                self.misses += len(pending)
+                for key in keys:
+                    if key in self._sentences:
+                        self._sentences.move_to_end(key)
+
+            with span("live.combine", timings):
+                weights = [len(sentence) for sentence in sentences]
+                sentiment = self._combine([entry[0] for entry in cached], weights)
+                emotions = self._combine([entry[1] for entry in cached], weights)
+                # No parse in live mode: key phrases and entities wait for a full analysis
+                analysis_result = self.analyzer._build_result(text, None, sentiment, emotions)
+
+        analysis_result["sentences"] = len(sentences)
+        analysis_result["reanalyzed_sentences"] = len(pending)
+        self.logger.debug("Live analysis updated", sentences=len(sentences), reanalyzed=len(pending), **(timings or {}))
+        return analysis_result
+
+    @staticmethod
+    def _combine(scores: List[dict], weights: List[int]) -> dict:
+        # Length-weighted mean, so a long sentence counts for more than an interjection
+        total = sum(weights)
+        if not total:
+            return {}
+        combined: Dict[str, float] = {}
+        for score, weight in zip(scores, weights):
+            for field, value in score.items():
+                combined[field] = combined.get(field, 0.0) + value * weight
+        return {field: value / total for field, value in combined.items()}
+
+    def _remember(self, key: str, entry: Tuple[dict, dict]):
+        self._sentences[key] = entry
+        self._sentences.move_to_end(key)
+        while len(self._sentences) > self.max_sentences:
+            self._sentences.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._sentences.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "sentences": len(self._sentences),
+                "max_sentences": self.max_sentences,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
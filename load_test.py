@@ -0,0 +1,153 @@
+import argparse
+import http.client
+import json
+import os
+import shlex
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from itertools import count
+from typing import List, Optional
+from urllib.parse import urlparse
+
+from sample_texts import SAMPLE_SENTENCES
+
+def _text(index: int) -> str:
+    # Distinct texts of varying length, so no request is a cache hit
+    sentences = [SAMPLE_SENTENCES[(index + offset) % len(SAMPLE_SENTENCES)] for offset in range(1 + index % 3)]
+    return f"{' '.join(sentences)} (case {index})"
+
+def run_load(url: str, concurrency: int = 16, total_requests: int = 400, endpoint: str = "/analyze", timeout: float = 60.0) -> dict:
+    # `concurrency` clients, each on its own keep-alive connection, send
+    # requests back to back until `total_requests` have been sent
+    target = urlparse(url)
+    tickets = count()
+    latencies: List[float] = []
+    statuses: dict = {}
+    lock = threading.Lock()
+
+    def client():
+        connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=timeout)
+        while True:
+            index = next(tickets)
+            if index >= total_requests:
+                break
+            body = json.dumps({"text": _text(index)})
+            start = time.perf_counter()
+            try:
+                connection.request("POST", endpoint, body, {"Content-Type": "application/json"})
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=timeout)
+                status = "error"
+            elapsed = time.perf_counter() - start
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == 200:
+                    latencies.append(elapsed)
+        connection.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    def percentile(q: float) -> float:
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+
+    return {
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "ok": statuses.get(200, 0),
+        "rejected": statuses.get(503, 0),
+        "errors": total_requests - statuses.get(200, 0) - statuses.get(503, 0),
+        "elapsed_seconds": elapsed,
+        "requests_per_sec": statuses.get(200, 0) / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+    }
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 600.0):
+    target = urlparse(url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode} before becoming ready")
+        try:
+            connection = http.client.HTTPConnection(target.hostname, target.port, timeout=2)
+            connection.request("GET", "/readyz")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise TimeoutError("Server did not become ready in time")
+
+def spawn_and_measure(max_batch_size: int, server_args: List[str], concurrency: int, total_requests: int, endpoint: str) -> dict:
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    command = [
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py"), "--port", str(port), "--no-cache",
+        "--max-batch-size", str(max_batch_size), "--log-level", "WARNING", *server_args,
+    ]
+    process = subprocess.Popen(command)
+    try:
+        _wait_ready(url, process)
+        run_load(url, concurrency, min(total_requests, concurrency * 2), endpoint)  # warm up
+        result = run_load(url, concurrency, total_requests, endpoint)
+    finally:
+        process.terminate()
+        process.wait()
+    return {"max_batch_size": max_batch_size, **result}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the analysis server, optionally batched against unbatched.")
+    parser.add_argument("--url", default=None, help="Test a running server instead of spawning one")
+    parser.add_argument("--endpoint", choices=["/analyze", "/respond"], default="/analyze")
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("-n", "--requests", type=int, default=400)
+    parser.add_argument("--max-batch-size", type=int, default=32, help="Batch size of the spawned batched server")
+    parser.add_argument("--server-args", default="", help="Extra arguments for spawned servers, e.g. \"--emotion-backend onnx\"")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        results = [run_load(args.url, args.concurrency, args.requests, args.endpoint)]
+    else:
+        # Same load against an unbatched and a batched server
+        server_args = shlex.split(args.server_args)
+        results = [
+            spawn_and_measure(size, server_args, args.concurrency, args.requests, args.endpoint)
+            for size in (1, args.max_batch_size)
+        ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'batch':>5} {'ok':>6} {'503':>5} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for result in results:
+        print(f"{result.get('max_batch_size', '-'):>5} {result['ok']:>6} {result['rejected']:>5} {result['errors']:>5} "
+              f"{result['requests_per_sec']:>8.1f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f}")
+    if len(results) == 2 and results[0]["requests_per_sec"]:
+        print(f"Micro-batching speedup: {results[1]['requests_per_sec'] / results[0]['requests_per_sec']:.2f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,168 @@
+import atexit
+import itertools
+import json
 import logging
+import os
+import queue
 import sys
-from typing import Optional, Any, Dict
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, Any, Callable, Dict, TextIO
 
 import structlog
-from structlog.types import Processor, WrappedLogger
+from structlog.types import EventDict, Processor, WrappedLogger
+
+# Global logging state: configured once (implicitly by the first get_logger,
+# or explicitly by an entry point via configure_logging) and shared by every
+# CustomLogger. Rendering and I/O happen on the listener thread.
+_config_lock = threading.Lock()
+_configured = False
+_threshold = logging.INFO
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_handlers: list = []
+
+class Lazy:
+    # Wraps an expensive field value; it is computed only if the event is emitted
+    __slots__ = ("fn",)
+
+    def __init__(self, fn: Callable[[], Any]):
+        self.fn = fn
+
+def lazy(fn: Callable[[], Any]) -> Lazy:
+    return Lazy(fn)
+
+def _resolve_lazy(logger: WrappedLogger, method_name: str, event_dict: EventDict) -> EventDict:
+    for key, value in event_dict.items():
+        if isinstance(value, Lazy):
+            event_dict[key] = value.fn()
+    return event_dict
+
+class _PassThroughQueueHandler(QueueHandler):
+    # The stock prepare() formats the record on the calling thread, which
+    # would stringify structlog's event dict; the queue never leaves this
+    # process, so hand the record over as-is and let the listener render it
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+def _level_value(level) -> int:
+    if isinstance(level, int):
+        return level
+    return getattr(logging, str(level).upper(), logging.INFO)
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+def _build_renderer(json_format: bool, colors: bool) -> Processor:
+    if json_format:
+        # Compact separators and str() for anything json can't encode
+        return structlog.processors.JSONRenderer(serializer=json.dumps, separators=(",", ":"), default=str)
+    return structlog.dev.ConsoleRenderer(colors=colors, exception_formatter=structlog.dev.plain_traceback)
+
+def _configure_structlog():
+    # Cheap per-event work stays on the calling thread; the renderer runs in
+    # the ProcessorFormatter on the listener thread
+    shared_processors: list[Processor] = [
+        structlog.stdlib.add_log_level,
+        structlog.stdlib.add_logger_name,
+        structlog.processors.TimeStamper(fmt="iso"),
+        structlog.contextvars.merge_contextvars,
+        _resolve_lazy,
+        structlog.processors.StackInfoRenderer(),
+        structlog.processors.format_exc_info,
+        structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+    ]
+    structlog.configure(
+        processors=shared_processors,
+        context_class=dict,
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+
+def configure_logging(
+    log_level: Optional[str] = None,
+    json_format: Optional[bool] = None,
+    log_file: Optional[str] = None,
+    stream: Optional[TextIO] = None,
+):
+    # Entry points call this once at startup; calling it again swaps the
+    # output handlers and level without touching existing loggers.
+    # Defaults come from VIRTUAL_COMPASS_LOG_LEVEL / VIRTUAL_COMPASS_LOG_JSON.
+    global _configured, _threshold
+    log_level = log_level or os.environ.get("VIRTUAL_COMPASS_LOG_LEVEL", "INFO")
+    json_format = _env_flag("VIRTUAL_COMPASS_LOG_JSON") if json_format is None else json_format
+    stream = stream or sys.stdout
+
+    with _config_lock:
+        if not _configured:
+            _configure_structlog()
+            atexit.register(shutdown_logging)
+
+        level = _level_value(log_level)
+        colors = not json_format and hasattr(stream, "isatty") and stream.isatty()
+        formatter = structlog.stdlib.ProcessorFormatter(
+            processors=[
+                structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+                _build_renderer(json_format, colors),
+            ],
+            # Records from plain stdlib loggers (transformers, urllib3, ...)
+            foreign_pre_chain=[
+                structlog.stdlib.add_log_level,
+                structlog.stdlib.add_logger_name,
+                structlog.processors.TimeStamper(fmt="iso"),
+            ],
+        )
+        handlers: list[logging.Handler] = [logging.StreamHandler(stream)]
+        if log_file:
+            handlers.append(logging.FileHandler(log_file))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        _start_listener(handlers)
+        _threshold = level
+        _configured = True
+
+def _start_listener(handlers: list):
+    # Unbounded SimpleQueue: put() never blocks the logging thread
+    global _listener, _queue_handler, _handlers
+    root = logging.getLogger()
+    if _listener is not None:
+        _listener.stop()
+    if _queue_handler is not None:
+        root.removeHandler(_queue_handler)
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = _PassThroughQueueHandler(log_queue)
+    root.addHandler(_queue_handler)
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=False)
+    _listener.start()
+    _handlers = handlers
+
+def _restart_after_fork():
+    # The listener thread does not survive fork(); give worker processes
+    # their own queue and listener over the inherited handlers
+    global _config_lock, _listener
+    _config_lock = threading.Lock()
+    if _listener is not None:
+        _listener = None
+        _start_listener(_handlers)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+def shutdown_logging():
+    # Drain the queue and stop the listener thread; registered with atexit
+    global _listener
+    with _config_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+def _ensure_configured(log_file: Optional[str], json_format: bool):
+    if not _configured:
+        configure_logging(json_format=json_format or None, log_file=log_file)
 
 class CustomLogger:
     def __init__(
@@ -18,74 +177,58 @@ class CustomLogger:
         self.log_file = log_file
         self.json_format = json_format
 
-        self._configure_structlog()
+        _ensure_configured(log_file, json_format)
         self.logger = self._get_logger()
+        self._sample_counters: Dict[str, itertools.count] = {}
 
     @staticmethod
     def _get_log_level(level: str) -> int:
         return getattr(logging, level.upper(), logging.INFO)
 
-    def _configure_structlog(self):
-        shared_processors: list[Processor] = [
-            structlog.stdlib.add_log_level,
-            structlog.stdlib.add_logger_name,
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.contextvars.merge_contextvars,
-            structlog.processors.StackInfoRenderer(),
-            structlog.processors.format_exc_info,
-        ]
-
-        if self.json_format:
-            shared_processors.append(structlog.processors.JSONRenderer())
-        else:
-            shared_processors.append(
-                structlog.dev.ConsoleRenderer(colors=True, exception_formatter=structlog.dev.plain_traceback)
-            )
-
-        structlog.configure(
-            processors=shared_processors,
-            context_class=dict,
-            logger_factory=structlog.stdlib.LoggerFactory(),
-            wrapper_class=structlog.stdlib.BoundLogger,
-            cache_logger_on_first_use=True,
-        )
-
     def _get_logger(self) -> WrappedLogger:
-        logger = structlog.get_logger(self.name)
-        logger = logger.bind(logger_name=self.name)
-
-        # Configure handlers
-        handlers = [logging.StreamHandler(sys.stdout)]
-        if self.log_file:
-            handlers.append(logging.FileHandler(self.log_file))
-
-        logging.basicConfig(
-            format="%(message)s",
-            level=self.log_level,
-            handlers=handlers,
-        )
+        # add_logger_name already tags every event with the logger name
+        return structlog.get_logger(self.name)
 
-        return logger
+    def is_enabled_for(self, level) -> bool:
+        # Guard for events whose fields are expensive to build
+        level = _level_value(level)
+        return level >= _threshold and level >= self.log_level
 
     def log(self, level: str, event: str, **kwargs: Any):
-        log_method = getattr(self.logger, level.lower(), self.logger.info)
-        log_method(event, **kwargs)
+        if self.is_enabled_for(level):
+            log_method = getattr(self.logger, level.lower(), self.logger.info)
+            log_method(event, **kwargs)
 
     def debug(self, event: str, **kwargs: Any):
-        self.logger.debug(event, **kwargs)
+        if logging.DEBUG >= _threshold and logging.DEBUG >= self.log_level:
+            self.logger.debug(event, **kwargs)
 
     def info(self, event: str, **kwargs: Any):
-        self.logger.info(event, **kwargs)
+        if logging.INFO >= _threshold and logging.INFO >= self.log_level:
+            self.logger.info(event, **kwargs)
 
     def warning(self, event: str, **kwargs: Any):
-        self.logger.warning(event, **kwargs)
+        if logging.WARNING >= _threshold and logging.WARNING >= self.log_level:
+            self.logger.warning(event, **kwargs)
 
     def error(self, event: str, **kwargs: Any):
-        self.logger.error(event, **kwargs)
+        if logging.ERROR >= _threshold and logging.ERROR >= self.log_level:
+            self.logger.error(event, **kwargs)
 
     def critical(self, event: str, **kwargs: Any):
         self.logger.critical(event, **kwargs)
 
+    def sampled(self, level: str, event: str, every: int, **kwargs: Any):
+        # Emits the 1st, (every+1)th, ... occurrence of a high-volume event,
+        # tagged with how many occurrences the emitted one stands for
+        if not self.is_enabled_for(level):
+            return
+        counter = self._sample_counters.get(event)
+        if counter is None:
+            counter = self._sample_counters.setdefault(event, itertools.count())
+        if next(counter) % every == 0:
+            getattr(self.logger, level.lower(), self.logger.info)(event, sample_every=every, **kwargs)
+
 def get_logger(
     name: str,
     log_level: str = "INFO",
@@ -95,4 +238,4 @@ def get_logger(
     return CustomLogger(name, log_level, log_file, json_format)
 
 # Make sure to export the get_logger function
-__all__ = ['get_logger']
+__all__ = ['get_logger', 'configure_logging', 'shutdown_logging', 'lazy']
@@ -1,15 +1,41 @@
+import argparse
 import sys
 from PyQt5.QtWidgets import QApplication
-from gui import GUI
-from logger import get_logger
+from logger import configure_logging, get_logger
+from startup_profile import timed, format_startup_report
+import metrics
 
 logger = get_logger(__name__, log_level="DEBUG")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ye Olde Decision Analysis Toole")
+    parser.add_argument("--no-prewarm", action="store_true", help="Load models on first analysis instead of in the background")
+    parser.add_argument("--startup-report", action="store_true", help="Print per-component import/load times on exit")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve per-stage latency metrics at http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-file", default=None, help="Periodically write per-stage latency metrics to this file")
+    parser.add_argument("--log-level", default=None, help="Log level (default: VIRTUAL_COMPASS_LOG_LEVEL or INFO)")
+    parser.add_argument("--log-json", action="store_true", help="Write logs as one JSON object per line")
+    parser.add_argument("--log-file", default=None, help="Also write logs to this file")
+    args, qt_args = parser.parse_known_args()
+
+    configure_logging(log_level=args.log_level, json_format=args.log_json or None, log_file=args.log_file)
+
+    if args.metrics_port is not None:
+        metrics.start_http_exporter(args.metrics_port)
+    if args.metrics_file:
+        metrics.start_file_dump(args.metrics_file)
+
     logger.debug("Application starting")
-    app = QApplication(sys.argv)
-    window = GUI()
-    window.show()
+    with timed("qt", "init"):
+        app = QApplication(sys.argv[:1] + qt_args)
+    with timed("gui", "import"):
+        from gui import GUI
+    with timed("gui", "init"):
+        window = GUI(prewarm=not args.no_prewarm)
+        window.show()
     logger.debug("GUI window shown")
-    sys.exit(app.exec_())
+    exit_code = app.exec_()
+    if args.startup_report:
+        print(format_startup_report(), file=sys.stderr)
     logger.debug("Application exiting")
+    sys.exit(exit_code)
@@ -0,0 +1,196 @@
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+# Stage timing is off unless enabled here or with VIRTUAL_COMPASS_METRICS=1;
+# while disabled, span() hands back one shared no-op context manager
+_enabled = os.environ.get("VIRTUAL_COMPASS_METRICS", "") == "1"
+
+METRIC_NAME = "virtual_compass_stage_duration_seconds"
+QUANTILES = (0.5, 0.95, 0.99)
+
+def _default_buckets() -> List[float]:
+    # Log-spaced upper bounds from 50 microseconds to ~100 seconds
+    buckets, bound = [], 0.00005
+    while bound < 100:
+        buckets.append(round(bound, 6))
+        bound *= 1.5
+    return buckets
+
+class Histogram:
+    def __init__(self, buckets: Optional[List[float]] = None):
+        self.buckets = buckets or _default_buckets()
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        # Linear interpolation inside the bucket holding the q-th observation
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+class MetricsRegistry:
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram())
+        histogram.observe(seconds)
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            histograms = dict(self._histograms)
+        return {
+            stage: {
+                "count": histogram.count,
+                "sum_seconds": histogram.sum,
+                **{f"p{int(q * 100)}_ms": histogram.quantile(q) * 1000 for q in QUANTILES},
+            }
+            for stage, histogram in sorted(histograms.items())
+        }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        lines = [
+            f"# HELP {METRIC_NAME} Time spent in each analysis stage.",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        for stage, histogram in histograms:
+            with histogram._lock:
+                counts, count, total = list(histogram.counts), histogram.count, histogram.sum
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {count}')
+
+        lines.append(f"# HELP {METRIC_NAME}_quantile Estimated latency quantiles per analysis stage.")
+        lines.append(f"# TYPE {METRIC_NAME}_quantile gauge")
+        for stage, histogram in histograms:
+            for q in QUANTILES:
+                lines.append(f'{METRIC_NAME}_quantile{{stage="{stage}",quantile="{q}"}} {histogram.quantile(q)}')
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+class _Span:
+    __slots__ = ("stage", "timings", "start")
+
+    def __init__(self, stage: str, timings: Optional[Dict[str, float]]):
+        self.stage = stage
+        self.timings = timings
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        registry.observe(self.stage, elapsed)
+        if self.timings is not None:
+            self.timings[f"{self.stage}_ms"] = round(elapsed * 1000, 3)
+        return False
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def span(stage: str, timings: Optional[Dict[str, float]] = None):
+    # Times the enclosed block into the stage histogram, and into `timings`
+    # (as "<stage>_ms") so callers can attach it to their log event
+    if not _enabled:
+        return _NOOP_SPAN
+    return _Span(stage, timings)
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled() -> bool:
+    return _enabled
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_http_exporter(port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    # Serves GET /metrics in Prometheus text format from a daemon thread
+    enable()
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    return server
+
+def start_file_dump(path: str, interval: float = 15.0) -> threading.Event:
+    # Rewrites `path` with the Prometheus text every `interval` seconds (e.g.
+    # for node_exporter's textfile collector); set the returned event to stop
+    enable()
+    stop = threading.Event()
+
+    def dump():
+        while not stop.wait(interval):
+            write_prometheus_file(path)
+        write_prometheus_file(path)
+
+    threading.Thread(target=dump, name="metrics-dump", daemon=True).start()
+    return stop
+
+def write_prometheus_file(path: str):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        handle.write(registry.render_prometheus())
+    os.replace(temp_path, path)
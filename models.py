@@ -1,5 +1,10 @@
+from array import array
+from collections import deque
 from enum import Enum
-from typing import Dict, List
+from types import MappingProxyType
+from typing import Deque, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
 
 class MoralDimension(Enum):
     HARM_CARE = "Harm/Care"
@@ -15,35 +20,68 @@ class Philosophy(Enum):
     VIRTUE_ETHICS = "Cultivate moral character and virtues"
     CARE_ETHICS = "Emphasize compassion, responsibility, and relationships"
 
+# Fixed dimension order backing every score array
+DIMENSIONS = tuple(MoralDimension)
+DIMENSION_INDEX = {dimension: index for index, dimension in enumerate(DIMENSIONS)}
+_UNSET = float("nan")  # marks a dimension the decision has no score for
+
 class Decision:
+    __slots__ = ("name", "description", "_scores", "goodness", "_philosophical_scores")
+
     def __init__(self, name: str, description: str, moral_scores: Dict[MoralDimension, float]):
         self.name = name
         self.description = description
-        self.moral_scores = self._validate_scores(moral_scores)
+        self._scores = self._validate_scores(moral_scores)
         self.goodness = self._calculate_goodness()
-        self.philosophical_scores: Dict[Philosophy, float] = {}
+        self._philosophical_scores: Optional[Dict[Philosophy, float]] = None
 
-    def _validate_scores(self, scores: Dict[MoralDimension, float]) -> Dict[MoralDimension, float]:
-        validated_scores = {}
+    @classmethod
+    def _view(cls, name: str, description: str, scores, goodness: float) -> "Decision":
+        # Wrap an already validated score row (e.g. a DecisionBatch row) without copying it
+        decision = cls.__new__(cls)
+        decision.name = name
+        decision.description = description
+        decision._scores = scores
+        decision.goodness = goodness
+        decision._philosophical_scores = None
+        return decision
+
+    def _validate_scores(self, scores: Dict[MoralDimension, float]) -> array:
+        validated_scores = array("d", [_UNSET] * len(DIMENSIONS))
         for dimension, score in scores.items():
             if not isinstance(dimension, MoralDimension):
                 raise ValueError(f"Invalid moral dimension: {dimension}")
-            validated_scores[dimension] = max(-10, min(10, score))  # Ensure score is between -10 and 10
+            validated_scores[DIMENSION_INDEX[dimension]] = max(-10, min(10, score))  # Ensure score is between -10 and 10
         return validated_scores
 
     def _calculate_goodness(self) -> float:
-        if not self.moral_scores:
+        present = [score for score in self._scores if score == score]
+        if not present:
             return 0
-        total_score = sum(self.moral_scores.values())
-        max_possible_score = 10 * len(self.moral_scores)
+        total_score = sum(present)
+        max_possible_score = 10 * len(present)
         goodness = total_score / max_possible_score
         return max(-1, min(1, goodness))  # Ensure goodness is between -1 and 1
 
+    @property
+    def moral_scores(self) -> Mapping[MoralDimension, float]:
+        # A read-only snapshot: scores live in _scores, so writes through this
+        # mapping could never take effect and raise TypeError instead
+        return MappingProxyType({dimension: float(score) for dimension, score in zip(DIMENSIONS, self._scores) if score == score})
+
+    @property
+    def philosophical_scores(self) -> Dict[Philosophy, float]:
+        if self._philosophical_scores is None:
+            self._philosophical_scores = {}
+        return self._philosophical_scores
+
     def set_philosophical_scores(self, scores: Dict[Philosophy, float]):
-        self.philosophical_scores = scores
+        self._philosophical_scores = scores
 
     def get_philosophical_score(self, philosophy: Philosophy) -> float:
-        return self.philosophical_scores.get(philosophy, 0)
+        if self._philosophical_scores is None:
+            return 0
+        return self._philosophical_scores.get(philosophy, 0)
 
     def __str__(self) -> str:
         return f"Decision: {self.name} (Goodness: {self.goodness:.2f})"
@@ -52,38 +90,194 @@ class Decision:
         return f"Decision(name='{self.name}', description='{self.description}', moral_scores={self.moral_scores})"
 
     def get_dimension_score(self, dimension: MoralDimension) -> float:
-        return self.moral_scores.get(dimension, 0)
+        score = self._scores[DIMENSION_INDEX[dimension]]
+        return 0 if score != score else score
+
+    def dimension_scores(self) -> List[float]:
+        # Scores in DIMENSIONS order, missing dimensions as 0
+        return [0.0 if score != score else float(score) for score in self._scores]
+
+class DecisionBatch:
+    # Struct-of-arrays storage for many decisions: one row per decision in
+    # `scores` (DIMENSIONS order, NaN for a missing dimension)
+    def __init__(self, names: Sequence[str], scores, descriptions: Optional[Sequence[str]] = None):
+        self.scores = np.clip(np.array(scores, dtype=np.float64).reshape(-1, len(DIMENSIONS)), -10, 10)
+        self.names = np.array(names, dtype=object).reshape(-1)
+        if descriptions is None:
+            descriptions = [""] * len(self.names)
+        self.descriptions = np.array(descriptions, dtype=object).reshape(-1)
+        if not len(self.names) == len(self.descriptions) == len(self.scores):
+            raise ValueError("names, descriptions and scores must have the same length")
+        self.goodness = self._calculate_goodness()
+
+    @classmethod
+    def from_decisions(cls, decisions: Sequence[Decision]) -> "DecisionBatch":
+        scores = np.array([list(decision._scores) for decision in decisions], dtype=np.float64)
+        return cls([d.name for d in decisions], scores, [d.description for d in decisions])
+
+    @classmethod
+    def from_score_dicts(cls, names: Sequence[str], moral_scores: Sequence[Dict[MoralDimension, float]], descriptions: Optional[Sequence[str]] = None) -> "DecisionBatch":
+        scores = np.full((len(moral_scores), len(DIMENSIONS)), _UNSET)
+        for row, dimension_scores in enumerate(moral_scores):
+            for dimension, score in dimension_scores.items():
+                if not isinstance(dimension, MoralDimension):
+                    raise ValueError(f"Invalid moral dimension: {dimension}")
+                scores[row, DIMENSION_INDEX[dimension]] = score
+        return cls(names, scores, descriptions)
+
+    def _calculate_goodness(self) -> np.ndarray:
+        present = ~np.isnan(self.scores)
+        counts = present.sum(axis=1)
+        totals = np.where(present, self.scores, 0.0).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            goodness = np.where(counts > 0, totals / (10 * counts), 0.0)
+        return np.clip(goodness, -1, 1)  # Ensure goodness is between -1 and 1
+
+    def filled_scores(self) -> np.ndarray:
+        return np.nan_to_num(self.scores, nan=0.0)
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            # The Decision shares this batch's score row rather than copying it
+            return Decision._view(self.names[index], self.descriptions[index], self.scores[index], float(self.goodness[index]))
+        return DecisionBatch(self.names[index], self.scores[index], self.descriptions[index])
+
+    def __iter__(self) -> Iterator[Decision]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self) -> str:
+        return f"DecisionBatch(size={len(self)})"
+
+class RunningStatistic:
+    # Constant-time aggregates over a stream of values: count/sum/mean and
+    # Welford variance over everything seen, a mean over the last `window`
+    # values, and an exponentially decayed mean
+    __slots__ = ("count", "total", "mean", "_m2", "_window", "window_total", "_since_resum", "decay", "decayed_mean")
+
+    def __init__(self, window: int = 50, decay: float = 0.1):
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        if not 0 < decay <= 1:
+            raise ValueError("decay must be in (0, 1]")
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._window: Deque[float] = deque(maxlen=window)
+        self.window_total = 0.0
+        self._since_resum = 0
+        self.decay = decay
+        self.decayed_mean = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+        if len(self._window) == self._window.maxlen:
+            self.window_total -= self._window[0]
+        self._window.append(value)
+        self.window_total += value
+        # Re-sum once per window length so add/subtract rounding can't drift
+        self._since_resum += 1
+        if self._since_resum >= self._window.maxlen:
+            self.window_total = sum(self._window)
+            self._since_resum = 0
+
+        if self.count == 1:
+            self.decayed_mean = value
+        else:
+            self.decayed_mean += self.decay * (value - self.decayed_mean)
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def window_mean(self) -> float:
+        return self.window_total / len(self._window) if self._window else 0.0
 
 class ConversationContext:
-    def __init__(self):
-        self.history: List[str] = []
-        self.sentiment_trend: List[float] = []
-        self.emotion_trend: Dict[str, List[float]] = {}
-        self.moral_dimension_trend: Dict[MoralDimension, List[float]] = {dim: [] for dim in MoralDimension}
+    def __init__(self, max_history: int = 1000, window: int = 50, decay: float = 0.1):
+        # History is a ring buffer of the most recent max_history messages;
+        # the running statistics cover every message ever added
+        self.max_history = max_history
+        self.window = window
+        self.decay = decay
+        self.message_count = 0
+        self.history: Deque[str] = deque(maxlen=max_history)
+        self.sentiment_trend: Deque[float] = deque(maxlen=max_history)
+        self.emotion_trend: Dict[str, Deque[float]] = {}
+        self.moral_dimension_trend: Dict[MoralDimension, Deque[float]] = {dim: deque(maxlen=max_history) for dim in MoralDimension}
+        self.sentiment_stats = RunningStatistic(window, decay)
+        self.emotion_stats: Dict[str, RunningStatistic] = {}
+        self.moral_dimension_stats: Dict[MoralDimension, RunningStatistic] = {dim: RunningStatistic(window, decay) for dim in MoralDimension}
 
     def add_message(self, message: str, sentiment: float, emotions: Dict[str, float], moral_scores: Dict[MoralDimension, float]):
+        self.message_count += 1
         self.history.append(message)
         self.sentiment_trend.append(sentiment)
+        self.sentiment_stats.add(sentiment)
         
         for emotion, score in emotions.items():
             if emotion not in self.emotion_trend:
-                self.emotion_trend[emotion] = []
+                self.emotion_trend[emotion] = deque(maxlen=self.max_history)
+                self.emotion_stats[emotion] = RunningStatistic(self.window, self.decay)
             self.emotion_trend[emotion].append(score)
+            self.emotion_stats[emotion].add(score)
         
         for dimension, score in moral_scores.items():
             self.moral_dimension_trend[dimension].append(score)
+            self.moral_dimension_stats[dimension].add(score)
 
     def get_context_summary(self) -> Dict:
         return {
-            "message_count": len(self.history),
-            "average_sentiment": sum(self.sentiment_trend) / len(self.sentiment_trend) if self.sentiment_trend else 0,
-            "dominant_emotion": max(self.emotion_trend, key=lambda k: sum(self.emotion_trend[k])) if self.emotion_trend else None,
-            "moral_dimension_averages": {dim: sum(scores) / len(scores) if scores else 0 for dim, scores in self.moral_dimension_trend.items()}
+            "message_count": self.message_count,
+            "average_sentiment": self.sentiment_stats.mean,
+            "sentiment_variance": self.sentiment_stats.variance,
+            "dominant_emotion": max(self.emotion_stats, key=lambda k: self.emotion_stats[k].total) if self.emotion_stats else None,
+            "emotion_averages": {emotion: stats.mean for emotion, stats in self.emotion_stats.items()},
+            "emotion_variances": {emotion: stats.variance for emotion, stats in self.emotion_stats.items()},
+            "moral_dimension_averages": {dim: stats.mean for dim, stats in self.moral_dimension_stats.items()},
+            "moral_dimension_variances": {dim: stats.variance for dim, stats in self.moral_dimension_stats.items()},
+        }
+
+    def get_window_trend(self) -> Dict:
+        # Means over each series' last `window` values
+        return self._trend(lambda stats: stats.window_mean)
+
+    def get_decayed_trend(self) -> Dict:
+        # Exponentially decayed means; recent messages weigh the most
+        return self._trend(lambda stats: stats.decayed_mean)
+
+    def _trend(self, value_of) -> Dict:
+        return {
+            "sentiment": value_of(self.sentiment_stats),
+            "emotions": {emotion: value_of(stats) for emotion, stats in self.emotion_stats.items()},
+            "moral_dimensions": {dim: value_of(stats) for dim, stats in self.moral_dimension_stats.items()},
         }
 
 class PhilosophicalCompendium:
+    # Each philosophy scores base * (1 + rule . moral_scores / normalizer), with
+    # rules expressed as coefficient rows over MoralDimension (in enum order).
+    # Keeping the coefficients integral and dividing once reproduces the
+    # original per-philosophy formulas bit for bit.
+    RULES: Dict[Philosophy, Tuple[Dict[MoralDimension, float], float]] = {
+        Philosophy.GOLDEN_RULE: ({MoralDimension.FAIRNESS_RECIPROCITY: 1}, 10),
+        Philosophy.UTILITARIANISM: ({MoralDimension.HARM_CARE: 1}, 10),
+        Philosophy.KANTIAN_ETHICS: ({MoralDimension.AUTHORITY_RESPECT: 1}, 10),
+        Philosophy.VIRTUE_ETHICS: ({MoralDimension.PURITY_SANCTITY: 1}, 10),
+        Philosophy.CARE_ETHICS: ({MoralDimension.HARM_CARE: 1, MoralDimension.LOYALTY_INGROUP: 1}, 20),
+    }
+
     def __init__(self):
-        self.philosophies: Dict[Philosophy, float] = {
+        self.philosophies = {
             Philosophy.GOLDEN_RULE: 0.8,
             Philosophy.UTILITARIANISM: 0.7,
             Philosophy.KANTIAN_ETHICS: 0.75,
@@ -91,41 +285,44 @@ class PhilosophicalCompendium:
             Philosophy.CARE_ETHICS: 0.85
         }
 
+    @property
+    def philosophies(self) -> Mapping[Philosophy, float]:
+        # Read-only: the evaluation matrices are derived from these weights,
+        # so changes go through the setter, which rebuilds them
+        return MappingProxyType(self._philosophies)
+
+    @philosophies.setter
+    def philosophies(self, weights: Mapping[Philosophy, float]):
+        self._philosophies: Dict[Philosophy, float] = dict(weights)
+        self._build_matrices()
+
+    def _build_matrices(self):
+        # Column order of every evaluate_many result
+        self.philosophy_order: List[Philosophy] = list(self.philosophies)
+        self.base_scores = np.array([self.philosophies[p] for p in self.philosophy_order], dtype=np.float64)
+        # (dimensions x philosophies), so scores (N x dimensions) @ matrix is (N x philosophies)
+        self.rule_matrix = np.array(
+            [[self.RULES[p][0].get(dimension, 0) for p in self.philosophy_order] for dimension in MoralDimension],
+            dtype=np.float64,
+        )
+        self.normalizers = np.array([self.RULES[p][1] for p in self.philosophy_order], dtype=np.float64)
+
     def get_philosophy_score(self, philosophy: Philosophy) -> float:
         return self.philosophies.get(philosophy, 0.0)
 
     def evaluate_decision(self, decision: Decision) -> Dict[Philosophy, float]:
-        evaluation = {}
-        for philosophy, base_score in self.philosophies.items():
-            if philosophy == Philosophy.GOLDEN_RULE:
-                evaluation[philosophy] = self._evaluate_golden_rule(decision, base_score)
-            elif philosophy == Philosophy.UTILITARIANISM:
-                evaluation[philosophy] = self._evaluate_utilitarianism(decision, base_score)
-            elif philosophy == Philosophy.KANTIAN_ETHICS:
-                evaluation[philosophy] = self._evaluate_kantian_ethics(decision, base_score)
-            elif philosophy == Philosophy.VIRTUE_ETHICS:
-                evaluation[philosophy] = self._evaluate_virtue_ethics(decision, base_score)
-            elif philosophy == Philosophy.CARE_ETHICS:
-                evaluation[philosophy] = self._evaluate_care_ethics(decision, base_score)
-        return evaluation
-
-    def _evaluate_golden_rule(self, decision: Decision, base_score: float) -> float:
-        fairness_score = decision.get_dimension_score(MoralDimension.FAIRNESS_RECIPROCITY)
-        return base_score * (1 + fairness_score / 10)
-
-    def _evaluate_utilitarianism(self, decision: Decision, base_score: float) -> float:
-        harm_care_score = decision.get_dimension_score(MoralDimension.HARM_CARE)
-        return base_score * (1 + harm_care_score / 10)
-
-    def _evaluate_kantian_ethics(self, decision: Decision, base_score: float) -> float:
-        authority_score = decision.get_dimension_score(MoralDimension.AUTHORITY_RESPECT)
-        return base_score * (1 + authority_score / 10)
-
-    def _evaluate_virtue_ethics(self, decision: Decision, base_score: float) -> float:
-        purity_score = decision.get_dimension_score(MoralDimension.PURITY_SANCTITY)
-        return base_score * (1 + purity_score / 10)
-
-    def _evaluate_care_ethics(self, decision: Decision, base_score: float) -> float:
-        harm_care_score = decision.get_dimension_score(MoralDimension.HARM_CARE)
-        loyalty_score = decision.get_dimension_score(MoralDimension.LOYALTY_INGROUP)
-        return base_score * (1 + (harm_care_score + loyalty_score) / 20)
+        scores = np.array(decision.dimension_scores(), dtype=np.float64)
+        return dict(zip(self.philosophy_order, self.evaluate_scores(scores[None, :])[0].tolist()))
+
+    def evaluate_many(self, decisions: Union[Sequence[Decision], "DecisionBatch", np.ndarray]) -> np.ndarray:
+        # N decisions (or an N x len(MoralDimension) score matrix, missing
+        # dimensions as 0) to an N x len(philosophy_order) matrix
+        if isinstance(decisions, np.ndarray):
+            return self.evaluate_scores(decisions)
+        if isinstance(decisions, DecisionBatch):
+            return self.evaluate_scores(decisions.filled_scores())
+        scores = np.array([decision.dimension_scores() for decision in decisions], dtype=np.float64)
+        return self.evaluate_scores(scores.reshape(-1, len(MoralDimension)))
+
+    def evaluate_scores(self, scores: np.ndarray) -> np.ndarray:
+        return self.base_scores * (1 + (scores @ self.rule_matrix) / self.normalizers)
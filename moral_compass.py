@@ -1,72 +1,171 @@
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtCore import Qt, QPointF
-from PyQt5.QtGui import QPainter, QColor, QPen, QFont, QPolygonF
+from PyQt5.QtCore import Qt, QPointF, QLineF, QVariantAnimation, QEasingCurve
+from PyQt5.QtGui import QPainter, QColor, QPen, QFont, QPolygonF, QPixmap
 import math
-from models import Decision, MoralDimension
+from typing import List, Optional, Sequence
+from models import DIMENSIONS, Decision
 from logger import get_logger
 
 logger = get_logger(__name__, log_level="DEBUG")
 
-class MoralCompass(QWidget):
-    def __init__(self, decision: Decision):
+# Unit direction of each dimension's axis, in DIMENSIONS order
+AXIS_DIRECTIONS = [
+    (math.cos(i * 2 * math.pi / len(DIMENSIONS)), math.sin(i * 2 * math.pi / len(DIMENSIONS)))
+    for i in range(len(DIMENSIONS))
+]
+
+class CompassFace(QWidget):
+    # The static part of a compass (face and dimension labels), rendered once
+    # per size and device pixel ratio and blitted under each subclass's
+    # dynamic layer
+    def __init__(self):
         super().__init__()
-        self.decision = decision
         self.setMinimumSize(400, 400)
-        logger.debug("MoralCompass initialized", decision=decision)
-
-    def paintEvent(self, event):
-        painter = QPainter(self)
+        self._label_font = QFont('Arial', 10)
+        self._face: Optional[QPixmap] = None
+        self._face_key = None
+
+    def resizeEvent(self, event):
+        self._face = None
+        super().resizeEvent(event)
+
+    def cached_face(self) -> QPixmap:
+        ratio = self.devicePixelRatioF()
+        key = (self.width(), self.height(), ratio)
+        if self._face is None or self._face_key != key:
+            self._face = self._render_face(ratio)
+            self._face_key = key
+        return self._face
+
+    def _render_face(self, ratio: float) -> QPixmap:
+        pixmap = QPixmap(max(1, round(self.width() * ratio)), max(1, round(self.height() * ratio)))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
         painter.setRenderHint(QPainter.Antialiasing)
-
         self.draw_compass_face(painter)
-        self.draw_moral_dimensions(painter)
-        self.draw_decision_arrow(painter)
+        self.draw_dimension_labels(painter)
+        painter.end()
+        return pixmap
 
     def draw_compass_face(self, painter):
         painter.setPen(QPen(QColor(200, 200, 200), 2))
         painter.setBrush(QColor(240, 240, 240))
         painter.drawEllipse(10, 10, self.width() - 20, self.height() - 20)
 
-    def draw_moral_dimensions(self, painter):
+    def draw_dimension_labels(self, painter):
         center_x, center_y = self.width() / 2, self.height() / 2
         radius = min(center_x, center_y) - 20
-        num_dimensions = len(MoralDimension)
 
-        for i, dimension in enumerate(MoralDimension):
-            angle = i * 2 * math.pi / num_dimensions
-            score = self.decision.get_dimension_score(dimension)
-            normalized_score = (score + 10) / 20  # Normalize from -10:10 to 0:1
+        painter.setPen(QColor(0, 0, 0))
+        painter.setFont(self._label_font)
+        for dimension, (dx, dy) in zip(DIMENSIONS, AXIS_DIRECTIONS):
+            label_x = int(center_x + dx * (radius + 20))
+            label_y = int(center_y + dy * (radius + 20))
+            painter.drawText(label_x - 50, label_y, 100, 20, Qt.AlignCenter, dimension.value)
 
-            x = int(center_x + math.cos(angle) * radius * normalized_score)
-            y = int(center_y + math.sin(angle) * radius * normalized_score)
+class MoralCompass(CompassFace):
+    # Length of the transition between two decisions
+    ANIMATION_MS = 300
 
-            # Draw dimension line
-            painter.setPen(QPen(QColor(0, 100, 200), 2))
-            painter.drawLine(int(center_x), int(center_y), x, y)
+    def __init__(self, decision: Decision):
+        super().__init__()
+        # What is on screen: the decision's scores, or a blend while animating
+        self._shown_scores: List[float] = decision.dimension_scores()
+        self._shown_goodness: float = decision.goodness
+        self._from_scores = self._shown_scores
+        self._from_goodness = self._shown_goodness
+        self._decision = decision
+
+        # The animation only ticks while running; each tick repaints just the
+        # dynamic layer over the cached face
+        self._animation = QVariantAnimation(self)
+        self._animation.setStartValue(0.0)
+        self._animation.setEndValue(1.0)
+        self._animation.setDuration(self.ANIMATION_MS)
+        self._animation.setEasingCurve(QEasingCurve.OutCubic)
+        self._animation.valueChanged.connect(self._on_animation_step)
+        logger.debug("MoralCompass initialized", decision=decision)
 
-            # Draw dimension marker
-            painter.setPen(QPen(QColor(200, 50, 50), 4))
-            painter.drawPoint(x, y)
+    @property
+    def decision(self) -> Decision:
+        return self._decision
+
+    @decision.setter
+    def decision(self, decision: Decision):
+        # Plain assignment jumps straight to the new decision; see update_decision()
+        self._animation.stop()
+        self._decision = decision
+        self._shown_scores = decision.dimension_scores()
+        self._shown_goodness = decision.goodness
+
+    def update_decision(self, new_decision: Decision, animate: bool = True):
+        if not animate or not self.isVisible():
+            self.decision = new_decision
+            self.update()
+            return
+        # Start from whatever is shown, so a retarget mid-animation doesn't jump
+        self._animation.stop()
+        self._from_scores = list(self._shown_scores)
+        self._from_goodness = self._shown_goodness
+        self._decision = new_decision
+        self._animation.start()
+
+    def _on_animation_step(self, t: float):
+        target_scores = self._decision.dimension_scores()
+        self._shown_scores = [a + (b - a) * t for a, b in zip(self._from_scores, target_scores)]
+        self._shown_goodness = self._from_goodness + (self._decision.goodness - self._from_goodness) * t
+        self.update()
 
-            # Draw dimension label
-            painter.setPen(QColor(0, 0, 0))
-            painter.setFont(QFont('Arial', 10))
-            label_x = int(center_x + math.cos(angle) * (radius + 20))
-            label_y = int(center_y + math.sin(angle) * (radius + 20))
-            painter.drawText(label_x - 50, label_y, 100, 20, Qt.AlignCenter, dimension.value)
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.cached_face())
+        painter.setRenderHint(QPainter.Antialiasing)
+        self.draw_moral_dimensions(painter, self._shown_scores)
+        self.draw_decision_arrow(painter, self._shown_goodness)
+        painter.end()
+
+    def paint(self, painter):
+        # Every layer drawn straight onto `painter`, bypassing the pixmap
+        # cache; vector targets (SVG, PDF) stay vector this way
+        painter.setRenderHint(QPainter.Antialiasing)
+        self.draw_compass_face(painter)
+        self.draw_dimension_labels(painter)
+        self.draw_moral_dimensions(painter, self._shown_scores)
+        self.draw_decision_arrow(painter, self._shown_goodness)
+
+    def draw_moral_dimensions(self, painter, scores: Sequence[float]):
+        center = QPointF(self.width() / 2, self.height() / 2)
+        radius = min(center.x(), center.y()) - 20
 
-    def draw_decision_arrow(self, painter):
+        points = []
+        for score, (dx, dy) in zip(scores, AXIS_DIRECTIONS):
+            normalized_score = (score + 10) / 20  # Normalize from -10:10 to 0:1
+            points.append(QPointF(center.x() + dx * radius * normalized_score, center.y() + dy * radius * normalized_score))
+        outline = QPolygonF(points)
+
+        # Score polygon
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(0, 100, 200, 40))
+        painter.drawPolygon(outline)
+
+        # Dimension lines and markers, one call each
+        painter.setPen(QPen(QColor(0, 100, 200), 2))
+        painter.drawLines([QLineF(center, point) for point in points])
+        painter.setPen(QPen(QColor(200, 50, 50), 4))
+        painter.drawPoints(outline)
+
+    def draw_decision_arrow(self, painter, goodness: float):
         center_x, center_y = self.width() / 2, self.height() / 2
         radius = min(center_x, center_y) - 40
-        goodness = self.decision.goodness
         angle = math.pi * (1 - goodness) / 2
 
-        x = int(center_x + math.sin(angle) * radius)
-        y = int(center_y - math.cos(angle) * radius)
+        x = center_x + math.sin(angle) * radius
+        y = center_y - math.cos(angle) * radius
 
         # Draw arrow line
         painter.setPen(QPen(QColor(200, 50, 50), 3))
-        painter.drawLine(int(center_x), int(center_y), x, y)
+        painter.drawLine(QPointF(center_x, center_y), QPointF(x, y))
 
         # Draw arrowhead
         arrowhead_size = 15
@@ -79,7 +178,3 @@ class MoralCompass(QWidget):
         ])
         painter.setBrush(QColor(200, 50, 50))
         painter.drawPolygon(arrowhead)
-
-    def update_decision(self, new_decision: Decision):
-        self.decision = new_decision
-        self.update()
@@ -1,10 +1,124 @@
+import hashlib
 import random
+import time
+from bisect import bisect_left
+from typing import List, Optional, Sequence, Tuple
 from models import Decision, Philosophy, PhilosophicalCompendium, MoralDimension
 from logger import get_logger
-from input_analysis import ConversationAnalyzer
+from metrics import span
+import metrics
+from input_analysis import ConversationAnalyzer, get_conversation_analyzer
+from sentiment_backends import sentiment_score
+
+# Banded phrasing: a value above THRESHOLDS[i] (and not above THRESHOLDS[i + 1])
+# selects PHRASES[i + 1]; anything at or below THRESHOLDS[0] selects PHRASES[0].
+# bisect_left keeps the comparisons strict, as "value > threshold".
+VERDICT_THRESHOLDS = (-0.6, -0.2, 0.2, 0.6)
+VERDICTS = (
+    "most troubling, and mayhap best avoided",
+    "fraught with moral hazard, requiring utmost caution",
+    "a matter of great complexity, with virtue and vice intertwined",
+    "generally sound, though not without its perils",
+    "most virtuous and commendable",
+)
+
+SENTIMENT_THRESHOLDS = (-0.5, 0, 0.5)
+SENTIMENT_PHRASES = (
+    "towards the shadows of discontent",
+    "with a touch of melancholy",
+    "with a gentle warmth",
+    "most favorably",
+)
+
+STANDING_THRESHOLDS = (-0.5, 0, 0.5)
+STANDING_PHRASES = (
+    "indicates severe ethical issues that strongly suggest against this course of action.\n",
+    "raises serious ethical concerns and requires careful reconsideration.\n",
+    "indicates some positive ethical aspects, but there's significant room for improvement.\n",
+    "suggests it leans towards being ethically sound. However, we must carefully consider its implications.\n",
+)
+
+RECOMMENDATION_THRESHOLDS = (-0.3, 0.3)
+RECOMMENDATIONS = (
+    "The ethical analysis strongly suggests against this course of action. It's highly recommended to abandon this decision and seek alternatives that are more ethically sound and aligned with moral principles.",
+    "Given the significant ethical concerns, it's strongly advised to reconsider this decision. Explore alternative options that better align with ethical principles and address the issues raised in this analysis.",
+    "While the decision has some positive aspects, it's crucial to address the ethical concerns raised above before proceeding. Consider ways to mitigate potential negative impacts and enhance the positive outcomes.",
+)
+
+EMOTION_CONTEXT = {
+    **dict.fromkeys(
+        ["joy", "trust"],
+        "might indicate a positive disposition, but we must be cautious of overlooking potential ethical pitfalls due to optimism.\n",
+    ),
+    **dict.fromkeys(
+        ["anger", "disgust", "fear"],
+        "suggests underlying issues that need to be addressed. This emotional response could be indicative of ethical red flags.\n",
+    ),
+}
+DEFAULT_EMOTION_CONTEXT = "requires further exploration to understand its impact on the ethical implications of this decision.\n"
+
+DIMENSION_GUIDANCE = {
+    MoralDimension.HARM_CARE: "We must carefully evaluate the potential harm or benefit this decision may cause to all parties involved.\n",
+    MoralDimension.FAIRNESS_RECIPROCITY: "It's crucial to ensure that this decision promotes fairness and doesn't unfairly advantage or disadvantage any group.\n",
+    MoralDimension.LOYALTY_INGROUP: "While loyalty is important, we must be cautious of in-group favoritism that might lead to unethical treatment of others.\n",
+    MoralDimension.AUTHORITY_RESPECT: "Respect for authority should be balanced with critical thinking and ethical considerations.\n",
+    MoralDimension.PURITY_SANCTITY: "We should consider how this decision aligns with broader ethical principles and societal values.\n",
+}
+
+PHILOSOPHY_GUIDANCE = {
+    Philosophy.GOLDEN_RULE: "we should consider how we would feel if we were on the receiving end of this decision.\n",
+    Philosophy.UTILITARIANISM: "we must evaluate whether this decision truly maximizes overall well-being for all affected parties.\n",
+    Philosophy.KANTIAN_ETHICS: "we should reflect on whether we would will the principle behind this decision to become a universal law.\n",
+    Philosophy.VIRTUE_ETHICS: "we should consider how this decision reflects on our character and whether it aligns with virtuous traits.\n",
+    Philosophy.CARE_ETHICS: "we must carefully consider the impact on relationships and our responsibilities to others.\n",
+}
+
+SHAKESPEAREAN_TEMPLATE = (
+    "Hark! {word} The matter of '{name}' appears {verdict}. "
+    "'Tis a decision most {adjective}, worthy of our deepest contemplation. "
+    "The sentiment doth lean {sentiment}, "
+    "with emotions of {emotion} prevailing. "
+    "In the realm of morality, the dimension of {dimension} stands foremost. "
+    "{closing_word} let us ponder it well, for in our choices lie the seeds of our character."
+)
+
+ETHICAL_ANALYSIS_TEMPLATE = (
+    "Ethical Analysis of '{name}':\n\n"
+    "1. Overall Moral Standing:\n"
+    "The decision's goodness score is {goodness:.2f}, which {standing}"
+    "\n2. Emotional Context:\n"
+    "The prevailing emotion of {emotion} {emotion_context}"
+    "\n3. Moral Framework:\n"
+    "The primary moral consideration is {dimension}. {dimension_guidance}"
+    "\n4. Philosophical Perspectives:\n"
+    "{philosophy_lines}"
+    "\nFrom the perspective of {top_philosophy}, {philosophy_guidance}"
+    "\n5. Recommendation:\n"
+    "{recommendation}"
+)
+
+# Enum values resolved once; Enum.value is a descriptor lookup on every access
+DIMENSION_NAMES = {dimension: dimension.value for dimension in MoralDimension}
+PHILOSOPHY_NAMES = {philosophy: philosophy.value for philosophy in Philosophy}
+
+RESPONSE_TEMPLATE = "{shakespearean}\n\nUpon further reflection:\n{ethical_analysis}"
+
+def _text_draws(seed: int, text: str) -> Tuple[int, int, int]:
+    # Three independent 32-bit draws from a hash of (seed, text): stable
+    # across processes and runs, unlike hash(), which is salted per process,
+    # and far cheaper than seeding a random.Random per response
+    digest = hashlib.blake2b(f"{seed}\0{text}".encode("utf-8"), digest_size=12).digest()
+    return (
+        int.from_bytes(digest[0:4], "little"),
+        int.from_bytes(digest[4:8], "little"),
+        int.from_bytes(digest[8:12], "little"),
+    )
+
+def _banded(value: float, thresholds: Sequence[float], phrases: Sequence[str]) -> str:
+    return phrases[bisect_left(thresholds, value)]
 
 class ResponseGenerator:
-    def __init__(self):
+    def __init__(self, conversation_analyzer: Optional[ConversationAnalyzer] = None, seed: Optional[int] = None):
         self.compendium = PhilosophicalCompendium()
         self.shakespearean_words = [
             "forsooth", "verily", "prithee", "anon", "methinks", "perchance",
@@ -14,139 +128,162 @@ class ResponseGenerator:
             "virtuous", "noble", "righteous", "just", "honorable", "upright",
             "moral", "ethical", "principled", "scrupulous", "conscientious"
         ]
+        # Word choice for generate_response; pass a seed for repeatable output
+        self.random = random.Random(seed)
         self.logger = get_logger(__name__, log_level="DEBUG")
-        self.conversation_analyzer = ConversationAnalyzer()
+        self.conversation_analyzer = conversation_analyzer or get_conversation_analyzer()
 
-    def generate_response(self, text: str) -> str:
-        self.logger.debug("Generating response for input", text=text)
+    def generate_response(self, text: str, analysis_result: Optional[dict] = None) -> str:
+        self.logger.debug("Generating response for input", chars=len(text))
         
-        analysis_result = self.conversation_analyzer.analyze_input(text)
-        
-        decision = analysis_result['decision']
-        philosophical_scores = self.compendium.evaluate_decision(decision)
-        decision.set_philosophical_scores(philosophical_scores)
-
-        shakespearean_response = self._generate_shakespearean_response(decision, analysis_result)
-        ethical_analysis = self._generate_ethical_analysis(decision, analysis_result)
+        # Callers that already ran the analysis pass it in so the pipeline runs only once
+        if analysis_result is None:
+            analysis_result = self.conversation_analyzer.analyze_input(text)
         
-        combined_response = self._combine_responses(shakespearean_response, ethical_analysis)
-        self.logger.debug("Response generated", response=combined_response)
+        timings = {} if metrics.is_enabled() else None
+        with span("response", timings):
+            decision = analysis_result['decision']
+            philosophical_scores = analysis_result.get('philosophical_evaluation')
+            if philosophical_scores is None:
+                with span("response.philosophical_evaluation", timings):
+                    philosophical_scores = self.compendium.evaluate_decision(decision)
+            decision.set_philosophical_scores(philosophical_scores)
+            combined_response = self._render(decision, analysis_result, self._draw_words(self.random), timings)
+        self.logger.debug("Response generated", response=combined_response, **(timings or {}))
         return combined_response
 
-    def _generate_shakespearean_response(self, decision: Decision, analysis_result: dict) -> str:
-        sentiment = analysis_result['sentiment']
-        emotions = analysis_result['emotions']
-        moral_scores = analysis_result['moral_scores']
+    def generate_many(self, texts: Sequence[str], analysis_results: Optional[Sequence[dict]] = None, seed: int = 0) -> List[str]:
+        # Each response's words are drawn from a hash of `seed` and its text,
+        # so a text gets the same response whatever batch it lands in or
+        # wherever it sits in that batch
+        texts = list(texts)
+        if analysis_results is None:
+            analysis_results = self.conversation_analyzer.analyze_batch(texts)
+        analysis_results = list(analysis_results)
+        if len(analysis_results) != len(texts):
+            raise ValueError("texts and analysis_results must have the same length")
+        self.logger.debug("Generating responses", size=len(texts))
+
+        timings = {} if metrics.is_enabled() else None
+        with span("response.batch", timings):
+            # One matrix evaluation for every result that lacks its philosophical scores
+            missing = [result for result in analysis_results if result.get('philosophical_evaluation') is None]
+            if missing:
+                with span("response.philosophical_evaluation", timings):
+                    matrix = self.compendium.evaluate_many([result['decision'] for result in missing]).tolist()
+                order = self.compendium.philosophy_order
+                for result, row in zip(missing, matrix):
+                    result['decision'].set_philosophical_scores(dict(zip(order, row)))
+            for result in analysis_results:
+                if result.get('philosophical_evaluation') is not None:
+                    result['decision'].set_philosophical_scores(result['philosophical_evaluation'])
+
+            responses = [
+                self._render(result['decision'], result, self._words_for(seed, text))
+                for text, result in zip(texts, analysis_results)
+            ]
+        self.logger.debug("Responses generated", size=len(responses), **(timings or {}))
+        return responses
 
-        if decision.goodness > 0.6:
-            verdict = "most virtuous and commendable"
-        elif decision.goodness > 0.2:
-            verdict = "generally sound, though not without its perils"
-        elif decision.goodness > -0.2:
-            verdict = "a matter of great complexity, with virtue and vice intertwined"
-        elif decision.goodness > -0.6:
-            verdict = "fraught with moral hazard, requiring utmost caution"
-        else:
-            verdict = "most troubling, and mayhap best avoided"
+    def measure_throughput(self, texts: Sequence[str], analysis_results: Sequence[dict]) -> dict:
+        # Responses/sec for generate_response in a loop versus generate_many
+        texts, analysis_results = list(texts), list(analysis_results)
+        if not texts:
+            return {"responses": 0, "single_responses_per_sec": 0.0, "batch_responses_per_sec": 0.0, "speedup": 0.0}
 
+        start = time.perf_counter()
+        for text, result in zip(texts, analysis_results):
+            self.generate_response(text, result)
+        single_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self.generate_many(texts, analysis_results)
+        batch_elapsed = time.perf_counter() - start
+
+        single_rate = len(texts) / single_elapsed if single_elapsed else float("inf")
+        batch_rate = len(texts) / batch_elapsed if batch_elapsed else float("inf")
+        throughput = {
+            "responses": len(texts),
+            "single_responses_per_sec": single_rate,
+            "batch_responses_per_sec": batch_rate,
+            "speedup": batch_rate / single_rate if single_rate else 0.0,
+        }
+        self.logger.info("Response throughput measured", **throughput)
+        return throughput
+
+    def _draw_words(self, rng: random.Random) -> Tuple[str, str, str]:
+        # Opening word, adjective, closing word; always drawn in this order
+        return (
+            rng.choice(self.shakespearean_words),
+            rng.choice(self.ethical_adjectives),
+            rng.choice(self.shakespearean_words),
+        )
+
+    def _words_for(self, seed: int, text: str) -> Tuple[str, str, str]:
+        opening, adjective, closing = _text_draws(seed, text)
+        words, adjectives = self.shakespearean_words, self.ethical_adjectives
+        return words[opening % len(words)], adjectives[adjective % len(adjectives)], words[closing % len(words)]
+
+    def _render(self, decision: Decision, analysis_result: dict, words: Tuple[str, str, str], timings: Optional[dict] = None) -> str:
+        # The dominant emotion and dimension are looked up once and shared by both parts
+        emotions = analysis_result['emotions']
+        moral_scores = analysis_result['moral_scores']
         dominant_emotion = max(emotions, key=emotions.get)
         dominant_moral_dimension = max(moral_scores, key=moral_scores.get)
 
-        response = f"Hark! {self._random_word()} The matter of '{decision.name}' appears {verdict}. " \
-                   f"'Tis a decision most {self._random_adjective()}, worthy of our deepest contemplation. " \
-                   f"The sentiment doth lean {self._sentiment_to_shakespearean(sentiment['compound'])}, " \
-                   f"with emotions of {dominant_emotion} prevailing. " \
-                   f"In the realm of morality, the dimension of {dominant_moral_dimension.value} stands foremost. " \
-                   f"{self._random_word().capitalize()} let us ponder it well, for in our choices lie the seeds of our character."
-        
-        return response
-
-    def _generate_ethical_analysis(self, decision: Decision, analysis_result: dict) -> str:
-        dominant_emotion = max(analysis_result['emotions'], key=analysis_result['emotions'].get)
-        dominant_moral_dimension = max(analysis_result['moral_scores'], key=analysis_result['moral_scores'].get)
-        
-        analysis = f"Ethical Analysis of '{decision.name}':\n\n"
-        
-        # Overall Moral Standing
-        analysis += "1. Overall Moral Standing:\n"
-        analysis += f"The decision's goodness score is {decision.goodness:.2f}, which "
-        if decision.goodness > 0.5:
-            analysis += "suggests it leans towards being ethically sound. However, we must carefully consider its implications.\n"
-        elif decision.goodness > 0:
-            analysis += "indicates some positive ethical aspects, but there's significant room for improvement.\n"
-        elif decision.goodness > -0.5:
-            analysis += "raises serious ethical concerns and requires careful reconsideration.\n"
-        else:
-            analysis += "indicates severe ethical issues that strongly suggest against this course of action.\n"
-        
-        # Emotional Context
-        analysis += "\n2. Emotional Context:\n"
-        analysis += f"The prevailing emotion of {dominant_emotion} "
-        if dominant_emotion in ['joy', 'trust']:
-            analysis += "might indicate a positive disposition, but we must be cautious of overlooking potential ethical pitfalls due to optimism.\n"
-        elif dominant_emotion in ['anger', 'disgust', 'fear']:
-            analysis += "suggests underlying issues that need to be addressed. This emotional response could be indicative of ethical red flags.\n"
-        else:
-            analysis += "requires further exploration to understand its impact on the ethical implications of this decision.\n"
-        
-        # Moral Framework
-        analysis += f"\n3. Moral Framework:\n"
-        analysis += f"The primary moral consideration is {dominant_moral_dimension.value}. "
-        if dominant_moral_dimension == MoralDimension.HARM_CARE:
-            analysis += "We must carefully evaluate the potential harm or benefit this decision may cause to all parties involved.\n"
-        elif dominant_moral_dimension == MoralDimension.FAIRNESS_RECIPROCITY:
-            analysis += "It's crucial to ensure that this decision promotes fairness and doesn't unfairly advantage or disadvantage any group.\n"
-        elif dominant_moral_dimension == MoralDimension.LOYALTY_INGROUP:
-            analysis += "While loyalty is important, we must be cautious of in-group favoritism that might lead to unethical treatment of others.\n"
-        elif dominant_moral_dimension == MoralDimension.AUTHORITY_RESPECT:
-            analysis += "Respect for authority should be balanced with critical thinking and ethical considerations.\n"
-        elif dominant_moral_dimension == MoralDimension.PURITY_SANCTITY:
-            analysis += "We should consider how this decision aligns with broader ethical principles and societal values.\n"
-        
-        # Philosophical Perspectives
-        analysis += "\n4. Philosophical Perspectives:\n"
-        for philosophy, score in decision.philosophical_scores.items():
-            analysis += f"- {philosophy.value}: {score:.2f}\n"
-        top_philosophy = max(decision.philosophical_scores, key=decision.philosophical_scores.get)
-        analysis += f"\nFrom the perspective of {top_philosophy.value}, "
-        if top_philosophy == Philosophy.GOLDEN_RULE:
-            analysis += "we should consider how we would feel if we were on the receiving end of this decision.\n"
-        elif top_philosophy == Philosophy.UTILITARIANISM:
-            analysis += "we must evaluate whether this decision truly maximizes overall well-being for all affected parties.\n"
-        elif top_philosophy == Philosophy.KANTIAN_ETHICS:
-            analysis += "we should reflect on whether we would will the principle behind this decision to become a universal law.\n"
-        elif top_philosophy == Philosophy.VIRTUE_ETHICS:
-            analysis += "we should consider how this decision reflects on our character and whether it aligns with virtuous traits.\n"
-        elif top_philosophy == Philosophy.CARE_ETHICS:
-            analysis += "we must carefully consider the impact on relationships and our responsibilities to others.\n"
-        
-        # Recommendation
-        analysis += "\n5. Recommendation:\n"
-        if decision.goodness > 0.3:
-            analysis += "While the decision has some positive aspects, it's crucial to address the ethical concerns raised above before proceeding. Consider ways to mitigate potential negative impacts and enhance the positive outcomes."
-        elif decision.goodness > -0.3:
-            analysis += "Given the significant ethical concerns, it's strongly advised to reconsider this decision. Explore alternative options that better align with ethical principles and address the issues raised in this analysis."
-        else:
-            analysis += "The ethical analysis strongly suggests against this course of action. It's highly recommended to abandon this decision and seek alternatives that are more ethically sound and aligned with moral principles."
-        
-        return analysis
+        if timings is None:
+            # Bulk path: no per-response spans
+            return self._combine_responses(
+                self._generate_shakespearean_response(decision, analysis_result, dominant_emotion, dominant_moral_dimension, words),
+                self._generate_ethical_analysis(decision, dominant_emotion, dominant_moral_dimension),
+            )
+        with span("response.shakespearean", timings):
+            shakespearean_response = self._generate_shakespearean_response(
+                decision, analysis_result, dominant_emotion, dominant_moral_dimension, words
+            )
+        with span("response.ethical_analysis", timings):
+            ethical_analysis = self._generate_ethical_analysis(decision, dominant_emotion, dominant_moral_dimension)
+        return self._combine_responses(shakespearean_response, ethical_analysis)
 
-    def _combine_responses(self, shakespearean_response: str, ethical_analysis: str) -> str:
-        combined = f"{shakespearean_response}\n\nUpon further reflection:\n{ethical_analysis}"
-        return combined
+    def _generate_shakespearean_response(
+        self,
+        decision: Decision,
+        analysis_result: dict,
+        dominant_emotion: str,
+        dominant_moral_dimension: MoralDimension,
+        words: Tuple[str, str, str],
+    ) -> str:
+        word, adjective, closing_word = words
+        return SHAKESPEAREAN_TEMPLATE.format(
+            word=word,
+            name=decision.name,
+            verdict=_banded(decision.goodness, VERDICT_THRESHOLDS, VERDICTS),
+            adjective=adjective,
+            sentiment=self._sentiment_to_shakespearean(sentiment_score(analysis_result['sentiment'], 'compound')),
+            emotion=dominant_emotion,
+            dimension=DIMENSION_NAMES[dominant_moral_dimension],
+            closing_word=closing_word.capitalize(),
+        )
 
-    def _random_word(self) -> str:
-        return random.choice(self.shakespearean_words)
+    def _generate_ethical_analysis(self, decision: Decision, dominant_emotion: str, dominant_moral_dimension: MoralDimension) -> str:
+        philosophical_scores = decision.philosophical_scores
+        top_philosophy = max(philosophical_scores, key=philosophical_scores.get)
+        return ETHICAL_ANALYSIS_TEMPLATE.format(
+            name=decision.name,
+            goodness=decision.goodness,
+            standing=_banded(decision.goodness, STANDING_THRESHOLDS, STANDING_PHRASES),
+            emotion=dominant_emotion,
+            emotion_context=EMOTION_CONTEXT.get(dominant_emotion, DEFAULT_EMOTION_CONTEXT),
+            dimension=DIMENSION_NAMES[dominant_moral_dimension],
+            dimension_guidance=DIMENSION_GUIDANCE.get(dominant_moral_dimension, ""),
+            philosophy_lines="".join([f"- {PHILOSOPHY_NAMES[philosophy]}: {score:.2f}\n" for philosophy, score in philosophical_scores.items()]),
+            top_philosophy=PHILOSOPHY_NAMES[top_philosophy],
+            philosophy_guidance=PHILOSOPHY_GUIDANCE.get(top_philosophy, ""),
+            recommendation=_banded(decision.goodness, RECOMMENDATION_THRESHOLDS, RECOMMENDATIONS),
+        )
 
-    def _random_adjective(self) -> str:
-        return random.choice(self.ethical_adjectives)
+    def _combine_responses(self, shakespearean_response: str, ethical_analysis: str) -> str:
+        return RESPONSE_TEMPLATE.format(shakespearean=shakespearean_response, ethical_analysis=ethical_analysis)
 
     def _sentiment_to_shakespearean(self, sentiment_score: float) -> str:
-        if sentiment_score > 0.5:
-            return "most favorably"
-        elif sentiment_score > 0:
-            return "with a gentle warmth"
-        elif sentiment_score > -0.5:
-            return "with a touch of melancholy"
-        else:
-            return "towards the shadows of discontent"
+        return _banded(sentiment_score, SENTIMENT_THRESHOLDS, SENTIMENT_PHRASES)
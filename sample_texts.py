@@ -0,0 +1,10 @@
+# Shared fixed corpus for benchmark.py and load_test.py, so the offline
+# benchmark and the HTTP load test measure the same kind of input
+SAMPLE_SENTENCES = [
+    "I found a wallet full of cash on the train and nobody saw me pick it up.",
+    "My manager asked me to keep quiet about a safety problem that could hurt customers.",
+    "We could split the inheritance equally or give more to the sibling who cared for our parents.",
+    "I am thrilled that the whole team finally agreed on a fair plan.",
+    "Lying to my friend would spare her feelings today but might destroy her trust later.",
+    "The factory will close and hundreds of families in our town will lose their income.",
+]
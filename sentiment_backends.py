@@ -0,0 +1,113 @@
+import abc
+import threading
+from typing import Dict, FrozenSet, List, Optional, Sequence
+
+from metrics import span
+from startup_profile import timed
+
+# polarity (TextBlob) and compound (VADER) are both in -1..1, so each stands
+# in for the other when a backend doesn't provide it
+FALLBACK_FIELDS = {"polarity": "compound", "compound": "polarity"}
+
+def sentiment_score(sentiment: dict, field: str, default: float = 0.0) -> float:
+    if field in sentiment:
+        return sentiment[field]
+    return sentiment.get(FALLBACK_FIELDS.get(field, field), default)
+
+class SentimentBackend(abc.ABC):
+    name = "base"
+    # Result fields this backend fills in; anything else is absent
+    fields: FrozenSet[str] = frozenset()
+
+    def __init__(self):
+        self._load_lock = threading.Lock()
+        self._loaded = False
+
+    def load(self):
+        # Import and build the underlying analyzer on first use
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self._load()
+                    self._loaded = True
+
+    def _load(self):
+        pass
+
+    @abc.abstractmethod
+    def analyze(self, text: str, timings: Optional[dict] = None) -> Dict[str, float]:
+        ...
+
+    def analyze_batch(self, texts: Sequence[str]) -> List[Dict[str, float]]:
+        return [self.analyze(text) for text in texts]
+
+class TextBlobSentimentBackend(SentimentBackend):
+    name = "textblob"
+    fields = frozenset({"polarity", "subjectivity"})
+
+    def _load(self):
+        with timed("textblob", "import"):
+            from textblob import TextBlob
+        self._text_blob = TextBlob
+
+    def analyze(self, text: str, timings: Optional[dict] = None) -> Dict[str, float]:
+        self.load()
+        # TextBlob computes sentiment lazily, so read it inside the span
+        with span("sentiment.textblob", timings):
+            blob_sentiment = self._text_blob(text).sentiment
+        return {"polarity": blob_sentiment.polarity, "subjectivity": blob_sentiment.subjectivity}
+
+class VaderSentimentBackend(SentimentBackend):
+    name = "vader"
+    fields = frozenset({"compound", "pos", "neu", "neg"})
+
+    def _load(self):
+        with timed("vader", "import"):
+            from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+        with timed("vader", "load"):
+            self._analyzer = SentimentIntensityAnalyzer()
+
+    def analyze(self, text: str, timings: Optional[dict] = None) -> Dict[str, float]:
+        self.load()
+        with span("sentiment.vader", timings):
+            vader_sentiment = self._analyzer.polarity_scores(text)
+        return {
+            "compound": vader_sentiment["compound"],
+            "pos": vader_sentiment["pos"],
+            "neu": vader_sentiment["neu"],
+            "neg": vader_sentiment["neg"],
+        }
+
+class CombinedSentimentBackend(SentimentBackend):
+    # Both analyzers; the original behaviour
+    name = "combined"
+    fields = TextBlobSentimentBackend.fields | VaderSentimentBackend.fields
+
+    def __init__(self):
+        super().__init__()
+        self.text_blob = TextBlobSentimentBackend()
+        self.vader = VaderSentimentBackend()
+
+    def _load(self):
+        self.text_blob.load()
+        self.vader.load()
+
+    def analyze(self, text: str, timings: Optional[dict] = None) -> Dict[str, float]:
+        return {**self.text_blob.analyze(text, timings), **self.vader.analyze(text, timings)}
+
+SENTIMENT_BACKENDS = {
+    CombinedSentimentBackend.name: CombinedSentimentBackend,
+    TextBlobSentimentBackend.name: TextBlobSentimentBackend,
+    VaderSentimentBackend.name: VaderSentimentBackend,
+}
+
+# "fast" pays for one analyzer: VADER's compound drives the display and the
+# response text, and fairness scoring falls back to it for polarity
+SENTIMENT_ALIASES = {"fast": VaderSentimentBackend.name}
+
+def create_sentiment_backend(name: str = "combined") -> SentimentBackend:
+    name = SENTIMENT_ALIASES.get(name, name)
+    if name not in SENTIMENT_BACKENDS:
+        choices = ", ".join([*SENTIMENT_BACKENDS, *SENTIMENT_ALIASES])
+        raise ValueError(f"Unknown sentiment backend: {name} (expected one of {choices})")
+    return SENTIMENT_BACKENDS[name]()
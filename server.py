@@ -0,0 +1,358 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import metrics
+from logger import configure_logging, get_logger
+
+MAX_BODY_BYTES = 1 << 20
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+class QueueFullError(Exception):
+    pass
+
+class RequestTooLargeError(Exception):
+    pass
+
+class _Item:
+    __slots__ = ("text", "respond", "future", "enqueued")
+
+    def __init__(self, text: str, respond: bool, future: asyncio.Future):
+        self.text = text
+        self.respond = respond
+        self.future = future
+        self.enqueued = time.perf_counter()
+
+class MicroBatcher:
+    # Collects texts from concurrent requests and analyzes them together: a
+    # batch is cut once it holds max_batch_size texts or its first text has
+    # waited max_wait seconds. Batches run one at a time on a single worker
+    # thread, so the event loop keeps accepting (and rejecting) requests.
+    def __init__(self, analyzer, response_generator, max_batch_size: int = 32, max_wait: float = 0.01, max_queue: int = 256):
+        self.analyzer = analyzer
+        self.response_generator = response_generator
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis")
+        self.logger = get_logger(__name__, log_level="DEBUG")
+        self._worker: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.texts = 0
+        self.rejected = 0
+
+    def start(self):
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown(wait=True)
+
+    def submit(self, texts: List[str], respond: bool) -> List[asyncio.Future]:
+        # All or nothing: a request is never half queued. One that could
+        # never fit, even into an empty queue, isn't worth retrying.
+        if len(texts) > self.queue.maxsize:
+            self.rejected += 1
+            raise RequestTooLargeError()
+        if self.queue.maxsize - self.queue.qsize() < len(texts):
+            self.rejected += 1
+            raise QueueFullError()
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self.queue.put_nowait(_Item(text, respond, future))
+            futures.append(future)
+        return futures
+
+    async def _collect(self) -> List[_Item]:
+        batch = [await self.queue.get()]
+        deadline = batch[0].enqueued + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without yielding first
+            while len(batch) < self.max_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            remaining = deadline - time.perf_counter()
+            if len(batch) >= self.max_batch_size or remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Requests whose clients went away don't need analyzing
+            batch = [item for item in batch if not item.future.done()]
+            if not batch:
+                continue
+            try:
+                outputs = await loop.run_in_executor(self.executor, self._process, batch)
+            except Exception as exc:
+                # One bad text mustn't fail its neighbours: retry one by one
+                # and fail only the items that raise on their own
+                self.logger.error("Batch analysis failed; retrying items singly", size=len(batch), error=str(exc))
+                outputs = await loop.run_in_executor(self.executor, self._process_singly, batch)
+            for item, output in zip(batch, outputs):
+                if item.future.done():
+                    continue
+                if isinstance(output, Exception):
+                    item.future.set_exception(output)
+                else:
+                    item.future.set_result(output)
+
+    def _process(self, batch: List[_Item]) -> List[dict]:
+        from input_analysis import analysis_to_dict
+
+        with metrics.span("server.batch"):
+            results = self.analyzer.analyze_batch([item.text for item in batch], batch_size=len(batch))
+            outputs = [analysis_to_dict(result) for result in results]
+            wanted = [index for index, item in enumerate(batch) if item.respond]
+            if wanted:
+                responses = self.response_generator.generate_many([batch[i].text for i in wanted], [results[i] for i in wanted])
+                for index, response in zip(wanted, responses):
+                    outputs[index]["response"] = response
+        self.batches += 1
+        self.texts += len(batch)
+        self.logger.debug("Batch served", size=len(batch), queued=self.queue.qsize())
+        return outputs
+
+    def _process_singly(self, batch: List[_Item]) -> List[object]:
+        outputs: List[object] = []
+        for item in batch:
+            try:
+                outputs.append(self._process([item])[0])
+            except Exception as exc:
+                self.logger.warning("Analysis failed", chars=len(item.text), error=str(exc))
+                outputs.append(exc)
+        return outputs
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "max_queue": self.queue.maxsize,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "texts": self.texts,
+            "average_batch_size": self.texts / self.batches if self.batches else 0.0,
+            "rejected_requests": self.rejected,
+        }
+
+class AnalysisServer:
+    def __init__(self, analyzer, max_batch_size: int = 32, max_wait: float = 0.01, max_queue: int = 256, request_timeout: float = 30.0):
+        from response_generator import ResponseGenerator
+
+        self.analyzer = analyzer
+        self.response_generator = ResponseGenerator(analyzer)
+        self.batcher_options = (max_batch_size, max_wait, max_queue)
+        self.request_timeout = request_timeout
+        self.batcher: Optional[MicroBatcher] = None
+        self.ready = False
+        self._prewarm_task: Optional[asyncio.Task] = None
+        self.logger = get_logger(__name__, log_level="DEBUG")
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        self.batcher = MicroBatcher(self.analyzer, self.response_generator, *self.batcher_options)
+        self.batcher.start()
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        # Accept connections (and answer /healthz) while the models load;
+        # /readyz reports 503 until they have
+        self._prewarm_task = asyncio.get_running_loop().create_task(self._prewarm())
+        self.logger.info("Analysis server listening", host=host, port=port)
+        return server
+
+    async def _prewarm(self):
+        start = time.perf_counter()
+        try:
+            await asyncio.get_running_loop().run_in_executor(self.batcher.executor, self.analyzer.prewarm)
+        except Exception as exc:
+            # Stay unready; /readyz keeps answering 503
+            self.logger.error("Loading analysis models failed", error=str(exc))
+            return
+        self.ready = True
+        self.logger.info("Analysis server ready", load_ms=round((time.perf_counter() - start) * 1000, 1))
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                if isinstance(body, int):
+                    status, payload = body, {"error": _REASONS[body]}
+                else:
+                    status, payload = await self._route(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], object]]:
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return "GET", "", {"connection": "close"}, 400
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", "0") or 0)
+        except ValueError:
+            headers["connection"] = "close"
+            return method, target, headers, 400
+        if length > MAX_BODY_BYTES:
+            # The body is left unread, so this connection can't be reused
+            headers["connection"] = "close"
+            return method, target, headers, 413
+        body = await reader.readexactly(length) if length else b""
+        return method, target.split("?", 1)[0], headers, body
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, dict]:
+        if path == "/healthz":
+            return 200, {"status": "ok"}
+        if path == "/readyz":
+            return (200 if self.ready else 503), {"ready": self.ready, **self.batcher.stats()}
+        if path == "/metrics":
+            return 200, metrics.registry.snapshot()
+        if path not in ("/analyze", "/respond"):
+            return 404, {"error": f"Unknown endpoint {path}"}
+        if method != "POST":
+            return 405, {"error": "Use POST"}
+
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError as exc:
+            return 400, {"error": f"Invalid JSON: {exc}"}
+        # {"text": "..."} for one result, {"texts": [...]} for a list of them
+        texts = payload.get("texts") if isinstance(payload, dict) else None
+        single = texts is None
+        if single:
+            texts = [payload.get("text")] if isinstance(payload, dict) else [None]
+        # A bare string is iterable too; only a non-empty list of strings fans out
+        if not isinstance(texts, list) or not texts or not all(isinstance(text, str) for text in texts):
+            return 400, {"error": "Expected a JSON object with 'text' (string) or 'texts' (non-empty list of strings)"}
+
+        try:
+            futures = self.batcher.submit(texts, respond=path == "/respond")
+        except RequestTooLargeError:
+            return 413, {"error": f"Too many texts in one request: {len(texts)} (at most {self.batcher.queue.maxsize})"}
+        except QueueFullError:
+            return 503, {"error": "Analysis queue is full; retry later"}
+        try:
+            results = await asyncio.wait_for(asyncio.gather(*futures), self.request_timeout)
+        except asyncio.TimeoutError:
+            return 503, {"error": "Timed out waiting for analysis"}
+        except Exception as exc:
+            return 500, {"error": str(exc)}
+        return 200, results[0] if single else {"results": results}
+
+    async def _write_response(self, writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool):
+        body = json.dumps(payload).encode("utf-8")
+        headers = [
+            f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == 503:
+            headers.append("Retry-After: 1")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+async def serve(analyzer, host: str, port: int, **options):
+    app = AnalysisServer(analyzer, **options)
+    server = await app.start(host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await app.batcher.stop()
+
+def build_parser() -> argparse.ArgumentParser:
+    # Choices come from the registries, so new backends and profiles show up here
+    from emotion_backends import BACKENDS as EMOTION_BACKENDS
+    from input_analysis import SPACY_PROFILES
+    from sentiment_backends import SENTIMENT_ALIASES, SENTIMENT_BACKENDS
+
+    parser = argparse.ArgumentParser(description="Serve text analysis over local HTTP/JSON with cross-request micro-batching.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch-size", type=int, default=32, help="Texts per analysis batch (1 disables batching)")
+    parser.add_argument("--max-wait-ms", type=float, default=10.0, help="Longest a text waits for its batch to fill")
+    parser.add_argument("--max-queue", type=int, default=256, help="Queued texts before requests get 503")
+    parser.add_argument("--request-timeout", type=float, default=30.0)
+    parser.add_argument("--cache-db", default=None, help="SQLite file for a persistent analysis cache")
+    parser.add_argument("--no-cache", action="store_true", help="Analyze every request, even repeated texts")
+    parser.add_argument("--emotion-backend", choices=list(EMOTION_BACKENDS), default="torch")
+    parser.add_argument("--emotion-model-dir", default=None, help="Local emotion model directory (default: hub model)")
+    parser.add_argument("--spacy-profile", choices=list(SPACY_PROFILES), default="full")
+    parser.add_argument("--sentiment-backend", choices=[*SENTIMENT_BACKENDS, *SENTIMENT_ALIASES], default="combined")
+    parser.add_argument("--log-level", default="INFO")
+    parser.add_argument("--log-json", action="store_true")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    configure_logging(log_level=args.log_level, json_format=args.log_json or None, stream=sys.stderr)
+    metrics.enable()
+
+    from analysis_cache import AnalysisCache
+    from input_analysis import EMOTION_MODEL_NAME, ConversationAnalyzer
+
+    analyzer = ConversationAnalyzer(
+        cache=None if args.no_cache else AnalysisCache(db_path=args.cache_db),
+        emotion_backend=args.emotion_backend,
+        emotion_model_dir=args.emotion_model_dir or EMOTION_MODEL_NAME,
+        spacy_profile=args.spacy_profile,
+        sentiment_backend=args.sentiment_backend,
+    )
+    try:
+        asyncio.run(serve(
+            analyzer,
+            args.host,
+            args.port,
+            max_batch_size=args.max_batch_size,
+            max_wait=args.max_wait_ms / 1000,
+            max_queue=args.max_queue,
+            request_timeout=args.request_timeout,
+        ))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+# component -> phase ("import", "load", ...) -> seconds
+_timings: Dict[str, Dict[str, float]] = {}
+_timings_lock = threading.Lock()
+_process_start = time.perf_counter()
+
+def record(component: str, phase: str, seconds: float):
+    with _timings_lock:
+        phases = _timings.setdefault(component, {})
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+@contextmanager
+def timed(component: str, phase: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(component, phase, time.perf_counter() - start)
+
+def get_startup_report() -> Dict:
+    with _timings_lock:
+        components = {component: dict(phases) for component, phases in _timings.items()}
+    for phases in components.values():
+        phases["total"] = sum(phases.values())
+    return {
+        "components": components,
+        "total_seconds": sum(phases["total"] for phases in components.values()),
+        "since_process_start_seconds": time.perf_counter() - _process_start,
+    }
+
+def format_startup_report(report: Dict = None) -> str:
+    report = report or get_startup_report()
+    lines = ["Startup report:"]
+    ordered = sorted(report["components"].items(), key=lambda item: item[1]["total"], reverse=True)
+    for component, phases in ordered:
+        breakdown = ", ".join(f"{phase} {seconds * 1000:.1f} ms" for phase, seconds in phases.items() if phase != "total")
+        lines.append(f"  {component:<16} {phases['total'] * 1000:9.1f} ms  ({breakdown})")
+    lines.append(f"  {'total':<16} {report['total_seconds'] * 1000:9.1f} ms")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    # Cold-start profile of every analysis component in a fresh process
+    with timed("input_analysis", "import"):
+        from input_analysis import ConversationAnalyzer
+    ConversationAnalyzer().prewarm()
+
+    report = get_startup_report()
+    if "--json" in sys.argv:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_startup_report(report))
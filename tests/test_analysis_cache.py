@@ -0,0 +1,107 @@
+import pytest
+
+from analysis_cache import AnalysisCache
+from models import Decision, MoralDimension
+
+VERSION = "model-a"
+
+def _result(text: str) -> dict:
+    return {
+        "text": text,
+        "sentiment": {"compound": 0.5},
+        "decision": Decision(text, "", {MoralDimension.HARM_CARE: 4.0}),
+    }
+
+@pytest.fixture
+def cache():
+    cache = AnalysisCache(max_entries=3)
+    yield cache
+    cache.close()
+
+def test_miss_then_hit(cache):
+    assert cache.get("hello", VERSION) is None
+    cache.put("hello", VERSION, _result("hello"))
+    assert cache.get("hello", VERSION)["text"] == "hello"
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hits"] == 1
+
+def test_trivial_edits_share_an_entry(cache):
+    cache.put("café\r\nau lait", VERSION, _result("cafe"))
+    assert cache.get("  café\nau lait ", VERSION) is not None
+
+def test_least_recently_used_entry_is_evicted(cache):
+    for text in ("a", "b", "c"):
+        cache.put(text, VERSION, _result(text))
+    # Touch "a" so "b" becomes the least recently used
+    assert cache.get("a", VERSION) is not None
+    cache.put("d", VERSION, _result("d"))
+
+    assert cache.get("b", VERSION) is None
+    for text in ("a", "c", "d"):
+        assert cache.get(text, VERSION) is not None
+    stats = cache.stats()
+    assert stats["entries"] == 3
+    assert stats["evictions"] == 1
+
+def test_versions_do_not_share_entries(cache):
+    cache.put("hello", VERSION, _result("hello"))
+    assert cache.get("hello", "model-b") is None
+
+def test_hits_are_independent_copies(cache):
+    original = _result("hello")
+    cache.put("hello", VERSION, original)
+    original["sentiment"]["compound"] = -1.0
+
+    first = cache.get("hello", VERSION)
+    first["sentiment"]["compound"] = 2.0
+    second = cache.get("hello", VERSION)
+    assert second["sentiment"]["compound"] == 0.5
+    assert second["decision"] is not first["decision"]
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite")
+    cache = AnalysisCache(max_entries=1, db_path=db_path)
+    cache.put("a", VERSION, _result("a"))
+    cache.put("b", VERSION, _result("b"))
+    # "a" fell out of memory but is still on disk
+    assert cache.get("a", VERSION)["text"] == "a"
+    assert cache.stats()["disk_hits"] == 1
+    cache.close()
+
+    reopened = AnalysisCache(db_path=db_path)
+    result = reopened.get("b", VERSION)
+    assert result["decision"].moral_scores == {MoralDimension.HARM_CARE: 4.0}
+    reopened.close()
+
+def test_versions_sharing_a_disk_tier_keep_their_entries(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite")
+    old, new = AnalysisCache(db_path=db_path), AnalysisCache(db_path=db_path)
+    old.put("a", VERSION, _result("old a"))
+    new.put("a", "model-b", _result("new a"))
+    old.close()
+    new.close()
+
+    # Reconnecting under either version leaves the other's entries in place
+    for version, text in ((VERSION, "old a"), ("model-b", "new a"), (VERSION, "old a")):
+        cache = AnalysisCache(db_path=db_path)
+        assert cache.get("a", version)["text"] == text
+        assert cache.stats()["invalidations"] == 0
+        cache.close()
+
+def test_prune_removes_other_versions_and_old_entries(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite")
+    cache = AnalysisCache(max_entries=0, db_path=db_path)
+    cache.put("a", VERSION, _result("a"))
+    cache.put("b", "model-b", _result("b"))
+    cache.put("c", "model-c", _result("c"))
+
+    assert cache.prune() == 0
+    assert cache.prune(keep_versions=[VERSION, "model-b"]) == 1
+    assert cache.get("c", "model-c") is None
+    assert cache.get("b", "model-b") is not None
+    assert cache.stats()["invalidations"] == 1
+
+    assert cache.prune(max_age=3600) == 0
+    assert cache.prune(max_age=0) == 2
+    assert cache.get("a", VERSION) is None
+    cache.close()
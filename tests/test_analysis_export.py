@@ -0,0 +1,153 @@
+import csv
+import json
+import math
+
+import numpy as np
+import pytest
+
+from analysis_export import ExportSchema, export_analyses, export_conversation_log, iter_npz_chunks
+from conversation_store import ConversationStore, text_hash
+from input_analysis import analysis_to_dict
+from models import DIMENSIONS, Decision, MoralDimension, PhilosophicalCompendium, Philosophy
+
+def _row(index: int) -> dict:
+    moral_scores = {dimension: float((index + offset) % 21 - 10) for offset, dimension in enumerate(DIMENSIONS)}
+    decision = Decision(f"text {index}", "", moral_scores)
+    return analysis_to_dict({
+        "text": f"Text number {index}, with a comma and \"quotes\" ✓",
+        "sentiment": {"compound": index / 100, "polarity": -index / 100, "subjectivity": 0.5},
+        "emotions": {"joy": index / 50, "anger": 1 - index / 50},
+        "key_phrases": [],
+        "entities": [],
+        "moral_scores": moral_scores,
+        "decision": decision,
+        "philosophical_evaluation": PhilosophicalCompendium().evaluate_decision(decision),
+    })
+
+def _rows(count: int):
+    return [dict(_row(index), id=str(index)) for index in range(count)]
+
+def _read_csv(path):
+    with open(path, encoding="utf-8", newline="") as handle:
+        return list(csv.DictReader(handle))
+
+def _read_jsonl(path):
+    with open(path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle]
+
+def _read_npz(path):
+    chunks = list(iter_npz_chunks(path))
+    columns = chunks[0].keys() if chunks else []
+    return chunks, {column: np.concatenate([chunk[column] for chunk in chunks]) for column in columns}
+
+def _expected(row: dict, column: str):
+    # The value a row should export under `column`, or None when absent
+    if column in ("id", "text"):
+        return row.get(column)
+    if column == "goodness":
+        return row.get("goodness")
+    prefix, _, key = column.partition("_")
+    source = {
+        "sentiment": "sentiment", "emotion": "emotions", "moral": "moral_scores", "philosophy": "philosophical_evaluation",
+    }[prefix]
+    return row.get(source, {}).get(key)
+
+@pytest.mark.parametrize("export_format", ["csv", "jsonl", "npz"])
+def test_round_trip_across_chunk_boundaries(tmp_path, export_format):
+    rows = _rows(25)
+    path = str(tmp_path / f"out.{export_format}")
+    schema = ExportSchema()
+    assert export_analyses(iter(rows), path, chunk_size=10) == 25
+
+    if export_format == "csv":
+        exported = _read_csv(path)
+    elif export_format == "jsonl":
+        exported = _read_jsonl(path)
+    else:
+        chunks, columns = _read_npz(path)
+        assert [len(chunk["id"]) for chunk in chunks] == [10, 10, 5]
+        exported = [{column: columns[column][r] for column in columns} for r in range(len(columns["id"]))]
+
+    assert len(exported) == 25
+    for row, out in zip(rows, exported):
+        assert list(out) == schema.columns
+        for column in schema.columns:
+            expected = _expected(row, column)
+            if column in schema.text_columns:
+                assert out[column] == expected
+            elif expected is None:
+                assert out[column] in ("", None) or math.isnan(out[column])
+            else:
+                assert float(out[column]) == pytest.approx(expected)
+
+def test_missing_fields_export_as_empty_null_and_nan(tmp_path):
+    rows = [{"id": "sparse", "sentiment": {"compound": 0.25}, "moral_scores": {"HARM_CARE": 3.0}}]
+    export_analyses(rows, str(tmp_path / "out.csv"))
+    export_analyses(rows, str(tmp_path / "out.jsonl"))
+    export_analyses(rows, str(tmp_path / "out.npz"))
+
+    csv_row = _read_csv(tmp_path / "out.csv")[0]
+    jsonl_row = _read_jsonl(tmp_path / "out.jsonl")[0]
+    _, npz_columns = _read_npz(str(tmp_path / "out.npz"))
+
+    assert csv_row["text"] == "" and jsonl_row["text"] == "" and npz_columns["text"][0] == ""
+    for column in ("sentiment_polarity", "emotion_joy", "moral_PURITY_SANCTITY", "goodness", "philosophy_GOLDEN_RULE"):
+        assert csv_row[column] == ""
+        assert jsonl_row[column] is None
+        assert math.isnan(npz_columns[column][0])
+    assert float(csv_row["sentiment_compound"]) == jsonl_row["sentiment_compound"] == npz_columns["sentiment_compound"][0] == 0.25
+    assert float(csv_row["moral_HARM_CARE"]) == jsonl_row["moral_HARM_CARE"] == npz_columns["moral_HARM_CARE"][0] == 3.0
+
+def test_npz_text_is_not_padded_to_the_longest_row(tmp_path):
+    rows = [{"id": str(index), "text": "ü" * 100000 if index == 3 else "hi"} for index in range(1000)]
+    path = tmp_path / "out.npz"
+    export_analyses(rows, str(path), chunk_size=500)
+    assert path.stat().st_size < 1_000_000
+    _, columns = _read_npz(str(path))
+    assert columns["text"][3] == "ü" * 100000
+    assert set(columns["text"][:3]) == {"hi"}
+
+@pytest.mark.parametrize("export_format", ["csv", "jsonl", "npz"])
+def test_empty_input_writes_a_valid_file(tmp_path, export_format):
+    path = str(tmp_path / f"out.{export_format}")
+    assert export_analyses([], path) == 0
+    if export_format == "csv":
+        with open(path, encoding="utf-8", newline="") as handle:
+            assert next(csv.reader(handle)) == ExportSchema().columns
+        assert _read_csv(path) == []
+    elif export_format == "jsonl":
+        assert _read_jsonl(path) == []
+    else:
+        assert _read_npz(path)[0] == []
+
+def test_conversation_log_export_matches_evaluate_many(tmp_path):
+    log_path = str(tmp_path / "conversation.vclog")
+    rng = np.random.default_rng(3)
+    scores = rng.uniform(-10, 10, size=(12, len(DIMENSIONS)))
+    with ConversationStore(log_path) as store:
+        for index, row in enumerate(scores):
+            moral_scores = {dimension: score for dimension, score in zip(DIMENSIONS, row)}
+            if index % 4 == 0:
+                del moral_scores[MoralDimension.LOYALTY_INGROUP]
+            store.append(f"message {index}", {"compound": 0.1 * index}, {"joy": 0.5}, moral_scores, timestamp=float(index))
+
+    path = str(tmp_path / "log.npz")
+    assert export_conversation_log(log_path, path, chunk_size=5) == 12
+    _, columns = _read_npz(path)
+
+    compendium = PhilosophicalCompendium()
+    decisions = [
+        Decision("", "", {
+            dimension: score for dimension, score in zip(DIMENSIONS, row)
+            if not (index % 4 == 0 and dimension is MoralDimension.LOYALTY_INGROUP)
+        })
+        for index, row in enumerate(scores)
+    ]
+    expected = compendium.evaluate_many(decisions)
+    for philosophy in Philosophy:
+        column = compendium.philosophy_order.index(philosophy)
+        assert columns[f"philosophy_{philosophy.name}"] == pytest.approx(expected[:, column])
+    assert columns["goodness"] == pytest.approx([decision.goodness for decision in decisions])
+    assert math.isnan(columns["moral_LOYALTY_INGROUP"][0])
+    assert columns["sentiment_compound"] == pytest.approx([0.1 * index for index in range(12)])
+    assert list(columns["id"]) == [text_hash(f"message {index}").hex() for index in range(12)]
@@ -0,0 +1,66 @@
+import random
+
+import numpy as np
+import pytest
+
+from batch_scheduler import TokenBudgetScheduler
+
+class RecordingBackend:
+    # Stands in for an EmotionBackend: each row's "probabilities" are its
+    # first token and its length, so results can be traced back to inputs
+    labels = ["first", "length"]
+
+    def __init__(self):
+        self.batches = []
+
+    def predict_ids(self, ids_list):
+        self.batches.append([len(ids) for ids in ids_list])
+        return np.array([[ids[0], len(ids)] for ids in ids_list], dtype=np.float64)
+
+def _random_lengths(seed: int, count: int, longest: int):
+    rng = random.Random(seed)
+    return [rng.randint(1, longest) for _ in range(count)]
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("max_tokens,max_batch_size", [(64, 256), (512, 8), (4096, 256)])
+def test_plan_covers_every_row_once_within_budget(seed, max_tokens, max_batch_size):
+    lengths = _random_lengths(seed, 300, 200)
+    scheduler = TokenBudgetScheduler(RecordingBackend(), max_tokens=max_tokens, max_batch_size=max_batch_size)
+
+    batches = scheduler.plan(lengths)
+    assert sorted(index for batch in batches for index in batch) == list(range(len(lengths)))
+    for batch in batches:
+        assert len(batch) <= max_batch_size
+        padded = len(batch) * max(lengths[index] for index in batch)
+        # Only a lone row longer than the budget may exceed it
+        assert padded <= max_tokens or len(batch) == 1
+
+def test_plan_keeps_input_order_among_equal_lengths():
+    lengths = [5, 3, 5, 3, 5, 3]
+    batches = TokenBudgetScheduler(RecordingBackend(), max_tokens=10).plan(lengths)
+    assert batches == [[1, 3, 5], [0, 2], [4]]
+
+def test_plan_gives_an_oversized_row_its_own_batch():
+    batches = TokenBudgetScheduler(RecordingBackend(), max_tokens=10).plan([2, 50, 2])
+    assert batches == [[0, 2], [1]]
+
+def test_plan_of_nothing_is_empty():
+    assert TokenBudgetScheduler(RecordingBackend()).plan([]) == []
+
+@pytest.mark.parametrize("seed", range(5))
+def test_predict_ids_returns_rows_in_input_order(seed):
+    lengths = _random_lengths(seed, 100, 60)
+    ids_list = [[index] + [0] * (length - 1) for index, length in enumerate(lengths)]
+    backend = RecordingBackend()
+    scheduler = TokenBudgetScheduler(backend, max_tokens=256)
+
+    probabilities = scheduler.predict_ids(ids_list)
+    assert probabilities[:, 0].tolist() == list(range(len(ids_list)))
+    assert probabilities[:, 1].tolist() == lengths
+    assert all(len(batch) * max(batch) <= 256 for batch in backend.batches)
+
+    stats = scheduler.stats()
+    assert stats["texts"] == len(ids_list)
+    assert stats["batches"] == len(backend.batches)
+    assert stats["real_tokens"] == sum(lengths)
+    assert 0 < stats["padding_efficiency"] <= 1
@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+pytest.importorskip("PyQt5")
+
+from compass_overlay import GridIndex, compass_vertices
+from models import DIMENSIONS
+from moral_compass import AXIS_DIRECTIONS
+
+def _brute_force(points: np.ndarray, x: float, y: float, max_distance: float):
+    if not len(points):
+        return None
+    distances = np.hypot(points[:, 0] - x, points[:, 1] - y)
+    best = int(np.argmin(distances))
+    return best if distances[best] <= max_distance else None
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("cell_size,max_distance", [(8.0, 6.0), (4.0, 6.0), (10.0, 25.0)])
+def test_nearest_matches_brute_force(seed, cell_size, max_distance):
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0, 400, size=(2000, 2))
+    index = GridIndex(points, cell_size=cell_size)
+
+    # Queries inside, on the edge of, and well outside the indexed area
+    queries = np.vstack([rng.uniform(-50, 450, size=(500, 2)), points[:50] + 0.25])
+    for x, y in queries:
+        expected = _brute_force(points, x, y, max_distance)
+        found = index.nearest(x, y, max_distance)
+        if expected is None:
+            assert found is None
+        else:
+            # Equidistant points may resolve either way; the distance must match
+            assert found is not None
+            assert np.hypot(*(points[found] - (x, y))) == pytest.approx(np.hypot(*(points[expected] - (x, y))))
+
+def test_nearest_with_duplicate_points():
+    points = np.array([[10.0, 10.0]] * 5 + [[50.0, 50.0]])
+    index = GridIndex(points, cell_size=8.0)
+    assert index.nearest(11, 11, 3) in range(5)
+    assert index.nearest(50, 52, 3) == 5
+    assert index.nearest(30, 30, 3) is None
+
+def test_empty_index_finds_nothing():
+    assert GridIndex(np.empty((0, 2))).nearest(0, 0, 100) is None
+
+def test_compass_vertices_follow_axis_directions():
+    scores = np.array([[10.0] * len(DIMENSIONS), [-10.0] * len(DIMENSIONS), [np.nan] * len(DIMENSIONS)])
+    vertices = compass_vertices(scores, 400, 400)
+    assert vertices.shape == (3, len(DIMENSIONS), 2)
+    radius = 200 - 20
+    for (dx, dy), vertex in zip(AXIS_DIRECTIONS, vertices[0]):
+        assert vertex == pytest.approx((200 + dx * radius, 200 + dy * radius))
+    # -10 collapses onto the centre; a missing score is drawn as 0, halfway out
+    assert vertices[1] == pytest.approx(np.full((len(DIMENSIONS), 2), 200.0))
+    assert np.hypot(*(vertices[2] - 200).T) == pytest.approx(np.full(len(DIMENSIONS), radius / 2))
@@ -0,0 +1,139 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+from conversation_store import (
+    DEFAULT_EMOTION_LABELS,
+    HEADER_SIZE,
+    ConversationStore,
+    ConversationStoreReader,
+    compact,
+    record_dtype,
+    text_hash,
+)
+from models import DIMENSIONS, MoralDimension
+
+def _append(store: ConversationStore, text: str, value: float, timestamp: float):
+    store.append(
+        text,
+        {"compound": value, "polarity": -value},
+        {"joy": value, "anger": 1 - value},
+        {MoralDimension.HARM_CARE: value * 10, MoralDimension.PURITY_SANCTITY: -value * 10},
+        timestamp=timestamp,
+    )
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / "conversation.vclog")
+
+def test_append_and_read_back_round_trip(log_path):
+    with ConversationStore(log_path) as store:
+        for index in range(5):
+            _append(store, f"message {index}", index / 10, 1000.0 + index)
+
+    reader = ConversationStoreReader(log_path)
+    assert reader.emotion_labels == DEFAULT_EMOTION_LABELS
+    assert len(reader) == 5
+    records = reader.records()
+    assert records["timestamp"].tolist() == [1000.0 + index for index in range(5)]
+    assert records["compound"].tolist() == pytest.approx([index / 10 for index in range(5)])
+    assert records["polarity"].tolist() == pytest.approx([-index / 10 for index in range(5)])
+    assert records[3]["text_hash"].tobytes() == text_hash("message 3")
+
+    joy = DEFAULT_EMOTION_LABELS.index("joy")
+    assert records["emotions"][:, joy].tolist() == pytest.approx([index / 10 for index in range(5)])
+    # Dimensions that were never scored come back as NaN
+    scores = records["moral_scores"][2]
+    for dimension, score in zip(DIMENSIONS, scores):
+        if dimension is MoralDimension.HARM_CARE:
+            assert score == pytest.approx(2.0)
+        elif dimension is MoralDimension.PURITY_SANCTITY:
+            assert score == pytest.approx(-2.0)
+        else:
+            assert math.isnan(score)
+
+def test_replay_rebuilds_context(log_path):
+    with ConversationStore(log_path) as store:
+        for index in range(4):
+            _append(store, f"message {index}", index / 10, 1000.0 + index)
+
+    context = ConversationStoreReader(log_path).replay(chunk_records=3)
+    summary = context.get_context_summary()
+    assert summary["message_count"] == 4
+    assert summary["average_sentiment"] == pytest.approx(0.15)
+    assert list(context.history) == [text_hash(f"message {index}").hex() for index in range(4)]
+    assert list(context.moral_dimension_trend[MoralDimension.HARM_CARE]) == pytest.approx([0.0, 1.0, 2.0, 3.0])
+    # NaN scores are skipped, not replayed as values
+    assert not context.moral_dimension_trend[MoralDimension.LOYALTY_INGROUP]
+
+def test_reopening_appends_after_existing_records(log_path):
+    with ConversationStore(log_path) as store:
+        _append(store, "first", 0.1, 1.0)
+    with ConversationStore(log_path) as store:
+        _append(store, "second", 0.2, 2.0)
+    assert ConversationStoreReader(log_path).records()["timestamp"].tolist() == [1.0, 2.0]
+
+def test_reopening_with_other_emotion_labels_fails(log_path):
+    ConversationStore(log_path).close()
+    with pytest.raises(ValueError):
+        ConversationStore(log_path, emotion_labels=("joy",))
+
+def test_torn_tail_is_ignored_then_truncated(log_path):
+    with ConversationStore(log_path) as store:
+        _append(store, "complete", 0.1, 1.0)
+        _append(store, "torn", 0.2, 2.0)
+    record_size = record_dtype(len(DEFAULT_EMOTION_LABELS)).itemsize
+    # Simulate a crash halfway through writing the second record
+    with open(log_path, "r+b") as handle:
+        handle.truncate(HEADER_SIZE + record_size + record_size // 2)
+
+    assert len(ConversationStoreReader(log_path)) == 1
+
+    with ConversationStore(log_path) as store:
+        _append(store, "after crash", 0.3, 3.0)
+    assert os.path.getsize(log_path) == HEADER_SIZE + 2 * record_size
+    records = ConversationStoreReader(log_path).records()
+    assert records["timestamp"].tolist() == [1.0, 3.0]
+    assert records[1]["text_hash"].tobytes() == text_hash("after crash")
+
+def _texts(path):
+    return [row.tobytes() for row in ConversationStoreReader(path).records()["text_hash"]]
+
+def test_compact_keep_last_and_since(log_path):
+    with ConversationStore(log_path) as store:
+        for index in range(10):
+            _append(store, f"message {index}", index / 10, float(index))
+
+    assert compact(log_path, keep_last=6, since=6.0) == 4
+    assert ConversationStoreReader(log_path).records()["timestamp"].tolist() == [6.0, 7.0, 8.0, 9.0]
+
+def test_compact_dedupe_keeps_latest_per_text(log_path):
+    texts = ["a", "b", "a", "c", "b", "a", "d", "c"]
+    with ConversationStore(log_path) as store:
+        for index, text in enumerate(texts):
+            _append(store, text, index / 10, float(index))
+
+    # A chunk size smaller than the log makes duplicates straddle chunk boundaries
+    assert compact(log_path, dedupe=True, chunk_records=3) == 4
+    records = ConversationStoreReader(log_path).records()
+    assert records["timestamp"].tolist() == [4.0, 5.0, 6.0, 7.0]
+    assert _texts(log_path) == [text_hash(text) for text in ("b", "a", "d", "c")]
+    # The temporary dedupe and compaction files are gone
+    assert os.listdir(os.path.dirname(log_path)) == [os.path.basename(log_path)]
+
+def test_compact_dedupe_matches_reference_on_random_log(log_path):
+    rng = np.random.default_rng(7)
+    texts = [f"text {value}" for value in rng.integers(0, 50, size=500)]
+    with ConversationStore(log_path) as store:
+        for index, text in enumerate(texts):
+            _append(store, text, 0.5, float(index))
+
+    keep_last, since = 400, 150.0
+    start = len(texts) - keep_last
+    latest = {text: index for index, text in enumerate(texts) if index >= start}
+    expected = [index for index, text in enumerate(texts) if index >= since and latest.get(text) == index]
+
+    assert compact(log_path, keep_last=keep_last, since=since, dedupe=True, chunk_records=64) == len(expected)
+    assert ConversationStoreReader(log_path).records()["timestamp"].tolist() == [float(index) for index in expected]
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from models import DIMENSIONS, Decision, DecisionBatch, MoralDimension, PhilosophicalCompendium, Philosophy
+
+def _reference(decision: Decision, base_scores) -> dict:
+    # The per-philosophy formulas evaluate_decision used before the matrix form
+    score = decision.get_dimension_score
+    return {
+        Philosophy.GOLDEN_RULE: base_scores[Philosophy.GOLDEN_RULE] * (1 + score(MoralDimension.FAIRNESS_RECIPROCITY) / 10),
+        Philosophy.UTILITARIANISM: base_scores[Philosophy.UTILITARIANISM] * (1 + score(MoralDimension.HARM_CARE) / 10),
+        Philosophy.KANTIAN_ETHICS: base_scores[Philosophy.KANTIAN_ETHICS] * (1 + score(MoralDimension.AUTHORITY_RESPECT) / 10),
+        Philosophy.VIRTUE_ETHICS: base_scores[Philosophy.VIRTUE_ETHICS] * (1 + score(MoralDimension.PURITY_SANCTITY) / 10),
+        Philosophy.CARE_ETHICS: base_scores[Philosophy.CARE_ETHICS] * (
+            1 + (score(MoralDimension.HARM_CARE) + score(MoralDimension.LOYALTY_INGROUP)) / 20
+        ),
+    }
+
+def _random_decisions(seed: int, count: int):
+    rng = np.random.default_rng(seed)
+    scores = rng.uniform(-12, 12, size=(count, len(DIMENSIONS)))
+    # Leave some dimensions unscored, as the analyzer does
+    scores[rng.random(scores.shape) < 0.2] = np.nan
+    return [
+        Decision(f"decision {row}", "", {dimension: score for dimension, score in zip(DIMENSIONS, values) if score == score})
+        for row, values in enumerate(scores)
+    ]
+
+@pytest.mark.parametrize("seed", range(5))
+def test_evaluate_many_matches_evaluate_decision(seed):
+    compendium = PhilosophicalCompendium()
+    decisions = _random_decisions(seed, 200)
+
+    matrix = compendium.evaluate_many(decisions)
+    assert matrix.shape == (len(decisions), len(compendium.philosophy_order))
+    for row, decision in zip(matrix, decisions):
+        single = compendium.evaluate_decision(decision)
+        assert list(single) == compendium.philosophy_order
+        assert row.tolist() == list(single.values())
+        assert single == pytest.approx(_reference(decision, compendium.philosophies), abs=1e-12)
+
+@pytest.mark.parametrize("seed", range(3))
+def test_evaluate_many_accepts_batches_and_matrices(seed):
+    compendium = PhilosophicalCompendium()
+    decisions = _random_decisions(seed, 50)
+    expected = compendium.evaluate_many(decisions)
+
+    batch = DecisionBatch.from_decisions(decisions)
+    assert np.array_equal(compendium.evaluate_many(batch), expected)
+    assert np.array_equal(compendium.evaluate_many(batch.filled_scores()), expected)
+
+def test_evaluate_many_of_nothing_is_empty():
+    compendium = PhilosophicalCompendium()
+    assert compendium.evaluate_many([]).shape == (0, len(compendium.philosophy_order))
+
+def test_weights_are_read_only_and_reassignment_rebuilds_matrices():
+    compendium = PhilosophicalCompendium()
+    with pytest.raises(TypeError):
+        compendium.philosophies[Philosophy.GOLDEN_RULE] = 2.0
+
+    decision = _random_decisions(0, 1)[0]
+    compendium.philosophies = {**compendium.philosophies, Philosophy.GOLDEN_RULE: 2.0}
+    assert compendium.get_philosophy_score(Philosophy.GOLDEN_RULE) == 2.0
+    assert compendium.evaluate_decision(decision) == pytest.approx(_reference(decision, compendium.philosophies), abs=1e-12)
+    assert compendium.evaluate_many([decision])[0].tolist() == list(compendium.evaluate_decision(decision).values())
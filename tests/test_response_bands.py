@@ -0,0 +1,98 @@
+import math
+
+import pytest
+
+from models import MoralDimension, Philosophy
+from response_generator import (
+    DEFAULT_EMOTION_CONTEXT,
+    DIMENSION_GUIDANCE,
+    EMOTION_CONTEXT,
+    PHILOSOPHY_GUIDANCE,
+    RECOMMENDATION_THRESHOLDS,
+    RECOMMENDATIONS,
+    SENTIMENT_PHRASES,
+    SENTIMENT_THRESHOLDS,
+    STANDING_PHRASES,
+    STANDING_THRESHOLDS,
+    VERDICT_THRESHOLDS,
+    VERDICTS,
+    _banded,
+)
+
+# The if/elif chains the band tables replaced, verbatim
+def _old_verdict(goodness):
+    if goodness > 0.6:
+        return "most virtuous and commendable"
+    elif goodness > 0.2:
+        return "generally sound, though not without its perils"
+    elif goodness > -0.2:
+        return "a matter of great complexity, with virtue and vice intertwined"
+    elif goodness > -0.6:
+        return "fraught with moral hazard, requiring utmost caution"
+    else:
+        return "most troubling, and mayhap best avoided"
+
+def _old_sentiment(sentiment_score):
+    if sentiment_score > 0.5:
+        return "most favorably"
+    elif sentiment_score > 0:
+        return "with a gentle warmth"
+    elif sentiment_score > -0.5:
+        return "with a touch of melancholy"
+    else:
+        return "towards the shadows of discontent"
+
+def _old_standing(goodness):
+    if goodness > 0.5:
+        return "suggests it leans towards being ethically sound. However, we must carefully consider its implications.\n"
+    elif goodness > 0:
+        return "indicates some positive ethical aspects, but there's significant room for improvement.\n"
+    elif goodness > -0.5:
+        return "raises serious ethical concerns and requires careful reconsideration.\n"
+    else:
+        return "indicates severe ethical issues that strongly suggest against this course of action.\n"
+
+def _old_recommendation(goodness):
+    if goodness > 0.3:
+        return "While the decision has some positive aspects, it's crucial to address the ethical concerns raised above before proceeding. Consider ways to mitigate potential negative impacts and enhance the positive outcomes."
+    elif goodness > -0.3:
+        return "Given the significant ethical concerns, it's strongly advised to reconsider this decision. Explore alternative options that better align with ethical principles and address the issues raised in this analysis."
+    else:
+        return "The ethical analysis strongly suggests against this course of action. It's highly recommended to abandon this decision and seek alternatives that are more ethically sound and aligned with moral principles."
+
+def _old_emotion_context(dominant_emotion):
+    if dominant_emotion in ['joy', 'trust']:
+        return "might indicate a positive disposition, but we must be cautious of overlooking potential ethical pitfalls due to optimism.\n"
+    elif dominant_emotion in ['anger', 'disgust', 'fear']:
+        return "suggests underlying issues that need to be addressed. This emotional response could be indicative of ethical red flags.\n"
+    else:
+        return "requires further exploration to understand its impact on the ethical implications of this decision.\n"
+
+def _probe_values(thresholds):
+    # Every threshold exactly, the nearest floats on either side, and the extremes
+    values = [-1.0, 1.0, -10.0, 10.0, 0.0, -0.0]
+    for threshold in thresholds:
+        values += [threshold, math.nextafter(threshold, -math.inf), math.nextafter(threshold, math.inf)]
+    values += [step / 100 for step in range(-100, 101)]
+    return values
+
+BANDS = [
+    (VERDICT_THRESHOLDS, VERDICTS, _old_verdict),
+    (SENTIMENT_THRESHOLDS, SENTIMENT_PHRASES, _old_sentiment),
+    (STANDING_THRESHOLDS, STANDING_PHRASES, _old_standing),
+    (RECOMMENDATION_THRESHOLDS, RECOMMENDATIONS, _old_recommendation),
+]
+
+@pytest.mark.parametrize("thresholds,phrases,old", BANDS, ids=["verdict", "sentiment", "standing", "recommendation"])
+def test_band_tables_match_old_thresholds(thresholds, phrases, old):
+    assert len(phrases) == len(thresholds) + 1
+    for value in _probe_values(thresholds):
+        assert _banded(value, thresholds, phrases) == old(value), value
+
+@pytest.mark.parametrize("emotion", ["joy", "trust", "anger", "disgust", "fear", "neutral", "sadness", "surprise", ""])
+def test_emotion_context_matches_old_branches(emotion):
+    assert EMOTION_CONTEXT.get(emotion, DEFAULT_EMOTION_CONTEXT) == _old_emotion_context(emotion)
+
+def test_every_dimension_and_philosophy_has_guidance():
+    assert set(DIMENSION_GUIDANCE) == set(MoralDimension)
+    assert set(PHILOSOPHY_GUIDANCE) == set(Philosophy)